@@ -0,0 +1,204 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import product
+
+from tqdm import tqdm
+
+from gymnasium_search_race.annealing import (
+    ACCEPTANCES,
+    SearchRaceAnnealer,
+    get_heuristic_actions,
+)
+from gymnasium_search_race.envs.lower_bound import get_test_lower_bounds
+from gymnasium_search_race.envs.physics import PHYSICS_BACKENDS
+from gymnasium_search_race.envs.search_race import get_test_ids, load_test_checkpoints
+from gymnasium_search_race.storage import (
+    merge_best_actions,
+    read_best_actions,
+    write_best_actions,
+)
+
+
+def anneal_test_id(
+    test_id: int,
+    initial_actions: list[list[int]] | None = None,
+    time_budget: float = 10.0,
+    acceptance: str = "annealing",
+    initial_temperature: float = 2.0,
+    final_temperature: float = 0.05,
+    physics_backend: str = "numba",
+    seed: int | None = None,
+) -> tuple[int, list[list[int]], bool]:
+    checkpoints = load_test_checkpoints()[get_test_ids().index(test_id)]
+
+    if initial_actions is None:
+        initial_actions = get_heuristic_actions(
+            checkpoints=checkpoints,
+            physics_backend=physics_backend,
+        )
+
+    annealer = SearchRaceAnnealer(
+        checkpoints=checkpoints,
+        physics_backend=physics_backend,
+        acceptance=acceptance,
+        initial_temperature=initial_temperature,
+        final_temperature=final_temperature,
+        seed=seed,
+    )
+    actions, _length = annealer.optimize(
+        actions=initial_actions,
+        time_budget=time_budget,
+    )
+    return test_id, actions.tolist(), annealer.finished
+
+
+def anneal_best_actions(
+    test_ids: list[int],
+    current_actions: dict[str, list[list[int]]],
+    n_starts: int = 4,
+    time_budget: float = 10.0,
+    acceptance: str = "annealing",
+    initial_temperature: float = 2.0,
+    final_temperature: float = 0.05,
+    physics_backend: str = "numba",
+    n_jobs: int | None = None,
+    seed: int | None = None,
+) -> dict[str, list[list[int]]]:
+    # each start of a map runs for time_budget seconds in its own process, the
+    # first one from the current best actions if there are some, the other ones
+    # from the heuristic policy
+    best_actions = {}
+
+    with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count()) as executor:
+        futures = [
+            executor.submit(
+                anneal_test_id,
+                test_id=test_id,
+                initial_actions=(
+                    current_actions.get(str(test_id)) if start == 0 else None
+                ),
+                time_budget=time_budget,
+                acceptance=acceptance,
+                initial_temperature=initial_temperature,
+                final_temperature=final_temperature,
+                physics_backend=physics_backend,
+                seed=None if seed is None else seed + i,
+            )
+            for i, (test_id, start) in enumerate(product(test_ids, range(n_starts)))
+        ]
+
+        for future in tqdm(
+            as_completed(futures),
+            total=len(futures),
+            desc="Anneal best actions",
+        ):
+            test_id, actions, finished = future.result()
+            key = str(test_id)
+
+            if finished and (
+                key not in best_actions or len(actions) < len(best_actions[key])
+            ):
+                best_actions[key] = actions
+
+    for test_id in test_ids:
+        if str(test_id) in best_actions:
+            print(f"Test {test_id:03}: {len(best_actions[str(test_id)])}")
+        else:
+            print(f"Test {test_id:03}: not finished")
+
+    print("Total:", sum(len(actions) for actions in best_actions.values()))
+
+    return best_actions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Search best integer actions for Search Race with annealing",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--test-ids",
+        type=int,
+        nargs="+",
+        help="test ids to optimize (default: all)",
+    )
+    parser.add_argument(
+        "--n-starts",
+        type=int,
+        default=4,
+        help="number of independent starts per map",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        default=10.0,
+        help="wall-clock time of each start in seconds",
+    )
+    parser.add_argument(
+        "--acceptance",
+        choices=ACCEPTANCES,
+        default="annealing",
+        help="acceptance of the moves: simulated annealing or late acceptance",
+    )
+    parser.add_argument(
+        "--initial-temperature",
+        type=float,
+        default=2.0,
+        help="initial temperature of simulated annealing",
+    )
+    parser.add_argument(
+        "--final-temperature",
+        type=float,
+        default=0.05,
+        help="final temperature of simulated annealing",
+    )
+    parser.add_argument(
+        "--physics-backend",
+        choices=PHYSICS_BACKENDS,
+        default="numba",
+        help="backend of the physics kernels",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="random generator seed",
+    )
+    parser.add_argument(
+        "--output-path",
+        help="path to output GZIP compressed JSON file (.json.gz) or binary store",
+    )
+    args = parser.parse_args()
+
+    existing_actions = (
+        read_best_actions(path=args.output_path)
+        if args.output_path and os.path.exists(args.output_path)
+        else {}
+    )
+    annealed_actions = anneal_best_actions(
+        test_ids=args.test_ids or get_test_ids(),
+        current_actions=existing_actions,
+        n_starts=args.n_starts,
+        time_budget=args.time_budget,
+        acceptance=args.acceptance,
+        initial_temperature=args.initial_temperature,
+        final_temperature=args.final_temperature,
+        physics_backend=args.physics_backend,
+        n_jobs=args.n_jobs,
+        seed=args.seed,
+    )
+
+    if args.output_path:
+        write_best_actions(
+            path=args.output_path,
+            actions=merge_best_actions(
+                actions_1=existing_actions,
+                actions_2=annealed_actions,
+                lower_bounds=get_test_lower_bounds(),
+            ),
+        )
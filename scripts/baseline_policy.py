@@ -1,30 +1,8 @@
 import argparse
-from typing import Any
 
 import gymnasium as gym
-import numpy as np
-from gymnasium.core import ActType, ObsType
 
-
-def get_next_action(observation: ObsType, info: dict[str, Any]) -> ActType:
-    car_angle = info["angle"]
-    next_cp_diff = observation[:2] * info["distance_upper_bound"]
-    next_checkpoint_angle = np.rad2deg(np.arctan2(next_cp_diff[1], next_cp_diff[0]))
-    right_diff_angle = (next_checkpoint_angle - car_angle) % 360
-    left_diff_angle = (car_angle - next_checkpoint_angle) % 360
-
-    angle = np.clip(
-        (right_diff_angle if right_diff_angle < left_diff_angle else -left_diff_angle),
-        -info["max_rotation_per_turn"],
-        info["max_rotation_per_turn"],
-    )
-
-    thrust = 50 if np.linalg.norm(next_cp_diff) < 3000 else 100
-
-    return np.array([angle, thrust]) / [
-        info["max_rotation_per_turn"],
-        info["car_max_thrust"],
-    ]
+from gymnasium_search_race.policies import HeuristicPolicy
 
 
 def baseline_policy(
@@ -34,12 +12,13 @@ def baseline_policy(
     n_timesteps: int = 600,
 ) -> None:
     env = gym.make(env_id, render_mode="human")
+    policy = HeuristicPolicy.from_env(env)
 
-    observation, info = env.reset(seed=seed, options={"test_id": test_id})
+    observation, _info = env.reset(seed=seed, options={"test_id": test_id})
 
     for _ in range(n_timesteps):
-        action = get_next_action(observation=observation, info=info)
-        observation, _reward, terminated, truncated, info = env.step(action)
+        action, _ = policy.predict(observation)
+        observation, _reward, terminated, truncated, _info = env.step(action)
 
         if terminated or truncated:
             break
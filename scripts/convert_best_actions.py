@@ -0,0 +1,36 @@
+import argparse
+from pathlib import Path
+
+from gymnasium_search_race.storage import json_to_store, store_to_json
+
+
+def convert_best_actions(input_path: Path, output_path: Path) -> None:
+    if input_path.name.endswith(".json.gz"):
+        store = json_to_store(json_path=input_path, store_path=output_path)
+        print(f"Converted {len(store)} test cases to {output_path}")
+    else:
+        store_to_json(store_path=input_path, json_path=output_path)
+        print(f"Converted {input_path} to {output_path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Convert best actions between compressed JSON and binary store",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-i",
+        "--input-path",
+        type=Path,
+        required=True,
+        help="path to input .json.gz file or binary store",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-path",
+        type=Path,
+        required=True,
+        help="path to output binary store or .json.gz file",
+    )
+    args = parser.parse_args()
+    convert_best_actions(input_path=args.input_path, output_path=args.output_path)
@@ -0,0 +1,126 @@
+import argparse
+
+import gymnasium as gym
+import numpy as np
+from stable_baselines3 import PPO
+from tqdm import tqdm
+
+from gymnasium_search_race.storage import TrajectoryWriter, read_best_actions
+from gymnasium_search_race.wrappers import RecordTrajectories
+
+
+def make_recorded_env(
+    env_id: str,
+    output_path: str,
+    shard_size: int,
+) -> RecordTrajectories:
+    env = gym.make(env_id)
+    writer = TrajectoryWriter(
+        path=output_path,
+        observation_shape=env.observation_space.shape,
+        observation_dtype=env.observation_space.dtype,
+        action_shape=env.action_space.shape,
+        action_dtype=env.action_space.dtype,
+        shard_size=shard_size,
+    )
+    return RecordTrajectories(env, writer=writer)
+
+
+def export_model_trajectories(
+    env: RecordTrajectories,
+    model_path: str,
+    n_episodes: int = 1,
+    deterministic: bool = True,
+) -> None:
+    model = PPO.load(path=model_path, env=env)
+
+    for test_id in tqdm(env.get_wrapper_attr("test_ids"), desc="Export trajectories"):
+        for _ in range(n_episodes):
+            observation, _info = env.reset(options={"test_id": test_id})
+            terminated = truncated = False
+
+            while not terminated and not truncated:
+                action, _ = model.predict(
+                    observation=observation,
+                    deterministic=deterministic,
+                )
+                observation, _reward, terminated, truncated, _info = env.step(action)
+
+
+def export_best_actions_trajectories(
+    env: RecordTrajectories,
+    best_actions_path: str,
+) -> None:
+    best_actions = read_best_actions(path=best_actions_path)
+    scale = np.array(
+        [
+            env.get_wrapper_attr("max_rotation_per_turn"),
+            env.get_wrapper_attr("car_max_thrust"),
+        ]
+    )
+
+    for test_id, actions in tqdm(best_actions.items(), desc="Export trajectories"):
+        env.reset(options={"test_id": int(test_id)})
+
+        # actions are replayed in the continuous action space
+        for action in actions:
+            env.step(np.asarray(action) / scale)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export trajectories in memory-mapped shards",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--env",
+        default="gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+        help="environment id",
+    )
+    parser.add_argument(
+        "--model-path",
+        help="path to model file",
+    )
+    parser.add_argument(
+        "--best-actions-path",
+        help="path to best actions file to replay with a continuous environment",
+    )
+    parser.add_argument(
+        "--n-episodes",
+        type=int,
+        default=1,
+        help="number of episodes per test case with a model",
+    )
+    parser.add_argument(
+        "--shard-size",
+        type=int,
+        default=100_000,
+        help="number of transitions per shard",
+    )
+    parser.add_argument(
+        "--output-path",
+        required=True,
+        help="path to output folder",
+    )
+    args = parser.parse_args()
+
+    recorded_env = make_recorded_env(
+        env_id=args.env,
+        output_path=args.output_path,
+        shard_size=args.shard_size,
+    )
+
+    if args.model_path:
+        export_model_trajectories(
+            env=recorded_env,
+            model_path=args.model_path,
+            n_episodes=args.n_episodes,
+        )
+
+    if args.best_actions_path:
+        export_best_actions_trajectories(
+            env=recorded_env,
+            best_actions_path=args.best_actions_path,
+        )
+
+    recorded_env.close()
@@ -0,0 +1,76 @@
+import argparse
+from pathlib import Path
+
+from tqdm import tqdm
+
+from gymnasium_search_race.envs.map_generator import generate_maps
+from gymnasium_search_race.storage import MapPack
+
+
+def generate_map_pack(
+    path: Path,
+    n_maps: int,
+    seed: int = 0,
+    min_checkpoints: int = 3,
+    max_checkpoints: int = 8,
+    chunk_size: int = 10_000,
+) -> MapPack:
+    map_pack = MapPack(path)
+
+    for start in tqdm(range(0, n_maps, chunk_size), desc="Generate maps"):
+        indexes = range(start, min(start + chunk_size, n_maps))
+        maps = generate_maps(
+            indexes=indexes,
+            seed=seed,
+            min_checkpoints=min_checkpoints,
+            max_checkpoints=max_checkpoints,
+        )
+        map_pack.update(zip(indexes, maps))
+
+    return map_pack
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Generate procedural maps in a binary map pack",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-o",
+        "--output-path",
+        type=Path,
+        required=True,
+        help="path to output map pack",
+    )
+    parser.add_argument(
+        "--n-maps",
+        type=int,
+        default=10_000,
+        help="number of maps",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="seed of the maps stream",
+    )
+    parser.add_argument(
+        "--min-checkpoints",
+        type=int,
+        default=3,
+        help="minimum number of checkpoints",
+    )
+    parser.add_argument(
+        "--max-checkpoints",
+        type=int,
+        default=8,
+        help="maximum number of checkpoints",
+    )
+    args = parser.parse_args()
+    generate_map_pack(
+        path=args.output_path,
+        n_maps=args.n_maps,
+        seed=args.seed,
+        min_checkpoints=args.min_checkpoints,
+        max_checkpoints=args.max_checkpoints,
+    )
@@ -1,21 +1,25 @@
 import argparse
 import importlib
+import math
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
 from typing import Any
 
 import optuna
-from rl_zoo3.exp_manager import ExperimentManager
-from rl_zoo3.hyperparams_opt import HYPERPARAMS_SAMPLER
+import torch
+import yaml
+from stable_baselines3 import PPO
+from stable_baselines3.common.env_util import make_vec_env
 from torch import nn
 
-ALGO = "ppo"
+from gymnasium_search_race.callbacks import EvalTestCasesCallback
+from gymnasium_search_race.evaluation import TestCasesEvaluator
 
+HYPERPARAMS_PATH = Path("hyperparams") / "ppo.yml"
+PRUNERS = ("median", "hyperband", "none")
 
-def sample_ppo_params(
-    trial: optuna.Trial,
-    _n_actions: int,
-    _n_envs: int,
-    _additional_args: dict,
-) -> dict[str, Any]:
+
+def sample_ppo_params(trial: optuna.Trial) -> dict[str, Any]:
     # From 2**5=32 to 2**10=1024
     batch_size = 2 ** trial.suggest_int("batch_size_pow", 5, 10)
     # From 2**5=32 to 2**12=4096
@@ -64,27 +68,180 @@ def sample_ppo_params(
     }
 
 
-def optimize_hyperparams(env_id: str) -> None:
-    HYPERPARAMS_SAMPLER[ALGO] = sample_ppo_params
+class TrialEvalCallback(EvalTestCasesCallback):
+    # reports the total length minus the total return of the test cases to the
+    # trial after each evaluation and stops the training when the trial should
+    # be pruned: the return of a finished episode is its number of checkpoints,
+    # so unfinished episodes are ranked by the checkpoints they visited
+    def __init__(
+        self,
+        trial: optuna.Trial,
+        evaluator: TestCasesEvaluator,
+        eval_freq: int = 10_000,
+        verbose: int = 0,
+    ) -> None:
+        super().__init__(evaluator=evaluator, eval_freq=eval_freq, verbose=verbose)
+        self.trial = trial
+        self.eval_index = 0
+        self.best_score = math.inf
+        self.is_pruned = False
+
+    def _on_step(self) -> bool:
+        if self.eval_freq > 0 and self.n_calls % self.eval_freq == 0:
+            score = self.evaluate() - self.last_total_return
+            self.best_score = min(self.best_score, score)
+            self.eval_index += 1
+            self.trial.report(score, self.eval_index)
+
+            if self.trial.should_prune():
+                self.is_pruned = True
+                return False
+
+        return True
+
+
+def load_hyperparams(env_id: str) -> dict[str, Any]:
+    # the hyperparameters of the config file that are not sampled
+    with open(HYPERPARAMS_PATH, "r", encoding="utf-8") as file:
+        hyperparams = yaml.safe_load(file)[env_id]
+
+    return {
+        key: value
+        for key, value in hyperparams.items()
+        if key not in ("n_timesteps", "policy_kwargs")
+    }
+
+
+def objective(
+    trial: optuna.Trial,
+    env_id: str,
+    n_timesteps: int,
+    n_evaluations: int,
+) -> float:
+    hyperparams = {**load_hyperparams(env_id), **sample_ppo_params(trial)}
+    n_envs = hyperparams.pop("n_envs")
+    env = make_vec_env(env_id, n_envs=n_envs, env_kwargs={"sequential_maps": True})
+    model = PPO(env=env, verbose=0, device="cpu", **hyperparams)
+    callback = TrialEvalCallback(
+        trial=trial,
+        evaluator=TestCasesEvaluator(env_id=env_id),
+        eval_freq=max(n_timesteps // n_evaluations // n_envs, 1),
+    )
+
+    try:
+        model.learn(total_timesteps=n_timesteps, callback=callback)
+    except (AssertionError, ValueError) as e:
+        # Sometimes, random hyperparams can generate NaN
+        raise optuna.TrialPruned() from e
+    finally:
+        env.close()
+
+    if callback.is_pruned:
+        raise optuna.TrialPruned()
+
+    trial.set_user_attr("best_total_length", callback.best_total_length)
+    return callback.best_score
+
+
+def get_pruner(pruner: str, n_evaluations: int) -> optuna.pruners.BasePruner:
+    if pruner == "median":
+        return optuna.pruners.MedianPruner(
+            n_startup_trials=5,
+            n_warmup_steps=n_evaluations // 3,
+        )
+
+    if pruner == "hyperband":
+        return optuna.pruners.HyperbandPruner(
+            min_resource=1,
+            max_resource=n_evaluations,
+        )
+
+    return optuna.pruners.NopPruner()
+
+
+def run_trials(
+    env_id: str,
+    study_name: str,
+    storage: str,
+    n_trials: int,
+    n_startup_trials: int,
+    pruner: str,
+    n_timesteps: int,
+    n_evaluations: int,
+) -> None:
+    # the trials of all the processes are counted in the shared storage
     importlib.import_module("gymnasium_search_race")
-    exp_manager = ExperimentManager(
-        args=argparse.Namespace(env=env_id),
-        algo=ALGO,
-        env_id=env_id,
-        log_folder="logs",
-        n_timesteps=500_000,
-        n_eval_episodes=50,
-        env_kwargs={"sequential_maps": True},
-        optimize_hyperparameters=True,
-        storage="logs/hyperparams_tuning.log",
+    study = optuna.load_study(
+        study_name=study_name,
+        storage=storage,
+        sampler=optuna.samplers.TPESampler(n_startup_trials=n_startup_trials),
+        pruner=get_pruner(pruner=pruner, n_evaluations=n_evaluations),
+    )
+    study.optimize(
+        lambda trial: objective(
+            trial=trial,
+            env_id=env_id,
+            n_timesteps=n_timesteps,
+            n_evaluations=n_evaluations,
+        ),
+        callbacks=[
+            optuna.study.MaxTrialsCallback(
+                n_trials,
+                states=(
+                    optuna.trial.TrialState.COMPLETE,
+                    optuna.trial.TrialState.PRUNED,
+                ),
+            )
+        ],
+    )
+
+
+def optimize_hyperparams(
+    env_id: str,
+    storage: str = "sqlite:///logs/hyperparams_tuning.db",
+    n_trials: int = 500,
+    n_startup_trials: int = 20,
+    pruner: str = "median",
+    n_timesteps: int = 500_000,
+    n_evaluations: int = 10,
+    n_jobs: int = 1,
+) -> None:
+    Path("logs").mkdir(exist_ok=True)
+    study = optuna.create_study(
+        storage=storage,
         study_name=env_id,
-        n_trials=500,
-        n_startup_trials=20,
-        n_evaluations=1,
-        config="hyperparams/ppo.yml",
+        direction="minimize",
+        load_if_exists=True,
     )
-    exp_manager.setup_experiment()
-    exp_manager.hyperparameters_optimization()
+
+    # each process runs trials until the total number of trials is reached
+    with ProcessPoolExecutor(
+        max_workers=n_jobs,
+        initializer=torch.set_num_threads,
+        initargs=(1,),
+    ) as executor:
+        futures = [
+            executor.submit(
+                run_trials,
+                env_id=env_id,
+                study_name=env_id,
+                storage=storage,
+                n_trials=n_trials,
+                n_startup_trials=n_startup_trials,
+                pruner=pruner,
+                n_timesteps=n_timesteps,
+                n_evaluations=n_evaluations,
+            )
+            for _ in range(n_jobs)
+        ]
+
+        for future in futures:
+            future.result()
+
+    print("Number of finished trials:", len(study.trials))
+    print("Best score:", study.best_value)
+    print("Best params:", study.best_params)
+    print("Best user attrs:", study.best_trial.user_attrs)
 
 
 if __name__ == "__main__":
@@ -97,6 +254,56 @@ if __name__ == "__main__":
         default="gymnasium_search_race/SearchRaceDiscrete-v3",
         help="environment id",
     )
+    parser.add_argument(
+        "--storage",
+        default="sqlite:///logs/hyperparams_tuning.db",
+        help="Optuna storage shared by the processes",
+    )
+    parser.add_argument(
+        "--n-trials",
+        type=int,
+        default=500,
+        help="total number of trials of the study, pruned trials included",
+    )
+    parser.add_argument(
+        "--n-startup-trials",
+        type=int,
+        default=20,
+        help="number of random trials before the TPE sampler",
+    )
+    parser.add_argument(
+        "--pruner",
+        choices=PRUNERS,
+        default="median",
+        help="pruner of the trials",
+    )
+    parser.add_argument(
+        "--n-timesteps",
+        type=int,
+        default=500_000,
+        help="number of timesteps of each trial",
+    )
+    parser.add_argument(
+        "--n-evaluations",
+        type=int,
+        default=10,
+        help="number of evaluations on the test cases reported during a trial",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        default=1,
+        help="number of processes running trials in parallel",
+    )
     args = parser.parse_args()
 
-    optimize_hyperparams(env_id=args.env)
+    optimize_hyperparams(
+        env_id=args.env,
+        storage=args.storage,
+        n_trials=args.n_trials,
+        n_startup_trials=args.n_startup_trials,
+        pruner=args.pruner,
+        n_timesteps=args.n_timesteps,
+        n_evaluations=args.n_evaluations,
+        n_jobs=args.n_jobs,
+    )
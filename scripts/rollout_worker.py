@@ -0,0 +1,81 @@
+import argparse
+
+from gymnasium_search_race.policies import ACTIVATIONS
+from gymnasium_search_race.rollouts import run_worker
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Run a rollout worker streaming batches to a rollout server",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--host",
+        default="127.0.0.1",
+        help="host of the rollout server",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        required=True,
+        help="port of the rollout server",
+    )
+    parser.add_argument(
+        "--env",
+        default="gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+        help="environment id",
+    )
+    parser.add_argument(
+        "--num-envs",
+        type=int,
+        default=8,
+        help="number of vectorized envs",
+    )
+    parser.add_argument(
+        "--n-steps",
+        type=int,
+        default=128,
+        help="number of steps of each batch",
+    )
+    parser.add_argument(
+        "--net-arch",
+        type=int,
+        nargs="+",
+        default=[64, 64],
+        help="hidden layer sizes of the policy",
+    )
+    parser.add_argument(
+        "--activation",
+        choices=list(ACTIVATIONS),
+        default="tanh",
+        help="activation function of the policy",
+    )
+    parser.add_argument(
+        "--action-noise",
+        type=float,
+        default=0.1,
+        help="standard deviation of the noise of continuous actions",
+    )
+    parser.add_argument(
+        "--asynchronous",
+        action="store_true",
+        help="step the envs in worker processes",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="random generator seed",
+    )
+    args = parser.parse_args()
+
+    n_sent_batches = run_worker(
+        address=(args.host, args.port),
+        env_id=args.env,
+        num_envs=args.num_envs,
+        n_steps=args.n_steps,
+        net_arch=tuple(args.net_arch),
+        activation=args.activation,
+        action_noise=args.action_noise,
+        asynchronous=args.asynchronous,
+        seed=args.seed,
+    )
+    print("Number of sent batches:", n_sent_batches)
@@ -0,0 +1,133 @@
+import argparse
+import asyncio
+import csv
+from pathlib import Path
+
+import numpy as np
+
+from gymnasium_search_race.codingame import (
+    FIRST_TURN_TIMEOUT,
+    TURN_TIMEOUT,
+    run_bots,
+)
+
+RESULT_FIELDS = ["command", "test_id", "length", "return", "finished", "pid", "error"]
+
+
+def write_results(path: Path, results: list[dict]) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as csv_file:
+        writer = csv.DictWriter(
+            csv_file,
+            fieldnames=RESULT_FIELDS,
+            extrasaction="ignore",
+            lineterminator="\n",
+        )
+        writer.writeheader()
+        writer.writerows(results)
+
+
+def print_results(commands: list[str], results: list[dict]) -> None:
+    for command in commands:
+        command_results = [result for result in results if result["command"] == command]
+        errors = [result for result in command_results if result["error"]]
+        played = [result for result in command_results if not result["error"]]
+
+        for result in errors:
+            print(f"Test {result['test_id']:03}: {result['error']}")
+
+        print(command)
+        print(
+            "Finished:",
+            sum(result["finished"] for result in played),
+            "/",
+            len(command_results),
+        )
+        print("Total:", sum(result["length"] for result in played))
+        print("Processes:", len({result["pid"] for result in command_results}))
+
+        if played:
+            print("Mean length:", np.mean([result["length"] for result in played]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play bots using the CodinGame protocol on the test cases",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--bots",
+        nargs="+",
+        required=True,
+        help="commands to run the bots",
+    )
+    parser.add_argument(
+        "--env",
+        default="gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+        help="environment id with continuous actions",
+    )
+    parser.add_argument(
+        "--test-ids",
+        type=int,
+        nargs="+",
+        help="test ids to play (default: all the test cases of the env)",
+    )
+    parser.add_argument(
+        "--n-workers",
+        type=int,
+        default=4,
+        help="number of processes per bot playing concurrently",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="seed of the first test case",
+    )
+    parser.add_argument(
+        "--spawn-per-episode",
+        action="store_true",
+        help="start a new bot process for each episode",
+    )
+    parser.add_argument(
+        "--first-turn-timeout",
+        type=float,
+        default=FIRST_TURN_TIMEOUT,
+        help="response time of the first turn in seconds",
+    )
+    parser.add_argument(
+        "--turn-timeout",
+        type=float,
+        default=TURN_TIMEOUT,
+        help="response time of the other turns in seconds",
+    )
+    parser.add_argument(
+        "--opponent-path",
+        help="path to the opponent model of Mad Pod Racing or heuristic",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=Path,
+        help="path to output csv file with the results",
+    )
+    args = parser.parse_args()
+
+    env_kwargs = {}
+    if args.opponent_path:
+        env_kwargs["opponent_path"] = args.opponent_path
+
+    bot_results = asyncio.run(
+        run_bots(
+            commands=args.bots,
+            env_id=args.env,
+            test_ids=args.test_ids,
+            n_workers=args.n_workers,
+            seed=args.seed,
+            persistent=not args.spawn_per_episode,
+            first_turn_timeout=args.first_turn_timeout,
+            turn_timeout=args.turn_timeout,
+            **env_kwargs,
+        )
+    )
+    print_results(commands=args.bots, results=bot_results)
+
+    if args.output_path:
+        write_results(path=args.output_path, results=bot_results)
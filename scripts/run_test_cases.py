@@ -1,15 +1,20 @@
 import argparse
-import csv
-from datetime import datetime
 from pathlib import Path
+from typing import Any
 
 import gymnasium as gym
 from stable_baselines3 import PPO
 
 from gymnasium_search_race.envs.search_race import get_test_ids
+from gymnasium_search_race.evaluation import TestCasesEvaluator
+from gymnasium_search_race.storage import ResultsStore, hash_file
 
 
-def get_test_case_length(env: gym.Env, model: PPO, test_id: int) -> int:
+def get_test_case_statistics(
+    env: gym.Env,
+    model: PPO,
+    test_id: int,
+) -> dict[str, Any]:
     observation, info = env.reset(options={"test_id": test_id})
     terminated = truncated = False
 
@@ -17,27 +22,38 @@ def get_test_case_length(env: gym.Env, model: PPO, test_id: int) -> int:
         action, _ = model.predict(observation=observation, deterministic=True)
         observation, _reward, terminated, truncated, info = env.step(action)
 
-    return info["episode"]["l"]
+    return info["episode"]
 
 
 def write_metrics(
     metrics_folder: str,
     env_id: str,
-    episode_lengths: dict[int, int],
+    model_path: str,
+    episode_statistics: dict[int, dict[str, Any]],
 ) -> None:
-    with open(Path(metrics_folder) / "metrics.csv", "a", encoding="utf-8") as csv_file:
-        writer = csv.DictWriter(
-            csv_file,
-            fieldnames=["env", "date", "total", *sorted(episode_lengths.keys())],
-        )
-        writer.writerow(
-            {
-                "env": env_id,
-                "date": datetime.now().isoformat(timespec="seconds"),
-                "total": sum(episode_lengths.values()),
-                **episode_lengths,
-            }
-        )
+    csv_path = Path(metrics_folder) / "metrics.csv"
+    store = ResultsStore(Path(metrics_folder) / "metrics.sqlite")
+
+    if csv_path.exists():
+        store.import_csv(csv_path, if_empty=True)
+
+    store.add_run(
+        env_id=env_id,
+        model_hash=hash_file(model_path),
+        episode_lengths={
+            test_id: statistics["l"]
+            for test_id, statistics in episode_statistics.items()
+        },
+        episode_returns={
+            test_id: statistics["r"]
+            for test_id, statistics in episode_statistics.items()
+        },
+        episode_durations={
+            test_id: statistics["t"]
+            for test_id, statistics in episode_statistics.items()
+        },
+    )
+    store.export_csv(csv_path)
 
 
 def run_test_cases(
@@ -45,35 +61,48 @@ def run_test_cases(
     env_id: str,
     record_video: bool = False,
     video_folder: str = "videos",
-) -> dict[int, int]:
-    env = gym.make(env_id, render_mode="rgb_array" if record_video else None)
-
-    env = gym.wrappers.RecordEpisodeStatistics(env)
+) -> dict[int, dict[str, Any]]:
+    test_ids = get_test_ids()
+    episode_statistics = {}
 
     if record_video:
+        env = gym.make(env_id, render_mode="rgb_array")
+        env = gym.wrappers.RecordEpisodeStatistics(env)
         env = gym.wrappers.RecordVideo(
             env,
             video_folder=video_folder,
             episode_trigger=lambda _: True,
             disable_logger=True,
         )
+        model = PPO.load(path=model_path, env=env)
+
+        for test_id in test_ids:
+            episode_statistics[test_id] = get_test_case_statistics(
+                env=env,
+                model=model,
+                test_id=test_id,
+            )
+
+        env.close()
+    else:
+        # all the test cases are played in lockstep with batched predictions
+        model = PPO.load(path=model_path)
+        evaluator = TestCasesEvaluator(env_id=env_id, test_ids=test_ids)
+
+        for statistics in evaluator.evaluate(model=model):
+            episode_statistics[statistics["test_id"]] = {
+                key: statistics[key] for key in ("r", "l", "t")
+            }
 
-    model = PPO.load(path=model_path, env=env)
-
-    test_ids = get_test_ids()
-    episode_lengths = {}
     total_length = 0
 
-    for test_id in test_ids:
-        episode_length = get_test_case_length(env=env, model=model, test_id=test_id)
-        print(f"Test {test_id:03}: {episode_length}")
-        episode_lengths[test_id] = episode_length
-        total_length += episode_length
+    for test_id, statistics in episode_statistics.items():
+        print(f"Test {test_id:03}: {statistics['l']}")
+        total_length += statistics["l"]
 
-    env.close()
     print("Total:", total_length)
 
-    return episode_lengths
+    return episode_statistics
 
 
 if __name__ == "__main__":
@@ -109,11 +138,11 @@ if __name__ == "__main__":
     parser.add_argument(
         "--metrics-folder",
         default="data",
-        help="path to metrics folder",
+        help="path to metrics folder (SQLite results store and CSV export)",
     )
     args = parser.parse_args()
 
-    lengths = run_test_cases(
+    statistics_per_test_id = run_test_cases(
         model_path=args.path,
         env_id=args.env,
         record_video=args.record_video,
@@ -124,5 +153,6 @@ if __name__ == "__main__":
         write_metrics(
             metrics_folder=args.metrics_folder,
             env_id=args.env,
-            episode_lengths=lengths,
+            model_path=args.path,
+            episode_statistics=statistics_per_test_id,
         )
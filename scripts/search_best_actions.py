@@ -1,31 +1,51 @@
 import argparse
-import gzip
-import json
 import os
+import time
 
 import gymnasium as gym
 from stable_baselines3 import PPO
 from stable_baselines3.common.vec_env import DummyVecEnv
 from tqdm import tqdm
 
+from gymnasium_search_race.callbacks import StopTrainingOnBestEpisodePlateau
+from gymnasium_search_race.envs.lower_bound import get_test_lower_bounds
 from gymnasium_search_race.envs.search_race import get_test_ids
+from gymnasium_search_race.storage import (
+    merge_best_actions,
+    read_best_actions,
+    write_best_actions,
+)
 from gymnasium_search_race.wrappers import RecordBestEpisodeStatistics
 
 
-def search_best_actions_on_test_id(
-    test_id: int,
-    model_path: str,
-    env_id: str,
-    total_timesteps: int = 200_000,
-) -> list[list[int]]:
+def load_test_id_model(test_id: int, model_path: str, env_id: str) -> PPO:
     env = RecordBestEpisodeStatistics(gym.make(env_id, test_id=test_id))
-    model = PPO.load(
+    return PPO.load(
         model_path,
         env=DummyVecEnv([lambda: env]),
         verbose=0,
         tensorboard_log=None,
     )
-    model.learn(total_timesteps=total_timesteps)
+
+
+def learn_on_test_id(
+    model: PPO,
+    total_timesteps: int,
+    patience: int | None = None,
+    reset_num_timesteps: bool = True,
+) -> bool:
+    # returns True if the training stopped because the best episode plateaued
+    callback = StopTrainingOnBestEpisodePlateau(patience=patience) if patience else None
+    model.learn(
+        total_timesteps=total_timesteps,
+        callback=callback,
+        reset_num_timesteps=reset_num_timesteps,
+    )
+    return callback is not None and callback.plateaued
+
+
+def get_best_actions(model: PPO, env_id: str) -> list[list[int]]:
+    env = model.get_env().envs[0]
 
     # Deterministic predictions
     observation, _info = env.reset()
@@ -53,66 +73,91 @@ def search_best_actions(
     model_path: str,
     env_id: str,
     total_timesteps: int = 200_000,
+    patience: int | None = None,
 ) -> dict[str, list[list[int]]]:
-    total_length = 0
+    # each map is trained for total_timesteps, or until its best episode
+    # plateaus for patience timesteps. The timesteps left by the maps that
+    # plateaued are then shared between the maps still improving, round after
+    # round, until they plateau or the budget is spent
+    test_ids = get_test_ids()
+    models = {}
+    timesteps = dict.fromkeys(test_ids, 0)
+    elapsed_times = dict.fromkeys(test_ids, 0.0)
+    plateaued = dict.fromkeys(test_ids, False)
     actions_per_test_id = {}
 
-    progress_bar = tqdm(get_test_ids(), desc="Search best actions")
+    progress_bar = tqdm(test_ids, desc="Search best actions")
     for test_id in progress_bar:
-        actions = search_best_actions_on_test_id(
+        start_time = time.perf_counter()
+        model = load_test_id_model(
             test_id=test_id,
             model_path=model_path,
             env_id=env_id,
+        )
+        plateaued[test_id] = learn_on_test_id(
+            model=model,
             total_timesteps=total_timesteps,
+            patience=patience,
         )
-        length = len(actions)
-        progress_bar.set_postfix({f"test_{test_id}": length})
-        total_length += length
-        actions_per_test_id[str(test_id)] = actions
-
-    print("Total:", total_length)
-
-    return actions_per_test_id
-
+        timesteps[test_id] = model.num_timesteps
 
-def read_best_actions(path: str) -> dict[str, list[list[int]]]:
-    with gzip.open(path, "rt", encoding="utf-8") as json_file:
-        actions = json.load(json_file)
-    return actions
-
-
-def merge_best_actions(
-    actions_1: dict[str, list[list[int]]],
-    actions_2: dict[str, list[list[int]]],
-) -> dict[str, list[list[int]]]:
-    merged_actions = {}
-    total_length = 0
+        if plateaued[test_id] or not patience:
+            actions_per_test_id[str(test_id)] = get_best_actions(model, env_id)
+        else:
+            models[test_id] = model
 
-    print("Merging best actions")
+        elapsed_times[test_id] += time.perf_counter() - start_time
+        progress_bar.set_postfix({f"test_{test_id}": model.num_timesteps})
 
-    for test_id in actions_1:
-        length_1 = len(actions_1[test_id])
-        length_2 = len(actions_2[test_id])
-        print(f"Test {test_id}: {length_1} - {length_2}")
+    remaining_timesteps = total_timesteps * len(test_ids) - sum(timesteps.values())
 
-        if length_1 < length_2:
-            merged_actions[test_id] = actions_1[test_id]
-        else:
-            merged_actions[test_id] = actions_2[test_id]
+    while models:
+        rollout_size = max(model.n_steps * model.n_envs for model in models.values())
+        share = remaining_timesteps // len(models)
 
-        total_length += len(merged_actions[test_id])
+        if share < rollout_size:
+            break
 
-    print("Total after merge:", total_length)
+        print(f"Sharing {remaining_timesteps} timesteps between {len(models)} maps")
 
-    return merged_actions
+        for test_id, model in list(models.items()):
+            start_time = time.perf_counter()
+            previous_timesteps = model.num_timesteps
+            plateaued[test_id] = learn_on_test_id(
+                model=model,
+                total_timesteps=share,
+                patience=patience,
+                reset_num_timesteps=False,
+            )
+            timesteps[test_id] += model.num_timesteps - previous_timesteps
+            remaining_timesteps -= model.num_timesteps - previous_timesteps
+
+            if plateaued[test_id]:
+                actions_per_test_id[str(test_id)] = get_best_actions(model, env_id)
+                del models[test_id]
+
+            elapsed_times[test_id] += time.perf_counter() - start_time
+
+    for test_id, model in models.items():
+        start_time = time.perf_counter()
+        actions_per_test_id[str(test_id)] = get_best_actions(model, env_id)
+        elapsed_times[test_id] += time.perf_counter() - start_time
+
+    for test_id in test_ids:
+        print(
+            f"Test {test_id:03}: {len(actions_per_test_id[str(test_id)])} turns,"
+            f" {timesteps[test_id]} timesteps,"
+            f" {elapsed_times[test_id]:.1f}s"
+            + (" (plateau)" if plateaued[test_id] else "")
+        )
 
+    print(
+        "Total:",
+        sum(len(actions) for actions in actions_per_test_id.values()),
+    )
+    print(f"Total time: {sum(elapsed_times.values()):.1f}s")
 
-def write_best_actions(
-    path: str,
-    actions: dict[str, list[list[int]]],
-) -> None:
-    with gzip.open(path, "wt", encoding="utf-8") as json_file:
-        json.dump(actions, json_file)
+    return actions_per_test_id
 
 
 if __name__ == "__main__":
@@ -134,17 +179,25 @@ if __name__ == "__main__":
         "--total-timesteps",
         default=200_000,
         type=int,
-        help="total timesteps to train",
+        help="total timesteps to train per map",
+    )
+    parser.add_argument(
+        "--patience",
+        type=int,
+        help="stop training a map when its best episode has not improved for this"
+        " number of timesteps, and share the timesteps left between the maps still"
+        " improving (default: no early stopping)",
     )
     parser.add_argument(
         "--output-path",
-        help="path to output GZIP compressed JSON file",
+        help="path to output GZIP compressed JSON file (.json.gz) or binary store",
     )
     args = parser.parse_args()
     best_actions = search_best_actions(
         model_path=args.model_path,
         env_id=args.env,
         total_timesteps=args.total_timesteps,
+        patience=args.patience,
     )
 
     if args.output_path:
@@ -153,6 +206,7 @@ if __name__ == "__main__":
             best_actions = merge_best_actions(
                 actions_1=current_actions,
                 actions_2=best_actions,
+                lower_bounds=get_test_lower_bounds(),
             )
 
         write_best_actions(
@@ -0,0 +1,219 @@
+import argparse
+import csv
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+import torch
+from tqdm import tqdm
+
+from gymnasium_search_race.envs.mad_pod_racing import MAPS
+from gymnasium_search_race.envs.opponents import HEURISTIC_OPPONENT
+from gymnasium_search_race.league import get_model_name, get_ratings, play_matches
+from gymnasium_search_race.storage import hash_file
+
+MATCHES_FILENAME = "matches.json"
+
+
+def get_model_hash(path: str) -> str:
+    return HEURISTIC_OPPONENT if path == HEURISTIC_OPPONENT else hash_file(path)
+
+
+def get_pair_key(
+    runner_hash: str,
+    blocker_hash: str,
+    n_seeds: int,
+    max_episode_steps: int,
+) -> str:
+    return f"{runner_hash}:{blocker_hash}:{n_seeds}:{max_episode_steps}"
+
+
+def read_matches(path: Path) -> dict:
+    if not path.exists():
+        return {}
+
+    return json.loads(path.read_text(encoding="UTF-8"))
+
+
+def write_matches(path: Path, matches: dict) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(matches), encoding="UTF-8")
+    os.replace(tmp_path, path)
+
+
+def write_win_rates(
+    path: Path,
+    runner_names: list[str],
+    blocker_names: list[str],
+    win_rates: np.ndarray,
+) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as csv_file:
+        writer = csv.writer(csv_file, lineterminator="\n")
+        writer.writerow(["runner", *blocker_names])
+
+        for runner_name, runner_win_rates in zip(runner_names, win_rates):
+            writer.writerow([runner_name, *np.round(runner_win_rates, 3)])
+
+
+def write_ratings(path: Path, players: list[tuple[str, str]], ratings: np.ndarray):
+    with open(path, "w", encoding="utf-8", newline="") as csv_file:
+        writer = csv.writer(csv_file, lineterminator="\n")
+        writer.writerow(["role", "model", "rating"])
+
+        for i in np.argsort(-ratings):
+            writer.writerow([*players[i], round(float(ratings[i]), 1)])
+
+
+def tournament(
+    runner_paths: list[str],
+    blocker_paths: list[str],
+    output_path: Path,
+    n_seeds: int = 5,
+    max_episode_steps: int = 600,
+    n_jobs: int | None = None,
+) -> None:
+    output_path.mkdir(parents=True, exist_ok=True)
+    matches_path = output_path / MATCHES_FILENAME
+    matches = read_matches(matches_path)
+
+    test_ids = list(range(len(MAPS)))
+    seeds = list(range(n_seeds))
+    runner_hashes = [get_model_hash(path) for path in runner_paths]
+    blocker_hashes = [get_model_hash(path) for path in blocker_paths]
+    pairs = {
+        get_pair_key(runner_hash, blocker_hash, n_seeds, max_episode_steps): (
+            runner_path,
+            blocker_path,
+        )
+        for runner_path, runner_hash in zip(runner_paths, runner_hashes)
+        for blocker_path, blocker_hash in zip(blocker_paths, blocker_hashes)
+    }
+
+    # the pairs already played with the same models are read from the cache
+    new_pairs = {key: pair for key, pair in pairs.items() if key not in matches}
+
+    with ProcessPoolExecutor(
+        max_workers=n_jobs,
+        initializer=torch.set_num_threads,
+        initargs=(1,),
+    ) as executor:
+        futures = {
+            executor.submit(
+                play_matches,
+                runner_path=runner_path,
+                blocker_path=blocker_path,
+                test_ids=test_ids,
+                seeds=seeds,
+                max_episode_steps=max_episode_steps,
+            ): key
+            for key, (runner_path, blocker_path) in new_pairs.items()
+        }
+
+        for future in tqdm(
+            as_completed(futures),
+            total=len(futures),
+            desc="Play matches",
+        ):
+            matches[futures[future]] = future.result()
+            write_matches(matches_path, matches)
+
+    runner_names = [get_model_name(path) for path in runner_paths]
+    blocker_names = [get_model_name(path) for path in blocker_paths]
+    win_rates = np.array(
+        [
+            [
+                np.mean(
+                    [
+                        match["win"]
+                        for match in matches[
+                            get_pair_key(
+                                runner_hash,
+                                blocker_hash,
+                                n_seeds,
+                                max_episode_steps,
+                            )
+                        ]
+                    ]
+                )
+                for blocker_hash in blocker_hashes
+            ]
+            for runner_hash in runner_hashes
+        ]
+    )
+    write_win_rates(
+        output_path / "win_rates.csv",
+        runner_names=runner_names,
+        blocker_names=blocker_names,
+        win_rates=win_rates,
+    )
+
+    # runners only play against blockers
+    n_runners = len(runner_paths)
+    n_games = len(test_ids) * n_seeds
+    wins = np.zeros((n_runners + len(blocker_paths),) * 2)
+    wins[:n_runners, n_runners:] = win_rates * n_games
+    wins[n_runners:, :n_runners] = (1 - win_rates.T) * n_games
+
+    players = [("runner", name) for name in runner_names] + [
+        ("blocker", name) for name in blocker_names
+    ]
+    ratings = get_ratings(wins)
+    write_ratings(output_path / "ratings.csv", players=players, ratings=ratings)
+
+    for (role, name), rating in sorted(
+        zip(players, ratings), key=lambda player: -player[1]
+    ):
+        print(f"{rating:7.1f} {role:8} {name}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Play a round-robin tournament between runners and blockers",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--runners",
+        nargs="+",
+        required=True,
+        help=f"paths to runner models or {HEURISTIC_OPPONENT}",
+    )
+    parser.add_argument(
+        "--blockers",
+        nargs="+",
+        required=True,
+        help=f"paths to blocker models or {HEURISTIC_OPPONENT}",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=Path,
+        default=Path("tournament"),
+        help="path to output folder with the matches cache, win rates and ratings",
+    )
+    parser.add_argument(
+        "--n-seeds",
+        type=int,
+        default=5,
+        help="number of seeds per map",
+    )
+    parser.add_argument(
+        "--max-episode-steps",
+        type=int,
+        default=600,
+        help="maximum number of steps per match",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    args = parser.parse_args()
+    tournament(
+        runner_paths=args.runners,
+        blocker_paths=args.blockers,
+        output_path=args.output_path,
+        n_seeds=args.n_seeds,
+        max_episode_steps=args.max_episode_steps,
+        n_jobs=args.n_jobs,
+    )
@@ -0,0 +1,219 @@
+import argparse
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import gymnasium as gym
+import numpy as np
+from stable_baselines3 import PPO
+
+from gymnasium_search_race.envs.physics import PHYSICS_BACKENDS
+from gymnasium_search_race.evolution import (
+    CrossEntropyMethod,
+    EvolutionStrategy,
+    evaluate_population,
+)
+from gymnasium_search_race.policies import MLPPolicy
+
+
+def load_policy(
+    env: gym.Env,
+    init_path: Path | None,
+    net_arch: tuple[int, ...],
+    seed: int | None,
+) -> MLPPolicy:
+    if init_path is None:
+        return MLPPolicy.from_env(env, net_arch=net_arch, seed=seed)
+
+    if init_path.suffix == ".npz":
+        return MLPPolicy.load(init_path)
+
+    # warm start from the policy network of a PPO model
+    return MLPPolicy.from_ppo(PPO.load(init_path, device="cpu"), env=env)
+
+
+def train_es(
+    env_id: str,
+    output_path: Path,
+    init_path: Path | None = None,
+    net_arch: tuple[int, ...] = (64, 64),
+    method: str = "es",
+    population_size: int = 64,
+    sigma: float = 0.02,
+    learning_rate: float = 0.01,
+    elite_fraction: float = 0.2,
+    n_generations: int = 100,
+    test_ids: list[int] | None = None,
+    physics_backend: str = "numba",
+    n_jobs: int | None = None,
+    seed: int | None = None,
+) -> None:
+    env = gym.make(env_id)
+    unwrapped = env.unwrapped
+    test_ids = test_ids or unwrapped.test_ids
+    checkpoints = [
+        unwrapped.test_checkpoints[unwrapped.test_ids.index(test_id)]
+        for test_id in test_ids
+    ]
+    policy = load_policy(env=env, init_path=init_path, net_arch=net_arch, seed=seed)
+
+    if method == "cem":
+        optimizer = CrossEntropyMethod(
+            mean=policy.get_parameters(),
+            sigma=sigma,
+            population_size=population_size,
+            elite_fraction=elite_fraction,
+            seed=seed,
+        )
+    else:
+        optimizer = EvolutionStrategy(
+            mean=policy.get_parameters(),
+            sigma=sigma,
+            learning_rate=learning_rate,
+            population_size=population_size,
+            seed=seed,
+        )
+
+    evaluate = functools.partial(
+        evaluate_population,
+        policy,
+        checkpoints=checkpoints,
+        laps=unwrapped.laps,
+        max_episode_steps=env.spec.max_episode_steps,
+        physics_backend=physics_backend,
+    )
+    best_fitness = evaluate(policy.get_parameters()[np.newaxis])[0]
+    print("Initial total:", best_fitness)
+
+    n_workers = min(n_jobs or os.cpu_count(), population_size + 1)
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        for generation in range(n_generations):
+            # the mean is evaluated with the population to keep the best policy
+            parameters = np.vstack([optimizer.mean, optimizer.ask()])
+            fitness = np.concatenate(
+                list(executor.map(evaluate, np.array_split(parameters, n_workers)))
+            )
+            optimizer.tell(fitness[1:])
+
+            best_index = np.argmin(fitness)
+            print(
+                f"Generation {generation:03}:"
+                f" mean {fitness[0]}"
+                f" best {fitness[best_index]}"
+                f" population {np.mean(fitness[1:]):.1f}"
+            )
+
+            if fitness[best_index] < best_fitness:
+                best_fitness = fitness[best_index]
+                policy.set_parameters(parameters[best_index])
+                output_path.parent.mkdir(parents=True, exist_ok=True)
+                policy.save(output_path)
+
+    print("Best total:", best_fitness)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Train a NumPy MLP policy with evolution strategies",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "--env",
+        default="gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+        help="Search Race environment id",
+    )
+    parser.add_argument(
+        "--init-path",
+        type=Path,
+        help="path to a PPO model or a .npz policy to start from",
+    )
+    parser.add_argument(
+        "--net-arch",
+        type=int,
+        nargs="+",
+        default=[64, 64],
+        help="hidden layer sizes of a new policy",
+    )
+    parser.add_argument(
+        "--method",
+        choices=("es", "cem"),
+        default="es",
+        help="evolution strategies or cross-entropy method",
+    )
+    parser.add_argument(
+        "--population-size",
+        type=int,
+        default=64,
+        help="number of policies per generation (even)",
+    )
+    parser.add_argument(
+        "--sigma",
+        type=float,
+        default=0.02,
+        help="standard deviation of the perturbations",
+    )
+    parser.add_argument(
+        "--learning-rate",
+        type=float,
+        default=0.01,
+        help="learning rate of evolution strategies",
+    )
+    parser.add_argument(
+        "--elite-fraction",
+        type=float,
+        default=0.2,
+        help="fraction of the population kept by the cross-entropy method",
+    )
+    parser.add_argument(
+        "--n-generations",
+        type=int,
+        default=100,
+        help="number of generations",
+    )
+    parser.add_argument(
+        "--test-ids",
+        type=int,
+        nargs="+",
+        help="test ids to evaluate the policies on (default: all)",
+    )
+    parser.add_argument(
+        "--physics-backend",
+        choices=PHYSICS_BACKENDS,
+        default="numba",
+        help="backend of the physics kernels",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        help="random generator seed",
+    )
+    parser.add_argument(
+        "--output-path",
+        type=Path,
+        default=Path("es/policy.npz"),
+        help="path to output .npz file with the best policy",
+    )
+    args = parser.parse_args()
+    train_es(
+        env_id=args.env,
+        output_path=args.output_path,
+        init_path=args.init_path,
+        net_arch=tuple(args.net_arch),
+        method=args.method,
+        population_size=args.population_size,
+        sigma=args.sigma,
+        learning_rate=args.learning_rate,
+        elite_fraction=args.elite_fraction,
+        n_generations=args.n_generations,
+        test_ids=args.test_ids,
+        physics_backend=args.physics_backend,
+        n_jobs=args.n_jobs,
+        seed=args.seed,
+    )
@@ -0,0 +1,130 @@
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from tqdm import tqdm
+
+from gymnasium_search_race.envs.physics import PHYSICS_BACKENDS
+from gymnasium_search_race.parity import find_divergences, load_game_log
+
+
+def validate_log_files(paths: list[Path], physics_backend: str) -> list[dict]:
+    games = []
+    results = []
+
+    for path in paths:
+        try:
+            games.append(load_game_log(path))
+        except (KeyError, IndexError, ValueError) as error:
+            results.append({"name": path.name, "error": repr(error)})
+
+    if games:
+        divergences = find_divergences(games, physics_backend=physics_backend)
+        results.extend(
+            {"name": game.name, "turns": len(game.actions), "divergence": divergence}
+            for game, divergence in zip(games, divergences)
+        )
+
+    return results
+
+
+def validate_logs(
+    input_path: Path,
+    pattern: str = "*.json",
+    physics_backend: str = "numba",
+    chunk_size: int = 256,
+    n_jobs: int | None = None,
+) -> list[dict]:
+    paths = sorted(input_path.glob(pattern))
+    chunks = [paths[i : i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    results = []
+
+    with ProcessPoolExecutor(max_workers=n_jobs or os.cpu_count()) as executor:
+        for chunk_results in tqdm(
+            executor.map(
+                validate_log_files,
+                chunks,
+                [physics_backend] * len(chunks),
+            ),
+            total=len(chunks),
+            desc="Validate logs",
+        ):
+            results.extend(chunk_results)
+
+    return results
+
+
+def print_results(results: list[dict]) -> None:
+    n_valid = 0
+
+    for result in results:
+        if "error" in result:
+            print(f"{result['name']}: {result['error']}")
+        elif result["divergence"] is not None:
+            divergence = result["divergence"]
+            print(
+                f"{result['name']}: turn {divergence['turn']}"
+                f" {', '.join(divergence['fields'])}"
+                f" actual {divergence['actual']} expected {divergence['expected']}"
+            )
+        else:
+            n_valid += 1
+
+    print("Valid:", n_valid, "/", len(results))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Replay parsed CGSearchRace referee logs and report divergences",
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    )
+    parser.add_argument(
+        "-i",
+        "--input-path",
+        type=Path,
+        required=True,
+        help="path to folder with json files from scripts.parse_logs",
+    )
+    parser.add_argument(
+        "--pattern",
+        default="*.json",
+        help="glob pattern of the json files",
+    )
+    parser.add_argument(
+        "--physics-backend",
+        choices=PHYSICS_BACKENDS,
+        default="numba",
+        help="backend of the physics kernels",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=256,
+        help="number of logs replayed in lockstep by a worker",
+    )
+    parser.add_argument(
+        "--n-jobs",
+        type=int,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-o",
+        "--output-path",
+        type=Path,
+        help="path to output json file with the first divergence of each log",
+    )
+    args = parser.parse_args()
+    log_results = validate_logs(
+        input_path=args.input_path,
+        pattern=args.pattern,
+        physics_backend=args.physics_backend,
+        chunk_size=args.chunk_size,
+        n_jobs=args.n_jobs,
+    )
+    print_results(log_results)
+
+    if args.output_path:
+        with open(args.output_path, "w", encoding="utf-8") as file:
+            json.dump(log_results, file)
@@ -0,0 +1,255 @@
+import time
+
+import numpy as np
+
+from gymnasium_search_race.envs.lower_bound import TurnsLowerBound
+from gymnasium_search_race.envs.physics import CHECKPOINT, X, Y
+from gymnasium_search_race.envs.simulator import SearchRaceSimulator
+from gymnasium_search_race.policies import HeuristicPolicy
+
+ACCEPTANCES = ("annealing", "late_acceptance")
+
+
+def get_heuristic_actions(
+    checkpoints: np.ndarray,
+    laps: int = 3,
+    max_episode_steps: int = 600,
+    physics_backend: str = "numba",
+) -> np.ndarray:
+    # integer angles and thrusts of the heuristic policy for each turn
+    simulator = SearchRaceSimulator(
+        checkpoints=[checkpoints],
+        laps=laps,
+        max_episode_steps=max_episode_steps,
+        physics_backend=physics_backend,
+    )
+    policy = HeuristicPolicy(
+        max_rotation_per_turn=simulator.max_rotation_per_turn,
+        car_max_thrust=simulator.car_max_thrust,
+    )
+    actions = np.zeros((max_episode_steps, 2), dtype=np.int64)
+    actions[:, 1] = simulator.car_max_thrust
+    observations = simulator.reset()
+
+    for t in range(max_episode_steps):
+        if simulator.done[0]:
+            break
+
+        actions[t] = policy.predict_angle_thrust(observations)[0]
+        observations = simulator.step(actions[t : t + 1, 0], actions[t : t + 1, 1])
+
+    return actions
+
+
+class SearchRaceAnnealer:
+    # simulated annealing or late acceptance over the integer angles and
+    # thrusts of one map: a move changes the actions from one turn and only
+    # the turns from this one are simulated again, from the stored states. The
+    # acceptance threshold is drawn before the simulation, which stops as soon
+    # as the lower bound on the remaining turns shows that it cannot be met
+    def __init__(
+        self,
+        checkpoints: np.ndarray,
+        laps: int = 3,
+        max_episode_steps: int = 600,
+        physics_backend: str = "numba",
+        acceptance: str = "annealing",
+        initial_temperature: float = 2.0,
+        final_temperature: float = 0.05,
+        history_length: int = 1000,
+        seed: int | None = None,
+    ) -> None:
+        if acceptance not in ACCEPTANCES:
+            raise ValueError(f"acceptance must be one of {ACCEPTANCES}")
+
+        simulator = SearchRaceSimulator(
+            checkpoints=[checkpoints],
+            laps=laps,
+            max_episode_steps=max_episode_steps,
+            physics_backend=physics_backend,
+        )
+        simulator.reset()
+
+        self.checkpoints = np.asarray(checkpoints, dtype=np.float64)
+        self.total_checkpoints = len(checkpoints) * laps
+        self.max_episode_steps = max_episode_steps
+        self.max_rotation_per_turn = simulator.max_rotation_per_turn
+        self.car_max_thrust = simulator.car_max_thrust
+        self.checkpoint_radius = simulator.checkpoint_radius
+        self.car_friction = simulator.car_friction
+        self.distance_upper_bound = simulator.distance_upper_bound
+        self.kernels = simulator.kernels
+        self.lower_bound = TurnsLowerBound(
+            checkpoints=checkpoints,
+            laps=laps,
+            car_max_thrust=self.car_max_thrust,
+            friction=self.car_friction,
+            checkpoint_radius=self.checkpoint_radius,
+            max_turns=max_episode_steps,
+        )
+        self.initial_state = simulator.cars[0].copy()
+        self.acceptance = acceptance
+        self.initial_temperature = initial_temperature
+        self.final_temperature = final_temperature
+        self.history_length = history_length
+        self.rng = np.random.default_rng(seed)
+        self.n_iterations = 0
+        self.n_pruned = 0
+        self.finished = False
+
+    def rollout(
+        self,
+        states: np.ndarray,
+        angles: np.ndarray,
+        thrusts: np.ndarray,
+        start: int = 0,
+        max_length: float = np.inf,
+    ) -> int:
+        # -1 when the race cannot be finished in max_length turns
+        return self.kernels.search_race_rollout(
+            states,
+            self.checkpoints,
+            angles,
+            thrusts,
+            start,
+            self.total_checkpoints,
+            self.checkpoint_radius,
+            self.car_friction,
+            False,
+            max_length,
+            self.lower_bound.min_remaining_distances,
+            self.lower_bound.max_distances_base,
+            self.lower_bound.max_distances_speed,
+        )
+
+    def get_cost(self, states: np.ndarray, length: int) -> float:
+        # the episode length, and for an unfinished race the remaining
+        # checkpoints and the distance to the next one
+        state = states[length]
+        current_checkpoint = int(state[CHECKPOINT])
+
+        if current_checkpoint >= self.total_checkpoints:
+            return float(length)
+
+        x, y = self.checkpoints[(current_checkpoint + 1) % len(self.checkpoints)]
+        distance = np.hypot(x - state[X], y - state[Y])
+        return float(
+            length
+            + self.total_checkpoints
+            - current_checkpoint
+            + distance / self.distance_upper_bound
+        )
+
+    def _mutate(
+        self,
+        angles: np.ndarray,
+        thrusts: np.ndarray,
+        length: int,
+    ) -> int:
+        # changes the actions in place and returns the first changed turn
+        start = int(self.rng.integers(min(length, self.max_episode_steps)))
+        move = self.rng.random()
+
+        if move < 0.4:
+            angles[start] = self.rng.integers(
+                -self.max_rotation_per_turn,
+                self.max_rotation_per_turn + 1,
+            )
+        elif move < 0.7:
+            angles[start] += self.rng.integers(-3, 4)
+        elif move < 0.85:
+            thrusts[start] = self.rng.integers(self.car_max_thrust + 1)
+        else:
+            end = start + int(self.rng.integers(2, 12))
+            angles[start:end] += self.rng.integers(-3, 4)
+
+        np.clip(
+            angles,
+            -self.max_rotation_per_turn,
+            self.max_rotation_per_turn,
+            out=angles,
+        )
+        return start
+
+    def optimize(
+        self,
+        actions: np.ndarray,
+        time_budget: float = 10.0,
+        max_iterations: int | None = None,
+    ) -> tuple[np.ndarray, int]:
+        # returns the best integer actions found, truncated to the episode
+        # length, and the episode length
+        angles = np.zeros(self.max_episode_steps)
+        thrusts = np.full(self.max_episode_steps, float(self.car_max_thrust))
+        actions = np.asarray(actions)[: self.max_episode_steps]
+        angles[: len(actions)] = actions[:, 0]
+        thrusts[: len(actions)] = actions[:, 1]
+
+        states = np.zeros((self.max_episode_steps + 1, 6))
+        states[0] = self.initial_state
+        length = self.rollout(states, angles, thrusts)
+        cost = self.get_cost(states, length)
+
+        best_angles, best_thrusts = angles.copy(), thrusts.copy()
+        best_cost, best_length = cost, length
+        history = np.full(self.history_length, cost)
+        temperature = self.initial_temperature
+        start_time = time.perf_counter()
+        iteration = 0
+
+        while max_iterations is None or iteration < max_iterations:
+            if iteration % 256 == 0:
+                fraction = (time.perf_counter() - start_time) / time_budget
+
+                if fraction >= 1.0:
+                    break
+
+                temperature = (
+                    self.initial_temperature
+                    * (self.final_temperature / self.initial_temperature) ** fraction
+                )
+
+            if self.acceptance == "annealing":
+                threshold = cost - temperature * np.log(self.rng.random())
+            else:
+                threshold = max(cost, history[iteration % self.history_length])
+
+            new_angles, new_thrusts = angles.copy(), thrusts.copy()
+            start = self._mutate(new_angles, new_thrusts, length)
+            new_states = states.copy()
+            # an unfinished race costs more than max_episode_steps
+            new_length = self.rollout(
+                new_states,
+                new_angles,
+                new_thrusts,
+                start,
+                max_length=(
+                    threshold if threshold < self.max_episode_steps else np.inf
+                ),
+            )
+
+            if new_length == -1:
+                self.n_pruned += 1
+            else:
+                new_cost = self.get_cost(new_states, new_length)
+
+                if new_cost <= threshold:
+                    angles, thrusts, states = new_angles, new_thrusts, new_states
+                    cost, length = new_cost, new_length
+
+                    if cost < best_cost:
+                        best_angles, best_thrusts = angles.copy(), thrusts.copy()
+                        best_cost, best_length = cost, length
+
+            if self.acceptance == "late_acceptance":
+                history[iteration % self.history_length] = cost
+
+            iteration += 1
+
+        self.n_iterations = iteration
+        self.finished = best_cost == best_length
+
+        return (
+            np.column_stack([best_angles, best_thrusts])[:best_length].astype(np.int64),
+            best_length,
+        )
@@ -0,0 +1,90 @@
+import math
+
+from stable_baselines3.common.callbacks import BaseCallback
+
+from gymnasium_search_race.evaluation import TestCasesEvaluator
+
+
+class StopTrainingOnBestEpisodePlateau(BaseCallback):
+    # stops the training when the best episodes recorded by the
+    # RecordBestEpisodeStatistics wrappers of the training env have not
+    # improved for patience timesteps
+    def __init__(self, patience: int, verbose: int = 0) -> None:
+        super().__init__(verbose=verbose)
+        self.patience = patience
+        self.best_episodes = None
+        self.last_improvement_timestep = 0
+        self.plateaued = False
+
+    def _on_training_start(self) -> None:
+        self.last_improvement_timestep = self.num_timesteps
+        self.plateaued = False
+
+    def _on_step(self) -> bool:
+        best_episodes = list(
+            zip(
+                self.training_env.get_attr("best_episode_returns"),
+                self.training_env.get_attr("best_episode_lengths"),
+            )
+        )
+
+        if best_episodes != self.best_episodes:
+            self.best_episodes = best_episodes
+            self.last_improvement_timestep = self.num_timesteps
+
+        self.plateaued = (
+            self.num_timesteps - self.last_improvement_timestep >= self.patience
+        )
+
+        if self.plateaued and self.verbose >= 1:
+            print(
+                f"Stopping training: no improvement of the best episodes"
+                f" for {self.patience} timesteps"
+            )
+
+        return not self.plateaued
+
+
+class EvalTestCasesCallback(BaseCallback):
+    # evaluates the model on all the test cases in lockstep every eval_freq
+    # calls and records the total episode length
+    def __init__(
+        self,
+        evaluator: TestCasesEvaluator,
+        eval_freq: int = 10_000,
+        deterministic: bool = True,
+        verbose: int = 0,
+    ) -> None:
+        super().__init__(verbose=verbose)
+        self.evaluator = evaluator
+        self.eval_freq = eval_freq
+        self.deterministic = deterministic
+        self.last_total_length = None
+        self.last_total_return = None
+        self.best_total_length = math.inf
+
+    def evaluate(self) -> int:
+        statistics = self.evaluator.evaluate(
+            model=self.model,
+            deterministic=self.deterministic,
+        )
+        self.last_total_length = sum(episode["l"] for episode in statistics)
+        self.last_total_return = sum(episode["r"] for episode in statistics)
+        self.best_total_length = min(self.best_total_length, self.last_total_length)
+
+        self.logger.record("eval/total_length", self.last_total_length)
+        self.logger.record("eval/mean_reward", self.last_total_return / len(statistics))
+
+        if self.verbose >= 1:
+            print(
+                f"Eval num_timesteps={self.num_timesteps},"
+                f" total_length={self.last_total_length}"
+            )
+
+        return self.last_total_length
+
+    def _on_step(self) -> bool:
+        if self.eval_freq > 0 and self.n_calls % self.eval_freq == 0:
+            self.evaluate()
+
+        return True
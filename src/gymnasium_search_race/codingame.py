@@ -0,0 +1,278 @@
+import asyncio
+import shlex
+from collections.abc import Sequence
+from typing import Any
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+from gymnasium_search_race.envs.mad_pod_racing import MadPodRacingEnv
+from gymnasium_search_race.envs.models import Car
+from gymnasium_search_race.envs.search_race import SearchRaceEnv
+
+FIRST_TURN_TIMEOUT = 1.0
+TURN_TIMEOUT = 0.05
+CLOSE_TIMEOUT = 1.0
+
+
+def get_game_input(env: SearchRaceEnv) -> list[str]:
+    # Search Race lists the checkpoints to visit with the laps unrolled (the
+    # start checkpoint is the last one), Mad Pod Racing gives the laps and the
+    # checkpoints once
+    checkpoints = env.checkpoints.astype(np.int64)
+
+    if isinstance(env, MadPodRacingEnv):
+        return [
+            str(env.laps),
+            str(len(checkpoints)),
+            *(f"{x} {y}" for x, y in checkpoints.tolist()),
+        ]
+
+    unrolled_checkpoints = np.roll(checkpoints, -1, axis=0)[
+        np.arange(env.total_checkpoints) % len(checkpoints)
+    ]
+    return [
+        str(env.total_checkpoints),
+        *(f"{x} {y}" for x, y in unrolled_checkpoints.tolist()),
+    ]
+
+
+def _get_car_input(car: Car, n_checkpoints: int, mad_pod_racing: bool) -> str:
+    x, y, vx, vy = (int(value) for value in (car.x, car.y, car.vx, car.vy))
+    angle = round(car.angle) % 360
+
+    if mad_pod_racing:
+        next_checkpoint_id = (car.current_checkpoint + 1) % n_checkpoints
+        return f"{x} {y} {vx} {vy} {angle} {next_checkpoint_id}"
+
+    return f"{car.current_checkpoint} {x} {y} {vx} {vy} {angle}"
+
+
+def get_turn_input(env: SearchRaceEnv) -> list[str]:
+    # the Mad Pod Racing envs have one pod per player: one line for the runner
+    # then one line for the opponent if there is one
+    if isinstance(env, MadPodRacingEnv):
+        return [
+            _get_car_input(car, len(env.checkpoints), mad_pod_racing=True)
+            for car in env.cars
+        ]
+
+    return [_get_car_input(env.car, len(env.checkpoints), mad_pod_racing=False)]
+
+
+def parse_bot_output(
+    output: str,
+    car: Car,
+    max_rotation_per_turn: int = 18,
+    car_max_thrust: int = 200,
+) -> tuple[float, float]:
+    # "X Y THRUST [message]" or "EXPERT ANGLE THRUST [message]": the rotation
+    # towards the target is clamped and rounded to the integer rotations of
+    # the envs, BOOST is a full thrust as the envs only boost on the first move
+    tokens = output.split()
+
+    try:
+        if tokens[0] == "EXPERT":
+            angle = float(tokens[1])
+        else:
+            x, y = float(tokens[0]), float(tokens[1])
+            angle = (
+                0.0
+                if (x, y) == (car.x, car.y)
+                else (car.get_angle(x, y) - car.angle + 180) % 360 - 180
+            )
+
+        thrust = car_max_thrust if tokens[2] == "BOOST" else float(tokens[2])
+    except (IndexError, ValueError) as error:
+        raise RuntimeError(f"invalid bot output: {output!r}") from error
+
+    angle = np.clip(np.rint(angle), -max_rotation_per_turn, max_rotation_per_turn)
+    thrust = np.clip(np.rint(thrust), 0, car_max_thrust)
+    return float(angle), float(thrust)
+
+
+class BotProcess:
+    # bot subprocess kept alive across episodes: a persistent bot reads the
+    # game input again when it receives a line with a single number instead of
+    # a turn line
+    def __init__(self, command: str | Sequence[str]) -> None:
+        self.command = shlex.split(command) if isinstance(command, str) else command
+        self.process: asyncio.subprocess.Process | None = None
+
+    @property
+    def pid(self) -> int | None:
+        return None if self.process is None else self.process.pid
+
+    async def start(self) -> None:
+        self.process = await asyncio.create_subprocess_exec(
+            *self.command,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+
+    async def send(self, lines: list[str]) -> None:
+        self.process.stdin.write("".join(f"{line}\n" for line in lines).encode())
+        await self.process.stdin.drain()
+
+    async def receive(self, timeout: float) -> str:
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+
+        if not line:
+            raise RuntimeError(f"bot exited with code {await self.process.wait()}")
+
+        return line.decode().strip()
+
+    async def close(self) -> None:
+        if self.process is None:
+            return
+
+        if self.process.returncode is None:
+            try:
+                self.process.stdin.close()
+                await asyncio.wait_for(self.process.wait(), CLOSE_TIMEOUT)
+            except (asyncio.TimeoutError, ConnectionError):
+                self.process.kill()
+                await self.process.wait()
+
+        self.process = None
+
+
+async def play_episode(
+    bot: BotProcess,
+    env: gym.Env,
+    seed: int | None = None,
+    options: dict[str, Any] | None = None,
+    first_turn_timeout: float = FIRST_TURN_TIMEOUT,
+    turn_timeout: float = TURN_TIMEOUT,
+) -> dict[str, Any]:
+    if not isinstance(env.action_space, spaces.Box):
+        raise ValueError("the bots play the envs with continuous actions")
+
+    _observation, info = env.reset(seed=seed, options=options)
+    unwrapped = env.unwrapped
+    episode_return = 0.0
+    terminated = truncated = False
+
+    await bot.send(get_game_input(unwrapped))
+
+    while not (terminated or truncated):
+        await bot.send(get_turn_input(unwrapped))
+        output = await bot.receive(
+            first_turn_timeout if info["episode_length"] == 0 else turn_timeout
+        )
+        angle, thrust = parse_bot_output(
+            output,
+            car=unwrapped.car,
+            max_rotation_per_turn=unwrapped.max_rotation_per_turn,
+            car_max_thrust=unwrapped.car_max_thrust,
+        )
+        action = np.array(
+            [
+                angle / unwrapped.max_rotation_per_turn,
+                thrust / unwrapped.car_max_thrust,
+            ]
+        )
+        _observation, reward, terminated, truncated, info = env.step(action)
+        episode_return += float(reward)
+
+    return {
+        "test_id": options.get("test_id") if options else None,
+        "length": info["episode_length"],
+        "return": episode_return,
+        "finished": info["current_checkpoint"] >= info["total_checkpoints"],
+    }
+
+
+async def _run_worker(
+    command: str | Sequence[str],
+    jobs: asyncio.Queue,
+    results: list[dict[str, Any]],
+    env_id: str,
+    persistent: bool,
+    first_turn_timeout: float,
+    turn_timeout: float,
+    env_kwargs: dict[str, Any],
+) -> None:
+    env = gym.make(env_id, **env_kwargs)
+    bot = BotProcess(command)
+
+    while not jobs.empty():
+        index, test_id, seed = jobs.get_nowait()
+
+        if bot.process is None:
+            await bot.start()
+
+        result = {"command": command, "pid": bot.pid, "error": None}
+
+        try:
+            result.update(
+                await play_episode(
+                    bot=bot,
+                    env=env,
+                    seed=seed,
+                    options={"test_id": test_id},
+                    first_turn_timeout=first_turn_timeout,
+                    turn_timeout=turn_timeout,
+                )
+            )
+        except (asyncio.TimeoutError, ConnectionError, RuntimeError) as error:
+            # the bot is restarted for the next episode
+            result.update(test_id=test_id, error=repr(error))
+            await bot.close()
+
+        results[index] = result
+
+        if not persistent:
+            await bot.close()
+
+    await bot.close()
+    env.close()
+
+
+async def run_bots(
+    commands: Sequence[str | Sequence[str]],
+    env_id: str,
+    test_ids: Sequence[int] | None = None,
+    n_workers: int = 4,
+    seed: int | None = None,
+    persistent: bool = True,
+    first_turn_timeout: float = FIRST_TURN_TIMEOUT,
+    turn_timeout: float = TURN_TIMEOUT,
+    **env_kwargs,
+) -> list[dict[str, Any]]:
+    # each bot command plays all the test cases with n_workers processes
+    # running concurrently, the results are in the order of the commands then
+    # of the test ids
+    if test_ids is None:
+        test_ids = gym.make(env_id, **env_kwargs).unwrapped.test_ids
+
+    n_jobs = len(test_ids)
+    results = [None] * (len(commands) * n_jobs)
+    workers = []
+
+    for i, command in enumerate(commands):
+        jobs = asyncio.Queue()
+
+        for j, test_id in enumerate(test_ids):
+            jobs.put_nowait(
+                (i * n_jobs + j, test_id, None if seed is None else seed + j)
+            )
+
+        workers.extend(
+            _run_worker(
+                command=command,
+                jobs=jobs,
+                results=results,
+                env_id=env_id,
+                persistent=persistent,
+                first_turn_timeout=first_turn_timeout,
+                turn_timeout=turn_timeout,
+                env_kwargs=env_kwargs,
+            )
+            for _ in range(min(n_workers, n_jobs))
+        )
+
+    await asyncio.gather(*workers)
+    return results
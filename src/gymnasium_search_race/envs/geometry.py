@@ -0,0 +1,45 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class MapGeometry:
+    # segments[i] goes from checkpoint i to checkpoint i + 1 (the last one goes
+    # back to checkpoint 0) and turn_angles[i] is the signed angle in radians
+    # between the segment arriving at checkpoint i and the one leaving it
+    segments: np.ndarray
+    distances: np.ndarray
+    turn_angles: np.ndarray
+    # checkpoint index of each checkpoint of the race, laps unrolled, and the
+    # distance from each of them to the finish line
+    order: np.ndarray
+    remaining_distances: np.ndarray
+
+
+def get_map_geometry(checkpoints: np.ndarray, laps: int) -> MapGeometry:
+    n_checkpoints = len(checkpoints)
+    segments = np.roll(checkpoints, -1, axis=0) - checkpoints
+    distances = np.linalg.norm(segments, axis=1)
+
+    incoming = np.roll(segments, 1, axis=0)
+    turn_angles = np.arctan2(
+        incoming[:, 0] * segments[:, 1] - incoming[:, 1] * segments[:, 0],
+        incoming[:, 0] * segments[:, 0] + incoming[:, 1] * segments[:, 1],
+    )
+
+    total_checkpoints = n_checkpoints * laps
+    order = np.arange(total_checkpoints + 1) % n_checkpoints
+    remaining_distances = np.zeros(total_checkpoints + 1)
+    remaining_distances[:-1] = np.cumsum(distances[order[:-1]][::-1])[::-1]
+
+    for array in (segments, distances, turn_angles, order, remaining_distances):
+        array.flags.writeable = False
+
+    return MapGeometry(
+        segments=segments,
+        distances=distances,
+        turn_angles=turn_angles,
+        order=order,
+        remaining_distances=remaining_distances,
+    )
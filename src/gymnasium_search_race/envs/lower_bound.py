@@ -0,0 +1,109 @@
+import numpy as np
+
+from gymnasium_search_race.envs.geometry import get_map_geometry
+from gymnasium_search_race.envs.physics import CHECKPOINT, VX, VY, X, Y
+from gymnasium_search_race.envs.search_race import get_test_ids, load_test_checkpoints
+
+# the truncation of the position moves the car by less than 1 on each axis
+POSITION_SLACK = float(np.sqrt(2))
+
+
+def get_max_distance_tables(
+    max_turns: int = 600,
+    car_max_thrust: float = 200,
+    friction: float = 0.15,
+) -> tuple[np.ndarray, np.ndarray]:
+    # the speed after the thrust is at most s + thrust and the next speed at
+    # most (1 - friction) times it, so the distance covered in n turns from
+    # speed s is at most base[n] + s * speed[n]
+    decay = 1 - friction
+    n = np.arange(max_turns + 1)
+    speed = (1 - decay**n) / friction
+    terminal_speed = decay * car_max_thrust / friction
+    base = n * (terminal_speed + car_max_thrust + POSITION_SLACK)
+    base -= terminal_speed * speed
+    return base, speed
+
+
+class TurnsLowerBound:
+    # admissible lower bound on the turns needed to finish the race of one map
+    # from a car state: the car must end a turn within the checkpoint radius of
+    # each remaining checkpoint, so it covers at least the distance to the next
+    # checkpoint minus the radius plus each remaining segment minus twice the
+    # radius
+    def __init__(
+        self,
+        checkpoints: np.ndarray,
+        laps: int = 3,
+        car_max_thrust: float = 200,
+        friction: float = 0.15,
+        checkpoint_radius: float = 600,
+        max_turns: int = 600,
+    ) -> None:
+        geometry = get_map_geometry(np.asarray(checkpoints, dtype=np.float64), laps)
+        segment_distances = np.maximum(
+            geometry.distances[geometry.order[:-1]] - 2 * checkpoint_radius,
+            0.0,
+        )
+
+        self.checkpoints = np.asarray(checkpoints, dtype=np.float64)
+        self.checkpoint_radius = checkpoint_radius
+        self.max_turns = max_turns
+        self.total_checkpoints = len(checkpoints) * laps
+        # minimum distance from race checkpoint c to the finish
+        self.min_remaining_distances = np.zeros(self.total_checkpoints + 1)
+        self.min_remaining_distances[:-1] = np.cumsum(segment_distances[::-1])[::-1]
+        self.max_distances_base, self.max_distances_speed = get_max_distance_tables(
+            max_turns=max_turns,
+            car_max_thrust=car_max_thrust,
+            friction=friction,
+        )
+
+    def get_required_distances(self, states: np.ndarray) -> np.ndarray:
+        states = np.atleast_2d(states)
+        current_checkpoints = np.minimum(
+            states[:, CHECKPOINT].astype(np.int64),
+            self.total_checkpoints,
+        )
+        next_checkpoints = self.checkpoints[
+            (current_checkpoints + 1) % len(self.checkpoints)
+        ]
+        distances = np.hypot(
+            next_checkpoints[:, 0] - states[:, X],
+            next_checkpoints[:, 1] - states[:, Y],
+        )
+        return np.where(
+            current_checkpoints >= self.total_checkpoints,
+            0.0,
+            np.maximum(distances - self.checkpoint_radius, 0.0)
+            + self.min_remaining_distances[
+                np.minimum(current_checkpoints + 1, self.total_checkpoints)
+            ],
+        )
+
+    def __call__(self, states: np.ndarray) -> np.ndarray:
+        # states of shape (n, 6) or (6,), max_turns + 1 when the race cannot be
+        # finished in max_turns
+        states = np.asarray(states, dtype=np.float64)
+        required_distances = self.get_required_distances(states)
+        speeds = np.hypot(np.atleast_2d(states)[:, VX], np.atleast_2d(states)[:, VY])
+        max_distances = (
+            self.max_distances_base + speeds[:, np.newaxis] * self.max_distances_speed
+        )
+        lower_bounds = np.sum(
+            max_distances < required_distances[:, np.newaxis],
+            axis=1,
+        )
+        return lower_bounds[0] if states.ndim == 1 else lower_bounds
+
+    def get_initial_lower_bound(self) -> int:
+        # the car starts on the first checkpoint without speed
+        x, y = np.trunc(self.checkpoints[0])
+        return int(self(np.array([x, y, 0.0, 0.0, 0.0, 0.0])))
+
+
+def get_test_lower_bounds(laps: int = 3) -> dict[str, int]:
+    return {
+        str(test_id): TurnsLowerBound(checkpoints, laps=laps).get_initial_lower_bound()
+        for test_id, checkpoints in zip(get_test_ids(), load_test_checkpoints())
+    }
@@ -6,10 +6,23 @@ import numpy as np
 import pygame
 from gymnasium import spaces
 from gymnasium.core import ActType, ObsType
-from stable_baselines3 import PPO
 
+from gymnasium_search_race.envs.geometry import MapGeometry, get_map_geometry
 from gymnasium_search_race.envs.models import Car, Unit
-from gymnasium_search_race.envs.search_race import SCALE_FACTOR, SearchRaceEnv
+from gymnasium_search_race.envs.opponents import (
+    BLOCKER,
+    HEURISTIC_OPPONENT,
+    RUNNER,
+    get_opponent_angle_thrust,
+    load_opponent_model,
+)
+from gymnasium_search_race.envs.physics import COLLISIONS, get_kernels
+from gymnasium_search_race.envs.search_race import (
+    SCALE_FACTOR,
+    SearchRaceEnv,
+    get_cars_state,
+)
+from gymnasium_search_race.policies import HeuristicPolicy
 
 ROOT_PATH = Path(__file__).resolve().parent
 ASSETS_PATH = ROOT_PATH / "assets" / "mad_pod_racing"
@@ -102,10 +115,15 @@ MAPS = [
     ],
 ]
 
+# the procedural maps have as many checkpoints as the Mad Pod Racing maps
+MAX_CHECKPOINTS = max(len(checkpoints) for checkpoints in MAPS)
+
 START_POINT_MULT = [[500, -500], [-500, 500], [1500, -1500], [-1500, 1500]]
 
 
 class MadPodRacingEnv(SearchRaceEnv):
+    opponent_role = BLOCKER
+
     def __init__(
         self,
         render_mode: str | None = None,
@@ -116,6 +134,16 @@ class MadPodRacingEnv(SearchRaceEnv):
         opponent_path: str | Path | None = None,
         boost_on_first_move: bool = False,
         boost_opponent_on_first_move: bool = False,
+        record_physics_events: bool = False,
+        physics_backend: str = "python",
+        frame_skip: int = 1,
+        validate_actions: bool = True,
+        dtype: type[np.floating] = np.float64,
+        procedural_maps: bool = False,
+        procedural_seed: int = 0,
+        min_checkpoints: int = 3,
+        max_checkpoints: int = MAX_CHECKPOINTS,
+        lookahead: int = 0,
     ) -> None:
         super().__init__(
             render_mode=render_mode,
@@ -123,7 +151,21 @@ class MadPodRacingEnv(SearchRaceEnv):
             car_max_thrust=car_max_thrust,
             test_id=test_id,
             sequential_maps=sequential_maps,
+            record_physics_events=record_physics_events,
+            frame_skip=frame_skip,
+            validate_actions=validate_actions,
+            dtype=dtype,
+            procedural_maps=procedural_maps,
+            procedural_seed=procedural_seed,
+            min_checkpoints=min_checkpoints,
+            max_checkpoints=max_checkpoints,
+            lookahead=lookahead,
         )
+
+        # only the moves with an opponent use the kernels: a single car is moved
+        # faster by the models than by copying its state to the kernels
+        self.physics_backend = physics_backend
+        self.kernels = get_kernels(backend=physics_backend)
         self.car_radius = 400
         self.min_impulse = 120.0
 
@@ -131,7 +173,19 @@ class MadPodRacingEnv(SearchRaceEnv):
         self.car_img_path = ASSETS_PATH / "space_ship_runner.png"
         self.opponent_car_img_path = ASSETS_PATH / "space_ship_blocker.png"
 
-        self.opponent_model = PPO.load(opponent_path) if opponent_path else None
+        if opponent_path == HEURISTIC_OPPONENT:
+            self.opponent_model = HeuristicPolicy(
+                max_rotation_per_turn=self.max_rotation_per_turn,
+                car_max_thrust=car_max_thrust,
+                distance_upper_bound=self.distance_upper_bound,
+            )
+        elif opponent_path:
+            self.opponent_model = load_opponent_model(opponent_path)
+        else:
+            self.opponent_model = None
+
+        # angle and thrust of the opponent set from outside for the next step
+        self.opponent_angle_thrust = None
 
         self.boost_on_first_move = boost_on_first_move
         self.boost_opponent_on_first_move = boost_opponent_on_first_move
@@ -140,28 +194,17 @@ class MadPodRacingEnv(SearchRaceEnv):
         return list(range(len(MAPS)))
 
     def _get_test_checkpoints(self) -> list[np.ndarray]:
-        return [
-            np.array(checkpoints, dtype=self.observation_space.dtype)
-            for checkpoints in MAPS
-        ]
+        return [np.array(checkpoints, dtype=np.float64) for checkpoints in MAPS]
 
-    def _get_runner_obs(self, car_index: int) -> ObsType:
+    def _get_runner_obs(self, car_index: int, lookahead: int = 0) -> ObsType:
         car = self.cars[car_index]
-        obs = []
-
-        # position and angle of the next 2 checkpoints relative to the car
-        for i in range(2):
-            x_cp, y_cp = self.checkpoints[
-                (car.current_checkpoint + i + 1) % len(self.checkpoints)
-            ]
-            obs.append(self._get_diff_obs(car=car, x=x_cp, y=y_cp))
 
-        # car speed
-        obs.append(self._get_speed_obs(car=car))
+        if lookahead:
+            return self._get_lookahead_obs(car=car, lookahead=lookahead)
 
-        return np.concatenate(obs).astype(self.observation_space.dtype)
+        return self._get_default_obs(car=car)
 
-    def _get_blocker_obs(self, car_index: int) -> ObsType:
+    def _get_blocker_obs(self, car_index: int, lookahead: int = 0) -> ObsType:
         runner_car_index = (car_index + 1) % len(self.cars)
         runner_car = self.cars[runner_car_index]
         blocker_car = self.cars[car_index]
@@ -169,12 +212,13 @@ class MadPodRacingEnv(SearchRaceEnv):
             [
                 self._get_diff_obs(car=blocker_car, x=runner_car.x, y=runner_car.y),
                 self._get_speed_obs(car=blocker_car),
-                self._get_runner_obs(car_index=runner_car_index),
-            ]
+                self._get_runner_obs(car_index=runner_car_index, lookahead=lookahead),
+            ],
+            dtype=self.observation_space.dtype,
         )
 
     def _get_obs(self) -> ObsType:
-        return self._get_runner_obs(car_index=0)
+        return self._get_runner_obs(car_index=0, lookahead=self.lookahead)
 
     def _get_opponent_obs(self) -> ObsType:
         return self._get_blocker_obs(car_index=1)
@@ -195,6 +239,10 @@ class MadPodRacingEnv(SearchRaceEnv):
         delta = self.np_random.integers(-30, 31, checkpoints.shape)
         return checkpoints + delta
 
+    def _get_map_geometry(self) -> MapGeometry:
+        # the checkpoints are shifted on every reset
+        return get_map_geometry(self.checkpoints, laps=self.laps)
+
     def _generate_car(self) -> None:
         # https://github.com/robostac/coders-strike-back-referee/blob/master/csbref.go#L407
         self.cars = []
@@ -249,8 +297,7 @@ class MadPodRacingEnv(SearchRaceEnv):
 
         if self.opponent_car:
             observation = self._get_opponent_obs()
-            action, _ = self.opponent_model.predict(observation, deterministic=True)
-            angle, thrust = self._convert_action_to_angle_thrust(action=action)
+            angle, thrust = self._get_opponent_angle_thrust(observation=observation)
 
             if self.boost_opponent_on_first_move and self.episode_length == 0:
                 thrust = BOOST_THRUST
@@ -258,23 +305,86 @@ class MadPodRacingEnv(SearchRaceEnv):
             self.opponent_car.rotate(angle=angle)
             self.opponent_car.thrust_towards_heading(thrust=thrust)
 
+    def _get_opponent_angle_thrust(self, observation: ObsType) -> tuple[float, float]:
+        if self.opponent_angle_thrust is not None:
+            angle, thrust = self.opponent_angle_thrust
+            return angle, thrust
+
+        angle, thrust = get_opponent_angle_thrust(
+            model=self.opponent_model,
+            observations=observation[np.newaxis],
+            max_rotation_per_turn=self.max_rotation_per_turn,
+            car_max_thrust=self.car_max_thrust,
+        )[0]
+        return angle, thrust
+
+    def get_opponent_observation(self) -> ObsType:
+        return self._get_opponent_obs()
+
+    def step(
+        self,
+        action: ActType,
+    ) -> tuple[ObsType, SupportsFloat, bool, bool, dict[str, Any]]:
+        step_returns = super().step(action)
+
+        # the opponent angle and thrust set from outside are used for one step
+        self.opponent_angle_thrust = None
+
+        return step_returns
+
     def _get_collision_reward(self) -> SupportsFloat:
         return 0
 
     def _get_checkpoint_visit_reward(self, car_index: int) -> SupportsFloat:
         return 1 if car_index == 0 else 0
 
-    def _move_car(self) -> SupportsFloat:
-        if not self.opponent_car:
-            return super()._move_car()
+    def _set_cars_state(self, state: np.ndarray) -> None:
+        for car, (x, y, vx, vy, angle, current_checkpoint) in zip(
+            self.cars, state.tolist()
+        ):
+            car.x, car.y, car.vx, car.vy, car.angle = x, y, vx, vy, angle
+            car.current_checkpoint = int(current_checkpoint)
+
+    def _move_car_with_kernels(self) -> SupportsFloat:
+        state = get_cars_state(self.cars)
+        events = np.zeros(len(self.physics_events), dtype=np.int64)
+        visited_checkpoints = np.zeros(len(self.cars), dtype=np.int64)
+        self.kernels.mad_pod_racing_move(
+            state,
+            self.checkpoints,
+            self.checkpoint_radius,
+            self.car_radius,
+            self.min_impulse,
+            events,
+            visited_checkpoints,
+        )
+        self._set_cars_state(state=state)
+
+        events = events.tolist()
+        if self.record_physics_events:
+            for name, count in zip(self.physics_events, events):
+                self.physics_events[name] += count
 
+        reward = events[COLLISIONS] * self._get_collision_reward()
+        for car_index, count in enumerate(visited_checkpoints.tolist()):
+            reward += count * self._get_checkpoint_visit_reward(car_index=car_index)
+
+        return reward
+
+    def _move_car_with_models(self) -> SupportsFloat:
         reward = 0
         t = 0.0
+        record_physics_events = self.record_physics_events
+        events = self.physics_events
 
         while t < 1.0:
             first_collision = None
             car_index = None
 
+            if record_physics_events:
+                events["sub_steps"] += 1
+                events["collision_checks"] += len(self.cars) + 1
+
             car_collision = self.car.get_collision(
                 self.opponent_car,
                 radius=2 * self.car_radius,
@@ -319,14 +429,28 @@ class MadPodRacingEnv(SearchRaceEnv):
                     min_radius=2 * self.car_radius,
                 )
                 reward += self._get_collision_reward()
+                event = "collisions"
             else:  # checkpoint collision
                 first_collision.first_unit.current_checkpoint += 1
                 reward += self._get_checkpoint_visit_reward(car_index=car_index)
+                event = "checkpoints"
+
+            if record_physics_events:
+                events[event] += 1
 
             t += first_collision.time
 
         return reward
 
+    def _move_car(self) -> SupportsFloat:
+        if not self.opponent_car:
+            return super()._move_car()
+
+        if self.physics_backend == "python":
+            return self._move_car_with_models()
+
+        return self._move_car_with_kernels()
+
     def _load_car_img(self) -> None:
         super()._load_car_img()
         self.opponent_car_img = (
@@ -357,6 +481,8 @@ class MadPodRacingEnv(SearchRaceEnv):
 
 
 class MadPodRacingBlockerEnv(MadPodRacingEnv):
+    opponent_role = RUNNER
+
     def __init__(
         self,
         opponent_path: str | Path,
@@ -367,6 +493,16 @@ class MadPodRacingBlockerEnv(MadPodRacingEnv):
         sequential_maps: bool = False,
         boost_on_first_move: bool = False,
         boost_opponent_on_first_move: bool = False,
+        record_physics_events: bool = False,
+        physics_backend: str = "python",
+        frame_skip: int = 1,
+        validate_actions: bool = True,
+        dtype: type[np.floating] = np.float64,
+        procedural_maps: bool = False,
+        procedural_seed: int = 0,
+        min_checkpoints: int = 3,
+        max_checkpoints: int = MAX_CHECKPOINTS,
+        lookahead: int = 0,
     ) -> None:
         super().__init__(
             render_mode=render_mode,
@@ -377,18 +513,28 @@ class MadPodRacingBlockerEnv(MadPodRacingEnv):
             sequential_maps=sequential_maps,
             boost_on_first_move=boost_on_first_move,
             boost_opponent_on_first_move=boost_opponent_on_first_move,
+            record_physics_events=record_physics_events,
+            physics_backend=physics_backend,
+            frame_skip=frame_skip,
+            validate_actions=validate_actions,
+            dtype=dtype,
+            procedural_maps=procedural_maps,
+            procedural_seed=procedural_seed,
+            min_checkpoints=min_checkpoints,
+            max_checkpoints=max_checkpoints,
+            lookahead=lookahead,
         )
 
         # opponent runner observation, blocker car
         self.observation_space = spaces.Box(
             low=-1,
             high=1,
-            shape=(16,),
-            dtype=np.float64,
+            shape=(6 + self.observation_space.shape[0],),
+            dtype=dtype,
         )
 
     def _get_obs(self) -> ObsType:
-        return self._get_blocker_obs(car_index=0)
+        return self._get_blocker_obs(car_index=0, lookahead=self.lookahead)
 
     def _get_opponent_obs(self) -> ObsType:
         return self._get_runner_obs(car_index=1)
@@ -411,6 +557,16 @@ class MadPodRacingDiscreteEnv(MadPodRacingEnv):
         opponent_path: str | Path | None = None,
         boost_on_first_move: bool = False,
         boost_opponent_on_first_move: bool = False,
+        record_physics_events: bool = False,
+        physics_backend: str = "python",
+        frame_skip: int = 1,
+        validate_actions: bool = True,
+        dtype: type[np.floating] = np.float64,
+        procedural_maps: bool = False,
+        procedural_seed: int = 0,
+        min_checkpoints: int = 3,
+        max_checkpoints: int = MAX_CHECKPOINTS,
+        lookahead: int = 0,
     ) -> None:
         super().__init__(
             render_mode=render_mode,
@@ -421,6 +577,16 @@ class MadPodRacingDiscreteEnv(MadPodRacingEnv):
             opponent_path=opponent_path,
             boost_on_first_move=boost_on_first_move,
             boost_opponent_on_first_move=boost_opponent_on_first_move,
+            record_physics_events=record_physics_events,
+            physics_backend=physics_backend,
+            frame_skip=frame_skip,
+            validate_actions=validate_actions,
+            dtype=dtype,
+            procedural_maps=procedural_maps,
+            procedural_seed=procedural_seed,
+            min_checkpoints=min_checkpoints,
+            max_checkpoints=max_checkpoints,
+            lookahead=lookahead,
         )
 
         self.actions = list(
@@ -454,6 +620,16 @@ class MadPodRacingBlockerDiscreteEnv(MadPodRacingBlockerEnv):
         sequential_maps: bool = False,
         boost_on_first_move: bool = False,
         boost_opponent_on_first_move: bool = False,
+        record_physics_events: bool = False,
+        physics_backend: str = "python",
+        frame_skip: int = 1,
+        validate_actions: bool = True,
+        dtype: type[np.floating] = np.float64,
+        procedural_maps: bool = False,
+        procedural_seed: int = 0,
+        min_checkpoints: int = 3,
+        max_checkpoints: int = MAX_CHECKPOINTS,
+        lookahead: int = 0,
     ) -> None:
         super().__init__(
             opponent_path=opponent_path,
@@ -464,6 +640,16 @@ class MadPodRacingBlockerDiscreteEnv(MadPodRacingBlockerEnv):
             sequential_maps=sequential_maps,
             boost_on_first_move=boost_on_first_move,
             boost_opponent_on_first_move=boost_opponent_on_first_move,
+            record_physics_events=record_physics_events,
+            physics_backend=physics_backend,
+            frame_skip=frame_skip,
+            validate_actions=validate_actions,
+            dtype=dtype,
+            procedural_maps=procedural_maps,
+            procedural_seed=procedural_seed,
+            min_checkpoints=min_checkpoints,
+            max_checkpoints=max_checkpoints,
+            lookahead=lookahead,
         )
 
         self.actions = list(
@@ -0,0 +1,82 @@
+import functools
+
+import numpy as np
+
+WIDTH = 16000
+HEIGHT = 9000
+MARGIN = 1000
+CHECKPOINT_RADIUS = 600
+MIN_DISTANCE = 2.5 * CHECKPOINT_RADIUS
+
+# procedural maps are indexed in [0, MAX_MAP_INDEX)
+MAX_MAP_INDEX = 2**31
+
+
+def generate_checkpoints(
+    index: int,
+    seed: int = 0,
+    min_checkpoints: int = 3,
+    max_checkpoints: int = 8,
+    min_distance: float = MIN_DISTANCE,
+) -> np.ndarray:
+    # the map only depends on (seed, index) so any map of the stream can be
+    # generated again without generating the previous ones
+    rng = np.random.default_rng([seed, index])
+    n_checkpoints = rng.integers(min_checkpoints, max_checkpoints + 1)
+    checkpoints = np.empty((0, 2), dtype=np.int64)
+
+    while len(checkpoints) < n_checkpoints:
+        candidates = rng.integers(
+            [MARGIN, MARGIN],
+            [WIDTH - MARGIN + 1, HEIGHT - MARGIN + 1],
+            size=(4 * n_checkpoints, 2),
+        )
+        points = np.concatenate([checkpoints, candidates])
+        distances = np.linalg.norm(points[:, np.newaxis] - points, axis=-1)
+        too_close = distances < min_distance
+        accepted = list(range(len(checkpoints)))
+
+        for i in range(len(checkpoints), len(points)):
+            if len(accepted) == n_checkpoints:
+                break
+
+            if not too_close[i, accepted].any():
+                accepted.append(i)
+
+        checkpoints = points[accepted]
+
+    return checkpoints
+
+
+def generate_maps(
+    indexes: list[int] | np.ndarray,
+    seed: int = 0,
+    min_checkpoints: int = 3,
+    max_checkpoints: int = 8,
+) -> list[np.ndarray]:
+    return [
+        generate_checkpoints(
+            index=int(index),
+            seed=seed,
+            min_checkpoints=min_checkpoints,
+            max_checkpoints=max_checkpoints,
+        )
+        for index in indexes
+    ]
+
+
+@functools.lru_cache(maxsize=4096)
+def get_generated_checkpoints(
+    index: int,
+    seed: int = 0,
+    min_checkpoints: int = 3,
+    max_checkpoints: int = 8,
+) -> np.ndarray:
+    checkpoints = generate_checkpoints(
+        index=index,
+        seed=seed,
+        min_checkpoints=min_checkpoints,
+        max_checkpoints=max_checkpoints,
+    ).astype(np.float64)
+    checkpoints.flags.writeable = False
+    return checkpoints
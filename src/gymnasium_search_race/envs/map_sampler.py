@@ -0,0 +1,83 @@
+import numpy as np
+
+
+class SumTree:
+    # binary tree stored in an array where each node is the sum of its children,
+    # the leaves are the priorities: updates and samples are O(log n)
+    def __init__(self, capacity: int) -> None:
+        self.capacity = capacity
+        self.tree = np.zeros(2 * capacity - 1, dtype=np.float64)
+
+    @property
+    def total(self) -> float:
+        return float(self.tree[0])
+
+    def __getitem__(self, index: int) -> float:
+        return float(self.tree[index + self.capacity - 1])
+
+    def update(self, index: int, priority: float) -> None:
+        node = index + self.capacity - 1
+        change = priority - self.tree[node]
+        self.tree[node] = priority
+
+        while node > 0:
+            node = (node - 1) // 2
+            self.tree[node] += change
+
+    def find(self, value: float) -> int:
+        node = 0
+
+        while node < self.capacity - 1:
+            left = 2 * node + 1
+
+            if value < self.tree[left] or self.tree[left + 1] <= 0.0:
+                node = left
+            else:
+                value -= self.tree[left]
+                node = left + 1
+
+        return node - self.capacity + 1
+
+
+class PrioritizedMapSampler:
+    # maps are sampled proportionally to the recent episode length of the agent,
+    # a failed episode counts as max_episode_steps and unseen maps have the
+    # maximum priority
+    def __init__(
+        self,
+        n_maps: int,
+        max_episode_steps: int = 600,
+        alpha: float = 1.0,
+        smoothing: float = 0.5,
+        min_priority: float = 0.01,
+    ) -> None:
+        self.n_maps = n_maps
+        self.max_episode_steps = max_episode_steps
+        self.alpha = alpha
+        self.smoothing = smoothing
+        self.min_priority = min_priority
+
+        self.tree = SumTree(capacity=n_maps)
+        self.episode_lengths = np.full(n_maps, np.nan)
+
+        for index in range(n_maps):
+            self.tree.update(index, 1.0)
+
+    def sample(self, rng: np.random.Generator) -> int:
+        return self.tree.find(rng.uniform(0.0, self.tree.total))
+
+    def update(self, index: int, episode_length: int, failure: bool) -> None:
+        episode_length = self.max_episode_steps if failure else episode_length
+
+        if np.isnan(self.episode_lengths[index]):
+            self.episode_lengths[index] = episode_length
+        else:
+            self.episode_lengths[index] += self.smoothing * (
+                episode_length - self.episode_lengths[index]
+            )
+
+        priority = (self.episode_lengths[index] / self.max_episode_steps) ** self.alpha
+        self.tree.update(index, max(priority, self.min_priority))
+
+    def priorities(self) -> np.ndarray:
+        return np.array([self.tree[index] for index in range(self.n_maps)])
@@ -0,0 +1,172 @@
+import functools
+import time
+import zipfile
+from collections.abc import Iterable
+from itertools import product
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from gymnasium import logger, spaces
+from stable_baselines3 import PPO
+
+from gymnasium_search_race.policies import HeuristicPolicy
+
+# opponent_path selecting the heuristic policy instead of a PPO model
+HEURISTIC_OPPONENT = "heuristic"
+
+RUNNER = "runner"
+BLOCKER = "blocker"
+# the opponents observe the default observation without lookahead, a blocker
+# observes the runner and its own speed before the runner observation
+RUNNER_OBSERVATION_SIZE = 10
+BLOCKER_OBSERVATION_SIZE = 6 + RUNNER_OBSERVATION_SIZE
+
+
+@functools.cache
+def _load_opponent_model(path: Path) -> PPO:
+    return PPO.load(path, device="cpu")
+
+
+def load_opponent_model(path: str | Path) -> PPO:
+    # the weights are loaded once per process and shared by the envs, the model
+    # is only used for inference
+    return _load_opponent_model(Path(path).resolve())
+
+
+def get_opponent_angle_thrust(
+    model: PPO | HeuristicPolicy,
+    observations: np.ndarray,
+    max_rotation_per_turn: int = 18,
+    car_max_thrust: int = 200,
+) -> np.ndarray:
+    # the actions are converted with the action space of the model, so the
+    # opponent does not need the action space of the env
+    if isinstance(model, HeuristicPolicy):
+        return model.predict_angle_thrust(observations)
+
+    actions, _ = model.predict(observations, deterministic=True)
+
+    if isinstance(model.action_space, spaces.Discrete):
+        angle_thrusts = np.array(
+            list(
+                product(
+                    range(-max_rotation_per_turn, max_rotation_per_turn + 1),
+                    [0, car_max_thrust],
+                )
+            )
+        )
+        return angle_thrusts[actions]
+
+    return np.rint(np.asarray(actions) * [max_rotation_per_turn, car_max_thrust])
+
+
+def get_model_role(model: PPO) -> str:
+    observation_size = int(np.prod(model.observation_space.shape))
+
+    if observation_size == RUNNER_OBSERVATION_SIZE:
+        return RUNNER
+
+    if observation_size == BLOCKER_OBSERVATION_SIZE:
+        return BLOCKER
+
+    raise ValueError(f"observation size {observation_size} of no opponent role")
+
+
+class OpponentPool:
+    # opponents are PPO models (files, or directories searched for .zip files) or
+    # the heuristic policy, the files are loaded again when they are modified.
+    # The role of each model is read from its observation size, so that the envs
+    # sampling a pool of runners and blockers only get opponents of their role
+    def __init__(
+        self,
+        paths: Iterable[str | Path],
+        refresh_interval: float = 60.0,
+    ) -> None:
+        self.paths = [
+            path if path == HEURISTIC_OPPONENT else Path(path) for path in paths
+        ]
+        self.refresh_interval = refresh_interval
+        self.models = {}
+        self.roles = {}
+        self.mtimes = {}
+        self.last_refresh = -np.inf
+        self.refresh()
+
+        if not self.models:
+            raise ValueError("the opponent pool is empty")
+
+    @property
+    def names(self) -> list[str]:
+        return sorted(self.models)
+
+    def get_names(self, role: str | None = None) -> list[str]:
+        # the heuristic policy plays both roles
+        return [
+            name
+            for name in self.names
+            if role is None or self.roles[name] in (None, role)
+        ]
+
+    def _get_model_paths(self) -> list[Path]:
+        model_paths = []
+
+        for path in self.paths:
+            if path == HEURISTIC_OPPONENT:
+                continue
+
+            if path.is_dir():
+                model_paths.extend(sorted(path.rglob("*.zip")))
+            elif path.exists():
+                model_paths.append(path)
+
+        return model_paths
+
+    def refresh(self) -> None:
+        self.last_refresh = time.monotonic()
+
+        if HEURISTIC_OPPONENT in self.paths:
+            self.models.setdefault(HEURISTIC_OPPONENT, HeuristicPolicy())
+            self.roles[HEURISTIC_OPPONENT] = None
+
+        model_paths = self._get_model_paths()
+
+        for path in model_paths:
+            name = str(path)
+            mtime = path.stat().st_mtime
+
+            if self.mtimes.get(name) == mtime:
+                continue
+
+            try:
+                model = PPO.load(path, device="cpu")
+                self.roles[name] = get_model_role(model)
+                self.models[name] = model
+                self.mtimes[name] = mtime
+            except (OSError, ValueError, EOFError, zipfile.BadZipFile) as e:
+                # a model being saved is loaded at the next refresh
+                logger.warn(f"opponent {name} could not be loaded: {e}")
+
+        removed = set(self.mtimes) - {str(path) for path in model_paths}
+        for name in removed:
+            del self.models[name]
+            del self.roles[name]
+            del self.mtimes[name]
+
+    def maybe_refresh(self) -> None:
+        if time.monotonic() - self.last_refresh >= self.refresh_interval:
+            self.refresh()
+
+    def sample(
+        self,
+        rng: np.random.Generator,
+        role: str | None = None,
+    ) -> tuple[str, Any]:
+        self.maybe_refresh()
+        names = self.get_names(role=role)
+
+        if not names:
+            raise ValueError(f"the opponent pool has no {role} opponent")
+
+        name = names[rng.integers(len(names))]
+        return name, self.models[name]
@@ -0,0 +1,384 @@
+import functools
+import math
+from types import SimpleNamespace
+
+import numpy as np
+from gymnasium import logger
+
+from gymnasium_search_race.envs.models import EPSILON
+
+try:
+    import numba
+    from numba.extending import register_jitable
+except ImportError:  # numba is an optional dependency
+    numba = None
+
+    def register_jitable(function):
+        return function
+
+
+PHYSICS_BACKENDS = ("python", "numba")
+
+# columns of the cars state array
+X, Y, VX, VY, ANGLE, CHECKPOINT = range(6)
+
+# indexes of the physics events array
+SUB_STEPS, COLLISION_CHECKS, COLLISIONS, CHECKPOINTS = range(4)
+
+NO_COLLISION = -1.0
+
+
+# the kernels replicate the operations of models.py on arrays of cars so that
+# trajectories are identical with both backends
+
+
+@register_jitable
+def distance(x1: float, y1: float, x2: float, y2: float) -> float:
+    dx = x1 - x2
+    dy = y1 - y2
+    return math.sqrt(dx * dx + dy * dy)
+
+
+@register_jitable
+def get_collision_time(
+    x1: float,
+    y1: float,
+    vx1: float,
+    vy1: float,
+    x2: float,
+    y2: float,
+    vx2: float,
+    vy2: float,
+    radius: float,
+) -> float:
+    # https://github.com/Illedan/CGSearchRace/blob/master/SearchRace/src/main/java/com/codingame/game/Unit.java#L36
+    if distance(x1, y1, x2, y2) <= radius:
+        return 0.0
+
+    if vx1 == vx2 and vy1 == vy2:
+        return NO_COLLISION
+
+    dx = x1 - x2
+    dy = y1 - y2
+    dvx = vx1 - vx2
+    dvy = vy1 - vy2
+
+    a = dvx * dvx + dvy * dvy
+
+    if a <= 0.0:
+        return NO_COLLISION
+
+    b = 2.0 * (dx * dvx + dy * dvy)
+    c = dx * dx + dy * dy - radius * radius
+    delta = b * b - 4.0 * a * c
+
+    if delta < 0.0:
+        return NO_COLLISION
+
+    t = (-b - math.sqrt(delta)) / (2.0 * a)
+
+    if t <= 0.0:
+        return NO_COLLISION
+
+    return t
+
+
+@register_jitable
+def bounce(
+    cars: np.ndarray,
+    i: int,
+    j: int,
+    min_impulse: float,
+    min_radius: float,
+) -> None:
+    # https://github.com/SpiritusSancti5/codinGame/blob/master/Referees/Coders%20Strike%20Back/Referee.java#L476
+    nx = cars[j, X] - cars[i, X]
+    ny = cars[j, Y] - cars[i, Y]
+    d = math.sqrt(nx * nx + ny * ny)
+    nx /= d
+    ny /= d
+
+    force = (nx * (cars[i, VX] - cars[j, VX]) + ny * (cars[i, VY] - cars[j, VY])) / 2
+    force += min_impulse if force < min_impulse else force
+
+    impulse_x = -nx * force
+    impulse_y = -ny * force
+    cars[i, VX] += impulse_x
+    cars[i, VY] += impulse_y
+    cars[j, VX] -= impulse_x
+    cars[j, VY] -= impulse_y
+
+    if d <= min_radius:
+        d -= min_radius
+        cars[i, X] += nx * -(-d / 2 + EPSILON)
+        cars[i, Y] += ny * -(-d / 2 + EPSILON)
+        cars[j, X] += nx * (-d / 2 + EPSILON)
+        cars[j, Y] += ny * (-d / 2 + EPSILON)
+
+
+@register_jitable
+def rotate_and_thrust(cars: np.ndarray, i: int, angle: float, thrust: float) -> None:
+    cars[i, ANGLE] = (cars[i, ANGLE] + angle) % 360
+    radians = np.radians(cars[i, ANGLE])
+    cars[i, VX] += np.cos(radians) * thrust
+    cars[i, VY] += np.sin(radians) * thrust
+
+
+@register_jitable
+def adjust(cars: np.ndarray, i: int, friction: float, round_position: bool) -> None:
+    if round_position:
+        cars[i, X] = np.rint(cars[i, X])
+        cars[i, Y] = np.rint(cars[i, Y])
+    else:
+        cars[i, X] = np.trunc(cars[i, X])
+        cars[i, Y] = np.trunc(cars[i, Y])
+        cars[i, ANGLE] = np.rint(cars[i, ANGLE])
+
+    cars[i, VX] = np.trunc(cars[i, VX] * (1 - friction))
+    cars[i, VY] = np.trunc(cars[i, VY] * (1 - friction))
+
+
+@register_jitable
+def search_race_move(
+    cars: np.ndarray,
+    checkpoints: np.ndarray,
+    n_checkpoints: np.ndarray,
+    checkpoint_radius: float,
+    active: np.ndarray,
+    rewards: np.ndarray,
+) -> None:
+    # checkpoints has shape (n_cars, max_checkpoints, 2) to move cars on several maps
+    for i in range(cars.shape[0]):
+        rewards[i] = 0.0
+
+        if not active[i]:
+            continue
+
+        cars[i, X] += cars[i, VX] * 1.0
+        cars[i, Y] += cars[i, VY] * 1.0
+
+        checkpoint_index = (int(cars[i, CHECKPOINT]) + 1) % n_checkpoints[i]
+        if (
+            distance(
+                cars[i, X],
+                cars[i, Y],
+                checkpoints[i, checkpoint_index, 0],
+                checkpoints[i, checkpoint_index, 1],
+            )
+            <= checkpoint_radius
+        ):
+            cars[i, CHECKPOINT] += 1
+            rewards[i] = 1.0
+
+
+@register_jitable
+def search_race_step(
+    cars: np.ndarray,
+    checkpoints: np.ndarray,
+    n_checkpoints: np.ndarray,
+    angles: np.ndarray,
+    thrusts: np.ndarray,
+    checkpoint_radius: float,
+    friction: float,
+    round_position: bool,
+    active: np.ndarray,
+    rewards: np.ndarray,
+) -> None:
+    for i in range(cars.shape[0]):
+        if active[i]:
+            rotate_and_thrust(cars, i, angles[i], thrusts[i])
+
+    search_race_move(
+        cars, checkpoints, n_checkpoints, checkpoint_radius, active, rewards
+    )
+
+    for i in range(cars.shape[0]):
+        if active[i]:
+            adjust(cars, i, friction, round_position)
+
+
+@register_jitable
+def mad_pod_racing_move(
+    cars: np.ndarray,
+    checkpoints: np.ndarray,
+    checkpoint_radius: float,
+    car_radius: float,
+    min_impulse: float,
+    events: np.ndarray,
+    visited_checkpoints: np.ndarray,
+) -> None:
+    # the first car collides with the second one, checkpoints has shape (n, 2)
+    n_cars = cars.shape[0]
+    n_checkpoints = checkpoints.shape[0]
+    t = 0.0
+
+    while t < 1.0:
+        first_collision_time = NO_COLLISION
+        car_index = -1
+        events[SUB_STEPS] += 1
+        events[COLLISION_CHECKS] += n_cars + 1
+
+        if n_cars > 1:
+            car_collision_time = get_collision_time(
+                cars[0, X],
+                cars[0, Y],
+                cars[0, VX],
+                cars[0, VY],
+                cars[1, X],
+                cars[1, Y],
+                cars[1, VX],
+                cars[1, VY],
+                2 * car_radius,
+            )
+            if car_collision_time != NO_COLLISION and car_collision_time + t < 1.0:
+                first_collision_time = car_collision_time
+
+        for i in range(n_cars):
+            checkpoint_index = (int(cars[i, CHECKPOINT]) + 1) % n_checkpoints
+            checkpoint_collision_time = get_collision_time(
+                cars[i, X],
+                cars[i, Y],
+                cars[i, VX],
+                cars[i, VY],
+                checkpoints[checkpoint_index, 0],
+                checkpoints[checkpoint_index, 1],
+                0.0,
+                0.0,
+                checkpoint_radius,
+            )
+
+            if (
+                checkpoint_collision_time != NO_COLLISION
+                and checkpoint_collision_time + t < 1.0
+                and (
+                    first_collision_time == NO_COLLISION
+                    or checkpoint_collision_time < first_collision_time
+                )
+            ):
+                first_collision_time = checkpoint_collision_time
+                car_index = i
+
+        if first_collision_time == NO_COLLISION:
+            for i in range(n_cars):
+                cars[i, X] += cars[i, VX] * (1.0 - t)
+                cars[i, Y] += cars[i, VY] * (1.0 - t)
+            break
+
+        for i in range(n_cars):
+            cars[i, X] += cars[i, VX] * first_collision_time
+            cars[i, Y] += cars[i, VY] * first_collision_time
+
+        if car_index == -1:
+            bounce(cars, 0, 1, min_impulse, 2 * car_radius)
+            events[COLLISIONS] += 1
+        else:  # checkpoint collision
+            cars[car_index, CHECKPOINT] += 1
+            visited_checkpoints[car_index] += 1
+            events[CHECKPOINTS] += 1
+
+        t += first_collision_time
+
+
+@register_jitable
+def search_race_rollout(
+    states: np.ndarray,
+    checkpoints: np.ndarray,
+    angles: np.ndarray,
+    thrusts: np.ndarray,
+    start: int,
+    total_checkpoints: int,
+    checkpoint_radius: float,
+    friction: float,
+    round_position: bool,
+    max_length: float,
+    min_remaining_distances: np.ndarray,
+    max_distances_base: np.ndarray,
+    max_distances_speed: np.ndarray,
+) -> int:
+    # states[t] is the state of one car before turn t: the turns are simulated
+    # from states[start] until the car finishes the race, the following states
+    # are not updated. Returns the episode length, or -1 as soon as the lower
+    # bound tables of lower_bound.py show that the race cannot be finished in
+    # max_length turns
+    cars = states[start : start + 1].copy()
+    car_checkpoints = checkpoints.reshape(1, checkpoints.shape[0], 2)
+    n_checkpoints = np.full(1, checkpoints.shape[0], dtype=np.int64)
+    active = np.ones(1, dtype=np.bool_)
+    rewards = np.zeros(1)
+
+    if cars[0, CHECKPOINT] >= total_checkpoints:
+        return start
+
+    for t in range(start, angles.shape[0]):
+        search_race_step(
+            cars,
+            car_checkpoints,
+            n_checkpoints,
+            angles[t : t + 1],
+            thrusts[t : t + 1],
+            checkpoint_radius,
+            friction,
+            round_position,
+            active,
+            rewards,
+        )
+        states[t + 1] = cars[0]
+
+        if cars[0, CHECKPOINT] >= total_checkpoints:
+            return t + 1
+
+        remaining_turns = max_length - (t + 1)
+
+        if remaining_turns < max_distances_base.shape[0]:
+            if remaining_turns < 0.0:
+                return -1
+
+            next_checkpoint = int(cars[0, CHECKPOINT]) + 1
+            checkpoint_index = next_checkpoint % checkpoints.shape[0]
+            required_distance = (
+                max(
+                    distance(
+                        cars[0, X],
+                        cars[0, Y],
+                        checkpoints[checkpoint_index, 0],
+                        checkpoints[checkpoint_index, 1],
+                    )
+                    - checkpoint_radius,
+                    0.0,
+                )
+                + min_remaining_distances[next_checkpoint]
+            )
+            n = int(remaining_turns)
+            speed = math.sqrt(cars[0, VX] * cars[0, VX] + cars[0, VY] * cars[0, VY])
+
+            if max_distances_base[n] + speed * max_distances_speed[n] < (
+                required_distance
+            ):
+                return -1
+
+    return angles.shape[0]
+
+
+KERNELS = (
+    search_race_move,
+    search_race_step,
+    search_race_rollout,
+    mad_pod_racing_move,
+)
+
+
+@functools.cache
+def get_kernels(backend: str = "python") -> SimpleNamespace:
+    if backend not in PHYSICS_BACKENDS:
+        raise ValueError(f"physics backend must be one of {PHYSICS_BACKENDS}")
+
+    if backend == "numba" and numba is None:
+        logger.warn("numba is not installed, the physics kernels are not compiled")
+        backend = "python"
+
+    if backend == "numba":
+        return SimpleNamespace(
+            **{kernel.__name__: numba.njit(cache=True)(kernel) for kernel in KERNELS}
+        )
+
+    return SimpleNamespace(**{kernel.__name__: kernel for kernel in KERNELS})
@@ -1,3 +1,4 @@
+import functools
 import json
 from dataclasses import asdict
 from itertools import product
@@ -10,7 +11,16 @@ import pygame
 from gymnasium import spaces
 from gymnasium.core import ActType, ObsType, RenderFrame
 
+from gymnasium_search_race.envs.geometry import MapGeometry, get_map_geometry
+from gymnasium_search_race.envs.map_generator import (
+    CHECKPOINT_RADIUS,
+    HEIGHT,
+    MAX_MAP_INDEX,
+    WIDTH,
+    get_generated_checkpoints,
+)
 from gymnasium_search_race.envs.models import Car, Point
+from gymnasium_search_race.envs.physics import ANGLE, CHECKPOINT, VX, VY, X, Y
 
 SCALE_FACTOR = 20
 CHECKPOINT_COLOR = (52, 52, 52)
@@ -23,11 +33,157 @@ ROOT_PATH = Path(__file__).resolve().parent
 ASSETS_PATH = ROOT_PATH / "assets" / "search_race"
 MAPS_PATH = ROOT_PATH / "maps"
 
+PHYSICS_EVENTS = ("sub_steps", "collision_checks", "collisions", "checkpoints")
+
+MAX_ROTATION_PER_TURN = 18
+CAR_FRICTION = 0.15
+DISTANCE_UPPER_BOUND = float(np.linalg.norm([WIDTH, HEIGHT]))
+
 
 def get_test_ids() -> list[int]:
     return sorted(int(path.stem.replace("test", "")) for path in MAPS_PATH.iterdir())
 
 
+@functools.cache
+def load_test_checkpoints() -> tuple[np.ndarray, ...]:
+    # the maps are loaded once per process and shared by the envs (and by the
+    # workers of a vector env forked after the first load)
+    checkpoints = []
+
+    for test_id in get_test_ids():
+        test_map_path = MAPS_PATH / f"test{test_id}.json"
+        test_map = json.loads(test_map_path.read_text(encoding="UTF-8"))
+        test_checkpoints = np.array(
+            [
+                [int(i) for i in checkpoint.split()]
+                for checkpoint in test_map["testIn"].split(";")
+            ],
+            dtype=np.float64,
+        )
+        test_checkpoints.flags.writeable = False
+        checkpoints.append(test_checkpoints)
+
+    return tuple(checkpoints)
+
+
+@functools.cache
+def load_test_geometry(test_id: int, laps: int) -> MapGeometry:
+    # the geometry of a test map is built once per process like its checkpoints
+    checkpoints = load_test_checkpoints()[get_test_ids().index(test_id)]
+    return get_map_geometry(checkpoints, laps=laps)
+
+
+def get_cars_state(cars: list[Car]) -> np.ndarray:
+    return np.array(
+        [
+            [car.x, car.y, car.vx, car.vy, car.angle, car.current_checkpoint]
+            for car in cars
+        ],
+        dtype=np.float64,
+    )
+
+
+def _rotate_to_car_frame(
+    radians: np.ndarray,
+    x: np.ndarray,
+    y: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    c, s = np.cos(radians), np.sin(radians)
+    return c * x + s * y, -s * x + c * y
+
+
+def _set_target_obs(
+    obs: np.ndarray,
+    cars: np.ndarray,
+    radians: np.ndarray,
+    targets: np.ndarray,
+    distance_upper_bound: float,
+) -> None:
+    # position and angle of the targets of shape (n, k, 2) relative to the cars
+    # in their frame, written in the first 4 * k columns of obs
+    dx, dy = _rotate_to_car_frame(
+        radians=radians[:, np.newaxis],
+        x=targets[..., 0] - cars[:, X, np.newaxis],
+        y=targets[..., 1] - cars[:, Y, np.newaxis],
+    )
+    relative_angles = np.arctan2(dy, dx)
+    size = 4 * targets.shape[1]
+    obs[:, 0:size:4] = dx / distance_upper_bound
+    obs[:, 1:size:4] = dy / distance_upper_bound
+    obs[:, 2:size:4] = np.sin(relative_angles)
+    obs[:, 3:size:4] = np.cos(relative_angles)
+
+
+def _set_speed_obs(
+    obs: np.ndarray,
+    cars: np.ndarray,
+    radians: np.ndarray,
+    car_thrust_upper_bound: float,
+) -> None:
+    # speed of the cars in their frame, written in the last 2 columns of obs
+    vx, vy = _rotate_to_car_frame(radians=radians, x=cars[:, VX], y=cars[:, VY])
+    obs[:, -2] = vx / car_thrust_upper_bound
+    obs[:, -1] = vy / car_thrust_upper_bound
+
+
+def get_target_obs(
+    cars: np.ndarray,
+    targets: np.ndarray,
+    distance_upper_bound: float,
+) -> np.ndarray:
+    # for cars with the state layout of the physics kernels
+    obs = np.empty((len(cars), 4 * targets.shape[1]))
+    _set_target_obs(
+        obs=obs,
+        cars=cars,
+        radians=np.radians(cars[:, ANGLE]),
+        targets=targets,
+        distance_upper_bound=distance_upper_bound,
+    )
+    return np.clip(obs, -1.0, 1.0, out=obs)
+
+
+def get_speed_obs(cars: np.ndarray, car_thrust_upper_bound: float) -> np.ndarray:
+    obs = np.empty((len(cars), 2))
+    _set_speed_obs(
+        obs=obs,
+        cars=cars,
+        radians=np.radians(cars[:, ANGLE]),
+        car_thrust_upper_bound=car_thrust_upper_bound,
+    )
+    return np.clip(obs, -1.0, 1.0, out=obs)
+
+
+def get_default_obs(
+    cars: np.ndarray,
+    checkpoints: np.ndarray,
+    n_checkpoints: np.ndarray,
+    distance_upper_bound: float,
+    car_thrust_upper_bound: float,
+) -> np.ndarray:
+    # the next 2 checkpoints and the speed of each car, shared by the envs and
+    # the batched simulator so that both give the same observations
+    indexes = (cars[:, CHECKPOINT, np.newaxis].astype(np.int64) + [1, 2]) % (
+        n_checkpoints[:, np.newaxis]
+    )
+    radians = np.radians(cars[:, ANGLE])
+    obs = np.empty((len(cars), 10))
+    _set_target_obs(
+        obs=obs,
+        cars=cars,
+        radians=radians,
+        targets=checkpoints[np.arange(len(cars))[:, np.newaxis], indexes],
+        distance_upper_bound=distance_upper_bound,
+    )
+    _set_speed_obs(
+        obs=obs,
+        cars=cars,
+        radians=radians,
+        car_thrust_upper_bound=car_thrust_upper_bound,
+    )
+    return np.clip(obs, -1.0, 1.0, out=obs)
+
+
 def clockwise_rotation_matrix(angle: float) -> np.ndarray:
     # https://en.wikipedia.org/wiki/Rotation_matrix#Direction
     c, s = np.cos(angle), np.sin(angle)
@@ -44,23 +200,32 @@ class SearchRaceEnv(gym.Env):
         car_max_thrust: float = 200,
         test_id: int | None = None,
         sequential_maps: bool = False,
+        record_physics_events: bool = False,
+        frame_skip: int = 1,
+        validate_actions: bool = True,
+        dtype: type[np.floating] = np.float64,
+        procedural_maps: bool = False,
+        procedural_seed: int = 0,
+        min_checkpoints: int = 3,
+        max_checkpoints: int = 8,
+        lookahead: int = 0,
     ) -> None:
         self.laps = laps
         self.car_max_thrust = car_max_thrust
-        self.width = 16000
-        self.height = 9000
-        self.checkpoint_radius = 600
-        self.max_rotation_per_turn = 18
-        self.car_friction = 0.15
+        self.width = WIDTH
+        self.height = HEIGHT
+        self.checkpoint_radius = CHECKPOINT_RADIUS
+        self.max_rotation_per_turn = MAX_ROTATION_PER_TURN
+        self.car_friction = CAR_FRICTION
 
-        self.distance_upper_bound = np.linalg.norm([self.width, self.height])
+        self.distance_upper_bound = DISTANCE_UPPER_BOUND
         self.car_thrust_upper_bound = car_max_thrust * 10
 
         self.observation_space = spaces.Box(
             low=-1,
             high=1,
-            shape=(10,),
-            dtype=np.float64,
+            shape=(5 * lookahead + 2 if lookahead else 10,),
+            dtype=dtype,
         )
 
         # rotation angle, thrust
@@ -78,6 +243,20 @@ class SearchRaceEnv(gym.Env):
         self.test_id = test_id
         self.sequential_maps = sequential_maps
         self.test_index = -1
+        self.procedural_maps = procedural_maps
+        self.map_index = -1
+        self.procedural_seed = procedural_seed
+        assert 2 <= min_checkpoints <= max_checkpoints
+        self.min_checkpoints = min_checkpoints
+        self.max_checkpoints = max_checkpoints
+        self.lookahead = lookahead
+        self.map_geometry = None
+        self.record_physics_events = record_physics_events
+        self.physics_events = dict.fromkeys(PHYSICS_EVENTS, 0)
+
+        assert frame_skip >= 1
+        self.frame_skip = frame_skip
+        self.validate_actions = validate_actions
 
         self.window = None
         self.clock = None
@@ -91,63 +270,73 @@ class SearchRaceEnv(gym.Env):
         return get_test_ids()
 
     def _get_test_checkpoints(self) -> list[np.ndarray]:
-        checkpoints = []
-
-        for test_id in self._get_test_ids():
-            test_map_path = MAPS_PATH / f"test{test_id}.json"
-            test_map = json.loads(test_map_path.read_text(encoding="UTF-8"))
-            checkpoints.append(
-                np.array(
-                    [
-                        [int(i) for i in checkpoint.split()]
-                        for checkpoint in test_map["testIn"].split(";")
-                    ],
-                    dtype=self.observation_space.dtype,
-                )
-            )
-
-        return checkpoints
+        return list(load_test_checkpoints())
 
     def _get_diff_obs(self, car: Car, x: float, y: float) -> ObsType:
+        return get_target_obs(
+            cars=get_cars_state([car]),
+            targets=np.array([[[x, y]]]),
+            distance_upper_bound=self.distance_upper_bound,
+        )[0]
+
+    def _get_speed_obs(self, car: Car) -> ObsType:
+        return get_speed_obs(
+            cars=get_cars_state([car]),
+            car_thrust_upper_bound=self.car_thrust_upper_bound,
+        )[0]
+
+    def _get_default_obs(self, car: Car) -> ObsType:
+        return get_default_obs(
+            cars=get_cars_state([car]),
+            checkpoints=self.checkpoints[np.newaxis],
+            n_checkpoints=np.array([len(self.checkpoints)]),
+            distance_upper_bound=self.distance_upper_bound,
+            car_thrust_upper_bound=self.car_thrust_upper_bound,
+        )[0].astype(self.observation_space.dtype)
+
+    def _get_lookahead_obs(self, car: Car, lookahead: int) -> ObsType:
+        # the next checkpoints of the race are read from the geometry tables and
+        # rotated in the car's frame with one rotation matrix
+        race_indexes = np.minimum(
+            car.current_checkpoint + 1 + np.arange(lookahead),
+            self.total_checkpoints,
+        )
+        indexes = self.map_geometry.order[race_indexes]
         r = clockwise_rotation_matrix(car.radians())
-        dx, dy = r @ [x - car.x, y - car.y]
-        relative_angle = (np.arctan2(dy, dx) + np.pi) % (2 * np.pi) - np.pi
-        return np.clip(
+        diff = (self.checkpoints[indexes] - [car.x, car.y]) @ r.T
+        distances = np.linalg.norm(diff, axis=1, keepdims=True)
+        directions = np.divide(
+            diff,
+            distances,
+            out=np.array([[1.0, 0.0]]).repeat(lookahead, axis=0),
+            where=distances > 0,
+        )
+        checkpoints_obs = np.column_stack(
             [
-                dx / self.distance_upper_bound,
-                dy / self.distance_upper_bound,
-                np.sin(relative_angle),
-                np.cos(relative_angle),
-            ],
+                diff / self.distance_upper_bound,
+                directions[:, 1],
+                directions[:, 0],
+                self.map_geometry.turn_angles[indexes] / np.pi,
+            ]
+        )
+        speed_obs = r @ [car.vx, car.vy] / self.car_thrust_upper_bound
+        return np.clip(
+            np.concatenate([checkpoints_obs.ravel(), speed_obs]),
             -1.0,
             1.0,
-        )
-
-    def _get_speed_obs(self, car: Car) -> ObsType:
-        r = clockwise_rotation_matrix(car.radians())
-        relative_speed = r @ [car.vx, car.vy]
-        return np.clip(relative_speed / self.car_thrust_upper_bound, -1.0, 1.0)
+        ).astype(self.observation_space.dtype)
 
     def _get_obs(self) -> ObsType:
-        obs = []
+        if self.lookahead:
+            return self._get_lookahead_obs(car=self.car, lookahead=self.lookahead)
 
-        # position and angle of the next 2 checkpoints relative to the car
-        for i in range(2):
-            x_cp, y_cp = self.checkpoints[
-                (self.car.current_checkpoint + i + 1) % len(self.checkpoints)
-            ]
-            obs.append(self._get_diff_obs(car=self.car, x=x_cp, y=y_cp))
-
-        # car speed
-        obs.append(self._get_speed_obs(car=self.car))
-
-        return np.concatenate(obs).astype(self.observation_space.dtype)
+        return self._get_default_obs(car=self.car)
 
     def _get_terminated(self) -> bool:
         return self.car.current_checkpoint >= self.total_checkpoints
 
     def _get_info(self) -> dict[str, Any]:
-        return {
+        info = {
             "width": self.width,
             "height": self.height,
             "x": self.car.x,
@@ -165,6 +354,11 @@ class SearchRaceEnv(gym.Env):
             "episode_length": self.episode_length,
         }
 
+        if self.record_physics_events:
+            info["physics_events"] = self.physics_events.copy()
+
+        return info
+
     def _generate_checkpoints(
         self,
         options: dict[str, Any] | None = None,
@@ -175,6 +369,9 @@ class SearchRaceEnv(gym.Env):
             else options["test_id"]
         )
 
+        if test_id is None and self.procedural_maps:
+            return self._generate_procedural_checkpoints(options=options)
+
         if test_id is not None:
             self.test_index = self.test_ids.index(test_id)
         elif self.sequential_maps:
@@ -184,6 +381,36 @@ class SearchRaceEnv(gym.Env):
 
         return self.test_checkpoints[self.test_index]
 
+    def _generate_procedural_checkpoints(
+        self,
+        options: dict[str, Any] | None = None,
+    ) -> np.ndarray:
+        if options is not None and "map_index" in options:
+            self.map_index = options["map_index"]
+        elif self.sequential_maps:
+            self.map_index = (self.map_index + 1) % MAX_MAP_INDEX
+        else:
+            self.map_index = int(self.np_random.integers(MAX_MAP_INDEX))
+
+        # the procedural maps are not test cases
+        self.test_index = -1
+
+        return get_generated_checkpoints(
+            index=self.map_index,
+            seed=self.procedural_seed,
+            min_checkpoints=self.min_checkpoints,
+            max_checkpoints=self.max_checkpoints,
+        )
+
+    def _get_map_geometry(self) -> MapGeometry:
+        if self.test_index < 0:
+            return get_map_geometry(self.checkpoints, laps=self.laps)
+
+        return load_test_geometry(
+            test_id=self.test_ids[self.test_index],
+            laps=self.laps,
+        )
+
     def _generate_car(self) -> None:
         self.car = Car(
             x=self.checkpoints[0][0],
@@ -208,8 +435,11 @@ class SearchRaceEnv(gym.Env):
         super().reset(seed=seed, options=options)
 
         self.episode_length = 0
+        if self.record_physics_events:
+            self.physics_events = dict.fromkeys(PHYSICS_EVENTS, 0)
         self.checkpoints = self._generate_checkpoints(options=options)
         self.total_checkpoints = len(self.checkpoints) * self.laps
+        self.map_geometry = self._get_map_geometry() if self.lookahead else None
         self._generate_car()
         self._adjust_car()
 
@@ -226,8 +456,10 @@ class SearchRaceEnv(gym.Env):
         action: ActType,
     ) -> tuple[float, float]:
         angle, thrust = action
-        assert -1.0 <= angle <= 1.0
-        assert 0.0 <= thrust <= 1.0
+
+        if self.validate_actions:
+            assert -1.0 <= angle <= 1.0
+            assert 0.0 <= thrust <= 1.0
 
         angle = np.rint(angle * self.max_rotation_per_turn)
         thrust = np.rint(thrust * self.car_max_thrust)
@@ -258,25 +490,42 @@ class SearchRaceEnv(gym.Env):
             self.car.current_checkpoint += 1
             reward += 1
 
+        if self.record_physics_events:
+            self.physics_events["sub_steps"] += 1
+            self.physics_events["collision_checks"] += 1
+            self.physics_events["checkpoints"] += reward
+
         return reward
 
     def step(
         self,
         action: ActType,
     ) -> tuple[ObsType, SupportsFloat, bool, bool, dict[str, Any]]:
-        assert self.action_space.contains(
-            action
-        ), f"{action!r} ({type(action)}) invalid"
+        if self.validate_actions:
+            assert self.action_space.contains(
+                action
+            ), f"{action!r} ({type(action)}) invalid"
 
         angle, thrust = self._convert_action_to_angle_thrust(action=action)
 
-        self._apply_angle_thrust(angle=angle, thrust=thrust)
-        reward = self._move_car()
-        self._adjust_car()
-        self.episode_length += 1
+        if self.record_physics_events:
+            self.physics_events = dict.fromkeys(PHYSICS_EVENTS, 0)
+
+        reward = 0
+        terminated = False
+
+        # the action is repeated and the observation built once per decision
+        for _ in range(self.frame_skip):
+            self._apply_angle_thrust(angle=angle, thrust=thrust)
+            reward += self._move_car()
+            self._adjust_car()
+            self.episode_length += 1
+            terminated = self._get_terminated()
+
+            if terminated:
+                break
 
         observation = self._get_obs()
-        terminated = self._get_terminated()
         info = self._get_info()
 
         if self.render_mode == "human":
@@ -430,6 +679,15 @@ class SearchRaceDiscreteEnv(SearchRaceEnv):
         car_max_thrust: float = 200,
         test_id: int | None = None,
         sequential_maps: bool = False,
+        record_physics_events: bool = False,
+        frame_skip: int = 1,
+        validate_actions: bool = True,
+        dtype: type[np.floating] = np.float64,
+        procedural_maps: bool = False,
+        procedural_seed: int = 0,
+        min_checkpoints: int = 3,
+        max_checkpoints: int = 8,
+        lookahead: int = 0,
     ) -> None:
         super().__init__(
             render_mode=render_mode,
@@ -437,6 +695,15 @@ class SearchRaceDiscreteEnv(SearchRaceEnv):
             car_max_thrust=car_max_thrust,
             test_id=test_id,
             sequential_maps=sequential_maps,
+            record_physics_events=record_physics_events,
+            frame_skip=frame_skip,
+            validate_actions=validate_actions,
+            dtype=dtype,
+            procedural_maps=procedural_maps,
+            procedural_seed=procedural_seed,
+            min_checkpoints=min_checkpoints,
+            max_checkpoints=max_checkpoints,
+            lookahead=lookahead,
         )
 
         self.actions = list(
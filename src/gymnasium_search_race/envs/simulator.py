@@ -0,0 +1,95 @@
+import numpy as np
+
+from gymnasium_search_race.envs.physics import ANGLE, CHECKPOINT, X, Y, get_kernels
+from gymnasium_search_race.envs.search_race import (
+    CAR_FRICTION,
+    CHECKPOINT_RADIUS,
+    DISTANCE_UPPER_BOUND,
+    MAX_ROTATION_PER_TURN,
+    get_default_obs,
+)
+
+
+class SearchRaceSimulator:
+    # batch of Search Race cars, each one on its own map, moved with the
+    # physics kernels without any env: the observations, actions and episode
+    # ends are the same as SearchRaceEnv with the default observation
+    def __init__(
+        self,
+        checkpoints: list[np.ndarray],
+        laps: int = 3,
+        car_max_thrust: float = 200,
+        max_episode_steps: int = 600,
+        physics_backend: str = "numba",
+    ) -> None:
+        self.laps = laps
+        self.car_max_thrust = car_max_thrust
+        self.max_episode_steps = max_episode_steps
+        self.checkpoint_radius = CHECKPOINT_RADIUS
+        self.max_rotation_per_turn = MAX_ROTATION_PER_TURN
+        self.car_friction = CAR_FRICTION
+        self.distance_upper_bound = DISTANCE_UPPER_BOUND
+        self.car_thrust_upper_bound = car_max_thrust * 10
+        self.kernels = get_kernels(backend=physics_backend)
+
+        self.n_cars = len(checkpoints)
+        self.n_checkpoints = np.array([len(c) for c in checkpoints], dtype=np.int64)
+        self.checkpoints = np.zeros((self.n_cars, self.n_checkpoints.max(), 2))
+
+        for i, car_checkpoints in enumerate(checkpoints):
+            self.checkpoints[i, : len(car_checkpoints)] = car_checkpoints
+
+        self.total_checkpoints = self.n_checkpoints * laps
+        self.cars = np.zeros((self.n_cars, 6))
+        self.episode_lengths = np.zeros(self.n_cars, dtype=np.int64)
+        self.rewards = np.zeros(self.n_cars)
+
+    @property
+    def terminated(self) -> np.ndarray:
+        return self.cars[:, CHECKPOINT] >= self.total_checkpoints
+
+    @property
+    def done(self) -> np.ndarray:
+        return self.terminated | (self.episode_lengths >= self.max_episode_steps)
+
+    def get_obs(self) -> np.ndarray:
+        return get_default_obs(
+            cars=self.cars,
+            checkpoints=self.checkpoints,
+            n_checkpoints=self.n_checkpoints,
+            distance_upper_bound=self.distance_upper_bound,
+            car_thrust_upper_bound=self.car_thrust_upper_bound,
+        )
+
+    def reset(self) -> np.ndarray:
+        # the cars start on the first checkpoint heading to the second one
+        first, second = self.checkpoints[:, 0], self.checkpoints[:, 1]
+        self.cars[:] = 0.0
+        self.cars[:, X] = np.trunc(first[:, 0])
+        self.cars[:, Y] = np.trunc(first[:, 1])
+        self.cars[:, ANGLE] = np.rint(
+            np.degrees(
+                np.arctan2(second[:, 1] - first[:, 1], second[:, 0] - first[:, 0])
+            )
+            % 360
+        )
+        self.episode_lengths[:] = 0
+        return self.get_obs()
+
+    def step(self, angles: np.ndarray, thrusts: np.ndarray) -> np.ndarray:
+        # the cars of the finished episodes do not move anymore
+        active = ~self.done
+        self.kernels.search_race_step(
+            self.cars,
+            self.checkpoints,
+            self.n_checkpoints,
+            np.asarray(angles, dtype=np.float64),
+            np.asarray(thrusts, dtype=np.float64),
+            self.checkpoint_radius,
+            self.car_friction,
+            False,
+            active,
+            self.rewards,
+        )
+        self.episode_lengths += active
+        return self.get_obs()
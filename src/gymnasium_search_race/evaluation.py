@@ -0,0 +1,157 @@
+import time
+from itertools import product
+from typing import Any
+
+import gymnasium as gym
+import numpy as np
+
+from gymnasium_search_race.envs import MadPodRacingEnv
+from gymnasium_search_race.envs.simulator import SearchRaceSimulator
+
+
+class TestCasesEvaluator:
+    # all the test maps of an env id, times the seeds, stepped in lockstep with
+    # one batch of actions: the Search Race maps with the default observation
+    # are moved together with SearchRaceSimulator, the other ones (Mad Pod
+    # Racing with its opponent, lookahead observations, frame skip) with one
+    # unwrapped env per episode. Finished episodes ignore their actions
+
+    # not a test class for pytest
+    __test__ = False
+
+    def __init__(
+        self,
+        env_id: str,
+        test_ids: list[int] | None = None,
+        seeds: list[int | None] | None = None,
+        max_episode_steps: int | None = None,
+        physics_backend: str = "numba",
+        **env_kwargs,
+    ) -> None:
+        env = gym.make(env_id, **env_kwargs)
+        self.unwrapped = env.unwrapped
+        self.test_ids = test_ids or self.unwrapped.test_ids
+        self.seeds = seeds or [None]
+        self.episodes = list(product(self.test_ids, self.seeds))
+        self.max_episode_steps = max_episode_steps or env.spec.max_episode_steps
+        self.dtype = self.unwrapped.observation_space.dtype
+        self.discrete = isinstance(self.unwrapped.action_space, gym.spaces.Discrete)
+
+        if (
+            not isinstance(self.unwrapped, MadPodRacingEnv)
+            and not self.unwrapped.lookahead
+            and self.unwrapped.frame_skip == 1
+        ):
+            self.simulator = SearchRaceSimulator(
+                checkpoints=[
+                    self.unwrapped.test_checkpoints[
+                        self.unwrapped.test_ids.index(test_id)
+                    ]
+                    for test_id, _seed in self.episodes
+                ],
+                laps=self.unwrapped.laps,
+                car_max_thrust=self.unwrapped.car_max_thrust,
+                max_episode_steps=self.max_episode_steps,
+                physics_backend=physics_backend,
+            )
+            self.envs = None
+        else:
+            # the Search Race envs move their single car without the kernels
+            if isinstance(self.unwrapped, MadPodRacingEnv):
+                env_kwargs["physics_backend"] = physics_backend
+
+            self.simulator = None
+            self.envs = [
+                gym.make(env_id, test_id=test_id, **env_kwargs).unwrapped
+                for test_id, _seed in self.episodes
+            ]
+
+        env.close()
+
+        self.n_episodes = len(self.episodes)
+        self.episode_lengths = np.zeros(self.n_episodes, dtype=np.int64)
+        self.episode_returns = np.zeros(self.n_episodes)
+        self.episode_times = np.zeros(self.n_episodes)
+        self.terminated = np.zeros(self.n_episodes, dtype=np.bool_)
+        self.observations = None
+        self.start_time = 0.0
+
+    @property
+    def done(self) -> np.ndarray:
+        return self.terminated | (self.episode_lengths >= self.max_episode_steps)
+
+    def reset(self) -> np.ndarray:
+        self.episode_lengths[:] = 0
+        self.episode_returns[:] = 0.0
+        self.episode_times[:] = 0.0
+        self.terminated[:] = False
+        self.start_time = time.perf_counter()
+
+        if self.simulator is not None:
+            return self.simulator.reset().astype(self.dtype)
+
+        self.observations = np.stack(
+            [
+                env.reset(seed=seed, options={"test_id": test_id})[0]
+                for env, (test_id, seed) in zip(self.envs, self.episodes)
+            ]
+        )
+        return self.observations.copy()
+
+    def _convert_actions_to_angles_thrusts(
+        self,
+        actions: np.ndarray,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        if self.discrete:
+            angles, thrusts = np.asarray(self.unwrapped.actions)[actions].T
+            return angles, thrusts
+
+        return (
+            np.rint(actions[:, 0] * self.unwrapped.max_rotation_per_turn),
+            np.rint(actions[:, 1] * self.unwrapped.car_max_thrust),
+        )
+
+    def step(self, actions: np.ndarray) -> np.ndarray:
+        # actions of all the episodes, returns the observations of all of them
+        active = ~self.done
+
+        if self.simulator is not None:
+            self.simulator.step(*self._convert_actions_to_angles_thrusts(actions))
+            observations = self.simulator.get_obs().astype(self.dtype)
+            self.episode_returns += self.simulator.rewards
+            self.terminated = self.simulator.terminated
+        else:
+            for i in np.flatnonzero(active):
+                observation, reward, terminated, _truncated, _info = self.envs[i].step(
+                    actions[i]
+                )
+                self.observations[i] = observation
+                self.episode_returns[i] += reward
+                self.terminated[i] = terminated
+
+            observations = self.observations.copy()
+
+        self.episode_lengths += active
+        self.episode_times[active & self.done] = time.perf_counter() - self.start_time
+
+        return observations
+
+    def evaluate(self, model: Any, deterministic: bool = True) -> list[dict[str, Any]]:
+        # model has the predict method of stable-baselines3 models, returns the
+        # statistics of each episode with the keys of RecordEpisodeStatistics
+        observations = self.reset()
+
+        while not self.done.all():
+            actions, _ = model.predict(observations, deterministic=deterministic)
+            observations = self.step(actions)
+
+        return [
+            {
+                "test_id": test_id,
+                "seed": seed,
+                "r": float(self.episode_returns[i]),
+                "l": int(self.episode_lengths[i]),
+                "t": round(float(self.episode_times[i]), 6),
+            }
+            for i, (test_id, seed) in enumerate(self.episodes)
+        ]
@@ -0,0 +1,122 @@
+import numpy as np
+
+from gymnasium_search_race.envs.simulator import SearchRaceSimulator
+from gymnasium_search_race.policies import MLPPolicy
+
+
+def evaluate_population(
+    policy: MLPPolicy,
+    parameters: np.ndarray,
+    checkpoints: list[np.ndarray],
+    laps: int = 3,
+    max_episode_steps: int = 600,
+    physics_backend: str = "numba",
+) -> np.ndarray:
+    # total episode length on the maps of each parameter vector: the cars of
+    # all the policies on all the maps are moved in one simulator and each
+    # policy predicts the actions of its cars in one batch
+    n_policies, n_maps = len(parameters), len(checkpoints)
+    simulator = SearchRaceSimulator(
+        checkpoints=checkpoints * n_policies,
+        laps=laps,
+        car_max_thrust=policy.car_max_thrust,
+        max_episode_steps=max_episode_steps,
+        physics_backend=physics_backend,
+    )
+    observations = simulator.reset()
+
+    while not simulator.done.all():
+        outputs = policy.forward_population(
+            parameters,
+            observations.reshape(n_policies, n_maps, -1),
+        )
+        angles, thrusts = policy.get_angle_thrust(outputs)
+        observations = simulator.step(angles.ravel(), thrusts.ravel())
+
+    return simulator.episode_lengths.reshape(n_policies, n_maps).sum(axis=1)
+
+
+def sample_antithetic_noise(
+    rng: np.random.Generator,
+    population_size: int,
+    n_parameters: int,
+) -> np.ndarray:
+    # mirrored pairs of perturbations: the noise of each pair cancels out in
+    # the gradient estimate which reduces its variance
+    assert population_size % 2 == 0, "the population size must be even"
+    noise = rng.standard_normal((population_size // 2, n_parameters))
+    return np.concatenate([noise, -noise])
+
+
+def get_centered_ranks(fitness: np.ndarray) -> np.ndarray:
+    # utilities in [-0.5, 0.5], the highest for the lowest fitness
+    ranks = np.empty(len(fitness))
+    ranks[np.argsort(-fitness, kind="stable")] = np.arange(len(fitness))
+    return ranks / max(len(fitness) - 1, 1) - 0.5
+
+
+class EvolutionStrategy:
+    # OpenAI-ES: gradient of the fitness estimated from antithetic
+    # perturbations of the mean with rank-based fitness shaping
+    def __init__(
+        self,
+        mean: np.ndarray,
+        sigma: float = 0.02,
+        learning_rate: float = 0.01,
+        population_size: int = 64,
+        seed: int | None = None,
+    ) -> None:
+        self.mean = np.array(mean, dtype=np.float64)
+        self.sigma = sigma
+        self.learning_rate = learning_rate
+        self.population_size = population_size
+        self.rng = np.random.default_rng(seed)
+        self.noise = None
+
+    def ask(self) -> np.ndarray:
+        self.noise = sample_antithetic_noise(
+            self.rng,
+            population_size=self.population_size,
+            n_parameters=len(self.mean),
+        )
+        return self.mean + self.sigma * self.noise
+
+    def tell(self, fitness: np.ndarray) -> None:
+        utilities = get_centered_ranks(np.asarray(fitness, dtype=np.float64))
+        gradient = utilities @ self.noise / (self.population_size * self.sigma)
+        self.mean += self.learning_rate * gradient
+
+
+class CrossEntropyMethod:
+    # diagonal gaussian refitted on the elite fraction of the population,
+    # sampled with antithetic perturbations
+    def __init__(
+        self,
+        mean: np.ndarray,
+        sigma: float = 0.02,
+        population_size: int = 64,
+        elite_fraction: float = 0.2,
+        min_sigma: float = 1e-3,
+        seed: int | None = None,
+    ) -> None:
+        self.mean = np.array(mean, dtype=np.float64)
+        self.std = np.full_like(self.mean, sigma)
+        self.population_size = population_size
+        self.n_elites = max(int(elite_fraction * population_size), 1)
+        self.min_sigma = min_sigma
+        self.rng = np.random.default_rng(seed)
+        self.population = None
+
+    def ask(self) -> np.ndarray:
+        noise = sample_antithetic_noise(
+            self.rng,
+            population_size=self.population_size,
+            n_parameters=len(self.mean),
+        )
+        self.population = self.mean + self.std * noise
+        return self.population
+
+    def tell(self, fitness: np.ndarray) -> None:
+        elites = self.population[np.argsort(fitness, kind="stable")[: self.n_elites]]
+        self.mean = elites.mean(axis=0)
+        self.std = np.maximum(elites.std(axis=0), self.min_sigma)
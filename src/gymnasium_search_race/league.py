@@ -0,0 +1,220 @@
+from collections import defaultdict
+from itertools import product
+from pathlib import Path
+from typing import Any
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+from gymnasium_search_race.envs.opponents import (
+    BLOCKER,
+    HEURISTIC_OPPONENT,
+    RUNNER,
+    OpponentPool,
+    get_opponent_angle_thrust,
+    load_opponent_model,
+)
+from gymnasium_search_race.policies import HeuristicPolicy
+from gymnasium_search_race.wrappers import ScalarInfo
+
+ELO_SCALE = 400 / np.log(10)
+ELO_OFFSET = 1500
+
+
+def is_blocker_env(env_id: str) -> bool:
+    return "Blocker" in env_id
+
+
+def evaluate_against_pool(
+    model: Any,
+    env_id: str,
+    pool: OpponentPool,
+    n_episodes: int = 10,
+    num_envs: int = 8,
+    seed: int | None = None,
+    vectorization_mode: str = "sync",
+    **env_kwargs,
+) -> dict[str, dict[str, float]]:
+    # each sub-env plays against one opponent of the pool: at each step the
+    # opponents observations are gathered and every opponent predicts the
+    # actions of its sub-envs in one batch. Only the opponents of the role the
+    # env needs are played
+    blocker = is_blocker_env(env_id)
+    names = pool.get_names(role=RUNNER if blocker else BLOCKER)
+
+    if not names:
+        raise ValueError("the opponent pool has no opponent for this env")
+
+    num_envs = max(num_envs, len(names))
+    opponent_names = [names[i % len(names)] for i in range(num_envs)]
+    groups = {name: np.flatnonzero(np.array(opponent_names) == name) for name in names}
+
+    # the heuristic opponent only creates the opponent cars, its actions are
+    # replaced by the actions of the pool
+    envs = gym.make_vec(
+        env_id,
+        num_envs=num_envs,
+        vectorization_mode=vectorization_mode,
+        vector_kwargs={"autoreset_mode": gym.vector.AutoresetMode.SAME_STEP},
+        wrappers=[ScalarInfo],
+        opponent_path=HEURISTIC_OPPONENT,
+        **env_kwargs,
+    )
+    max_rotation_per_turn = envs.get_attr("max_rotation_per_turn")[0]
+    car_max_thrust = envs.get_attr("car_max_thrust")[0]
+
+    episode_returns = np.zeros(num_envs)
+    episode_lengths = np.zeros(num_envs, dtype=np.int64)
+    results = defaultdict(lambda: defaultdict(list))
+
+    observations, _infos = envs.reset(seed=seed)
+
+    while any(len(results[name]["returns"]) < n_episodes for name in names):
+        opponent_observations = np.stack(envs.call("get_opponent_observation"))
+        opponent_angle_thrusts = np.empty((num_envs, 2))
+
+        for name, indexes in groups.items():
+            opponent_angle_thrusts[indexes] = get_opponent_angle_thrust(
+                model=pool.models[name],
+                observations=opponent_observations[indexes],
+                max_rotation_per_turn=max_rotation_per_turn,
+                car_max_thrust=car_max_thrust,
+            )
+
+        envs.set_attr("opponent_angle_thrust", list(opponent_angle_thrusts))
+        actions, _ = model.predict(observations, deterministic=True)
+        observations, rewards, terminated, truncated, infos = envs.step(actions)
+
+        episode_returns += rewards
+        episode_lengths += 1
+
+        for i in np.flatnonzero(terminated | truncated):
+            name = opponent_names[i]
+
+            if len(results[name]["returns"]) < n_episodes:
+                # the runner wins when it finishes the race first, the blocker
+                # wins when the race is not finished
+                final_info = infos["final_info"]
+                finished = (
+                    final_info["current_checkpoint"][i]
+                    >= final_info["total_checkpoints"][i]
+                )
+                results[name]["returns"].append(episode_returns[i])
+                results[name]["lengths"].append(episode_lengths[i])
+                results[name]["wins"].append(
+                    not terminated[i] if blocker else bool(finished)
+                )
+
+            episode_returns[i] = 0.0
+            episode_lengths[i] = 0
+
+    envs.close()
+
+    return {
+        name: {
+            "mean_return": float(np.mean(results[name]["returns"])),
+            "mean_length": float(np.mean(results[name]["lengths"])),
+            "win_rate": float(np.mean(results[name]["wins"])),
+        }
+        for name in names
+    }
+
+
+def load_policy(path: str | Path) -> Any:
+    if str(path) == HEURISTIC_OPPONENT:
+        return HeuristicPolicy()
+
+    return load_opponent_model(path)
+
+
+def get_model_name(path: str | Path) -> str:
+    path = Path(path)
+    return path.parent.name if path.name == "best_model.zip" else path.stem
+
+
+def get_runner_env_id(runner_model: Any) -> str:
+    # the heuristic policy predicts continuous actions
+    if isinstance(runner_model, HeuristicPolicy) or not isinstance(
+        runner_model.action_space, spaces.Discrete
+    ):
+        return "gymnasium_search_race:gymnasium_search_race/MadPodRacing-v2"
+
+    return "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2"
+
+
+def play_matches(
+    runner_path: str | Path,
+    blocker_path: str | Path,
+    test_ids: list[int],
+    seeds: list[int],
+    max_episode_steps: int = 600,
+) -> list[dict[str, int]]:
+    # all the matches of a runner against a blocker are played in lockstep so
+    # that both models predict the actions of all the matches in one batch
+    runner_model = load_policy(runner_path)
+    blocker_model = load_policy(blocker_path)
+    env_id = get_runner_env_id(runner_model)
+    matches = list(product(test_ids, seeds))
+    envs = [
+        gym.make(env_id, test_id=test_id, opponent_path=HEURISTIC_OPPONENT).unwrapped
+        for test_id, _seed in matches
+    ]
+    observations = np.stack(
+        [env.reset(seed=seed)[0] for env, (_test_id, seed) in zip(envs, matches)]
+    )
+    active = np.ones(len(envs), dtype=np.bool_)
+    results = [None] * len(envs)
+
+    while active.any():
+        indexes = np.flatnonzero(active)
+        opponent_angle_thrusts = get_opponent_angle_thrust(
+            model=blocker_model,
+            observations=np.stack(
+                [envs[i].get_opponent_observation() for i in indexes]
+            ),
+        )
+        actions, _ = runner_model.predict(observations[indexes], deterministic=True)
+
+        for i, action, opponent_angle_thrust in zip(
+            indexes, actions, opponent_angle_thrusts
+        ):
+            envs[i].opponent_angle_thrust = opponent_angle_thrust
+            observations[i], _reward, terminated, _truncated, info = envs[i].step(
+                action
+            )
+
+            if terminated or info["episode_length"] >= max_episode_steps:
+                test_id, seed = matches[i]
+                active[i] = False
+                results[i] = {
+                    "test_id": test_id,
+                    "seed": seed,
+                    "win": int(info["current_checkpoint"] >= info["total_checkpoints"]),
+                    "length": info["episode_length"],
+                }
+
+    return results
+
+
+def get_ratings(
+    wins: np.ndarray,
+    n_iterations: int = 1000,
+    prior_games: float = 1.0,
+) -> np.ndarray:
+    # Bradley-Terry strengths fitted with the MM algorithm on the matrix of wins
+    # of player i against player j, on the Elo scale: unlike sequential Elo
+    # updates the ratings do not depend on the order of the matches. Each player
+    # wins and loses prior_games against a virtual player of rating ELO_OFFSET
+    # so that the ratings stay finite
+    games = wins + wins.T
+    total_wins = wins.sum(axis=1) + prior_games
+    strengths = np.ones(len(wins))
+
+    for _ in range(n_iterations):
+        denominators = (
+            games / (strengths[:, np.newaxis] + strengths[np.newaxis, :])
+        ).sum(axis=1) + 2 * prior_games / (strengths + 1.0)
+        strengths = total_wins / denominators
+
+    return ELO_SCALE * np.log(strengths) + ELO_OFFSET
@@ -0,0 +1,131 @@
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from gymnasium_search_race.envs.physics import ANGLE, get_kernels
+
+CHECKPOINT_RADIUS = 600
+CAR_FRICTION = 0.15
+MAX_ROTATION_PER_TURN = 18
+CAR_MAX_THRUST = 200
+
+STATE_NAMES = ("x", "y", "vx", "vy", "angle", "current_checkpoint")
+
+
+@dataclass
+class GameLog:
+    # Search Race game parsed by scripts/parse_logs.py: checkpoints[c] is the
+    # target of a car with current_checkpoint c - 1 (the first one is the start
+    # checkpoint, the laps are unrolled), states[t] is the logged car state
+    # before turn t and actions[t] the expert angle and thrust of turn t
+    name: str
+    checkpoints: np.ndarray
+    states: np.ndarray
+    actions: np.ndarray
+
+
+def parse_game_log(name: str, game: dict[str, list[str]]) -> GameLog:
+    stdin = game["stdin"]
+    nb_checkpoints = int(stdin[0])
+    unrolled_checkpoints = [
+        [float(i) for i in line.split()] for line in stdin[1 : nb_checkpoints + 1]
+    ]
+
+    # checkpointIndex x y vx vy angle, reordered as the physics state columns
+    states = np.array(
+        [[float(i) for i in line.split()] for line in stdin[nb_checkpoints + 1 :]]
+    ).reshape(-1, 6)[:, [1, 2, 3, 4, 5, 0]]
+    states[:, ANGLE] %= 360
+
+    actions = np.array(
+        [[float(i) for i in line.split()[1:3]] for line in game["stdout"]]
+    ).reshape(-1, 2)
+
+    n_turns = min(len(states) - 1, len(actions))
+
+    return GameLog(
+        name=name,
+        checkpoints=np.array([unrolled_checkpoints[-1], *unrolled_checkpoints]),
+        states=states[: n_turns + 1],
+        actions=actions[:n_turns],
+    )
+
+
+def load_game_log(path: str | Path) -> GameLog:
+    path = Path(path)
+    return parse_game_log(
+        name=path.name,
+        game=json.loads(path.read_text(encoding="UTF-8")),
+    )
+
+
+def find_divergences(
+    games: list[GameLog],
+    physics_backend: str = "python",
+) -> list[dict[str, Any] | None]:
+    # all the games are replayed in lockstep with the physics kernels: at each
+    # turn the expert actions of the games still running are applied in one
+    # batch and the states are compared to the logged ones. Returns the first
+    # divergence of each game or None
+    kernels = get_kernels(backend=physics_backend)
+    n_games = len(games)
+    max_checkpoints = max(len(game.checkpoints) for game in games)
+    checkpoints = np.zeros((n_games, max_checkpoints, 2))
+    n_checkpoints = np.empty(n_games, dtype=np.int64)
+    n_turns = np.array([len(game.actions) for game in games])
+    max_turns = max(n_turns, default=0)
+    actions = np.zeros((n_games, max_turns, 2))
+
+    for i, game in enumerate(games):
+        checkpoints[i, : len(game.checkpoints)] = game.checkpoints
+        n_checkpoints[i] = len(game.checkpoints)
+        actions[i, : n_turns[i]] = game.actions
+
+    angles = np.clip(actions[..., 0], -MAX_ROTATION_PER_TURN, MAX_ROTATION_PER_TURN)
+    thrusts = np.clip(actions[..., 1], 0, CAR_MAX_THRUST)
+    cars = np.array([game.states[0] for game in games]).reshape(n_games, 6)
+    rewards = np.zeros(n_games)
+    diverged = np.zeros(n_games, dtype=np.bool_)
+    divergences = {}
+
+    for turn in range(max_turns):
+        active = (n_turns > turn) & ~diverged
+
+        if not active.any():
+            break
+
+        kernels.search_race_step(
+            cars,
+            checkpoints,
+            n_checkpoints,
+            angles[:, turn],
+            thrusts[:, turn],
+            CHECKPOINT_RADIUS,
+            CAR_FRICTION,
+            False,
+            active,
+            rewards,
+        )
+
+        for i in np.flatnonzero(active):
+            expected = games[i].states[turn + 1]
+
+            if not np.array_equal(cars[i], expected):
+                diverged[i] = True
+                divergences[i] = {
+                    "turn": turn + 1,
+                    "fields": [
+                        name
+                        for name, actual_value, expected_value in zip(
+                            STATE_NAMES, cars[i], expected
+                        )
+                        if actual_value != expected_value
+                    ],
+                    "actual": cars[i].tolist(),
+                    "expected": expected.tolist(),
+                }
+
+    return [divergences.get(i) for i in range(n_games)]
@@ -0,0 +1,309 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+from gymnasium.core import ActType, ObsType
+
+DISTANCE_UPPER_BOUND = float(np.linalg.norm([16000, 9000]))
+
+
+class HeuristicPolicy:
+    # steers towards the target of the first 4 observation variables (the next
+    # checkpoint for a runner, the runner for a blocker) for a batch of
+    # observations of shape (n, obs_dim)
+    def __init__(
+        self,
+        max_rotation_per_turn: int = 18,
+        car_max_thrust: int = 200,
+        distance_upper_bound: float = DISTANCE_UPPER_BOUND,
+        near_distance: float = 3000,
+        near_thrust: int = 50,
+        far_thrust: int = 100,
+        max_thrust_angle: float = 180,
+        actions: list[tuple[int, int]] | None = None,
+    ) -> None:
+        self.max_rotation_per_turn = max_rotation_per_turn
+        self.car_max_thrust = car_max_thrust
+        self.distance_upper_bound = distance_upper_bound
+        self.near_distance = near_distance
+        self.near_thrust = near_thrust
+        self.far_thrust = far_thrust
+        self.max_thrust_angle = max_thrust_angle
+        self.actions = None if actions is None else np.asarray(actions)
+
+    @classmethod
+    def from_env(cls, env: gym.Env, **kwargs) -> HeuristicPolicy:
+        car_max_thrust = env.get_wrapper_attr("car_max_thrust")
+
+        if isinstance(env.action_space, spaces.Discrete):
+            # the discrete actions only thrust 0 or car_max_thrust: full thrust
+            # when the target is ahead of the car, none otherwise
+            kwargs = {
+                "near_thrust": car_max_thrust,
+                "far_thrust": car_max_thrust,
+                "max_thrust_angle": 36,
+                "actions": env.get_wrapper_attr("actions"),
+                **kwargs,
+            }
+
+        return cls(
+            max_rotation_per_turn=env.get_wrapper_attr("max_rotation_per_turn"),
+            car_max_thrust=car_max_thrust,
+            distance_upper_bound=env.get_wrapper_attr("distance_upper_bound"),
+            **kwargs,
+        )
+
+    def predict_angle_thrust(self, observations: np.ndarray) -> np.ndarray:
+        observations = np.asarray(observations, dtype=np.float64)
+        target_angles = np.rad2deg(np.arctan2(observations[:, 2], observations[:, 3]))
+        angles = np.clip(
+            np.rint(target_angles),
+            -self.max_rotation_per_turn,
+            self.max_rotation_per_turn,
+        )
+        distances = np.hypot(observations[:, 0], observations[:, 1])
+        thrusts = np.where(
+            distances * self.distance_upper_bound < self.near_distance,
+            self.near_thrust,
+            self.far_thrust,
+        )
+        thrusts = np.where(np.abs(target_angles) > self.max_thrust_angle, 0, thrusts)
+        return np.column_stack([angles, thrusts])
+
+    def _to_discrete_actions(self, angle_thrusts: np.ndarray) -> np.ndarray:
+        # nearest angle, then nearest thrust (the highest one on ties)
+        angle_costs = np.abs(self.actions[:, 0] - angle_thrusts[:, [0]])
+        thrust_costs = np.abs(self.actions[:, 1] - angle_thrusts[:, [1]])
+        thrust_costs = thrust_costs - self.actions[:, 1] / (4 * self.car_max_thrust)
+        return np.argmin(angle_costs * 4 * self.car_max_thrust + thrust_costs, axis=1)
+
+    def predict(  # pylint: disable=unused-argument
+        self,
+        observation: ObsType,
+        state: Any = None,
+        episode_start: np.ndarray | None = None,
+        deterministic: bool = True,
+    ) -> tuple[ActType, Any]:
+        # same signature as the stable-baselines3 models
+        observation = np.asarray(observation)
+        observations = observation.reshape(-1, observation.shape[-1])
+        angle_thrusts = self.predict_angle_thrust(observations)
+
+        if self.actions is not None:
+            actions = self._to_discrete_actions(angle_thrusts)
+        else:
+            actions = angle_thrusts / [self.max_rotation_per_turn, self.car_max_thrust]
+
+        if observation.ndim == 1:
+            return actions[0], state
+
+        return actions, state
+
+
+ACTIVATIONS = {
+    "relu": lambda x: np.maximum(x, 0.0),
+    "tanh": np.tanh,
+}
+
+
+class MLPPolicy:
+    # NumPy copy of the policy network of a PPO model: hidden layers then the
+    # action layer giving the logits of the discrete actions or the mean of
+    # the continuous actions. The parameters of several policies with the same
+    # layers can be evaluated in one batch as a (n_policies, n_parameters) array
+    def __init__(
+        self,
+        weights: list[np.ndarray],
+        biases: list[np.ndarray],
+        activation: str = "tanh",
+        actions: np.ndarray | None = None,
+        low: np.ndarray | None = None,
+        high: np.ndarray | None = None,
+        max_rotation_per_turn: int = 18,
+        car_max_thrust: int = 200,
+    ) -> None:
+        if activation not in ACTIVATIONS:
+            raise ValueError(f"activation must be one of {list(ACTIVATIONS)}")
+
+        self.weights = [np.asarray(w, dtype=np.float64) for w in weights]
+        self.biases = [np.asarray(b, dtype=np.float64) for b in biases]
+        self.activation = activation
+        self.actions = None if actions is None else np.asarray(actions)
+        self.low = np.array([-1.0, 0.0]) if low is None else np.asarray(low)
+        self.high = np.array([1.0, 1.0]) if high is None else np.asarray(high)
+        self.max_rotation_per_turn = max_rotation_per_turn
+        self.car_max_thrust = car_max_thrust
+
+    @classmethod
+    def from_env(
+        cls,
+        env: gym.Env,
+        net_arch: tuple[int, ...] = (64, 64),
+        activation: str = "tanh",
+        seed: int | None = None,
+    ) -> MLPPolicy:
+        # random weights scaled by the fan-in and a small action layer so that
+        # the first actions are close to the center of the action space
+        rng = np.random.default_rng(seed)
+        discrete = isinstance(env.action_space, spaces.Discrete)
+        sizes = [
+            env.observation_space.shape[0],
+            *net_arch,
+            env.action_space.n if discrete else env.action_space.shape[0],
+        ]
+        weights = [
+            rng.normal(size=(n_in, n_out)) / np.sqrt(n_in)
+            for n_in, n_out in zip(sizes[:-1], sizes[1:])
+        ]
+        weights[-1] *= 0.01
+
+        return cls(
+            weights=weights,
+            biases=[np.zeros(n_out) for n_out in sizes[1:]],
+            activation=activation,
+            actions=env.get_wrapper_attr("actions") if discrete else None,
+            low=None if discrete else env.action_space.low,
+            high=None if discrete else env.action_space.high,
+            max_rotation_per_turn=env.get_wrapper_attr("max_rotation_per_turn"),
+            car_max_thrust=env.get_wrapper_attr("car_max_thrust"),
+        )
+
+    @classmethod
+    def from_ppo(cls, model: Any, env: gym.Env) -> MLPPolicy:
+        policy = model.policy
+        layers = [
+            layer
+            for layer in [*policy.mlp_extractor.policy_net, policy.action_net]
+            if hasattr(layer, "weight")
+        ]
+        discrete = isinstance(model.action_space, spaces.Discrete)
+
+        return cls(
+            weights=[layer.weight.detach().cpu().numpy().T for layer in layers],
+            biases=[layer.bias.detach().cpu().numpy() for layer in layers],
+            activation=policy.activation_fn.__name__.lower(),
+            actions=env.get_wrapper_attr("actions") if discrete else None,
+            low=None if discrete else model.action_space.low,
+            high=None if discrete else model.action_space.high,
+            max_rotation_per_turn=env.get_wrapper_attr("max_rotation_per_turn"),
+            car_max_thrust=env.get_wrapper_attr("car_max_thrust"),
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> MLPPolicy:
+        with np.load(path) as data:
+            n_layers = int(data["n_layers"])
+            return cls(
+                weights=[data[f"weight_{i}"] for i in range(n_layers)],
+                biases=[data[f"bias_{i}"] for i in range(n_layers)],
+                activation=str(data["activation"]),
+                actions=data["actions"] if data["actions"].size else None,
+                low=data["low"],
+                high=data["high"],
+                max_rotation_per_turn=int(data["max_rotation_per_turn"]),
+                car_max_thrust=int(data["car_max_thrust"]),
+            )
+
+    def save(self, path: str | Path) -> None:
+        np.savez(
+            path,
+            n_layers=len(self.weights),
+            **{f"weight_{i}": w for i, w in enumerate(self.weights)},
+            **{f"bias_{i}": b for i, b in enumerate(self.biases)},
+            activation=self.activation,
+            actions=np.empty(0) if self.actions is None else self.actions,
+            low=self.low,
+            high=self.high,
+            max_rotation_per_turn=self.max_rotation_per_turn,
+            car_max_thrust=self.car_max_thrust,
+        )
+
+    @property
+    def n_parameters(self) -> int:
+        return sum(w.size + b.size for w, b in zip(self.weights, self.biases))
+
+    def get_parameters(self) -> np.ndarray:
+        return np.concatenate(
+            [np.concatenate([w.ravel(), b]) for w, b in zip(self.weights, self.biases)]
+        )
+
+    def _split_parameters(
+        self,
+        parameters: np.ndarray,
+    ) -> list[tuple[np.ndarray, np.ndarray]]:
+        # (n_policies, n_parameters) to the weights (n_policies, n_in, n_out) and
+        # the biases (n_policies, 1, n_out) of each layer
+        layers = []
+        start = 0
+
+        for w, b in zip(self.weights, self.biases):
+            weights = parameters[:, start : start + w.size].reshape(-1, *w.shape)
+            start += w.size
+            biases = parameters[:, start : start + b.size].reshape(-1, 1, b.size)
+            start += b.size
+            layers.append((weights, biases))
+
+        return layers
+
+    def set_parameters(self, parameters: np.ndarray) -> None:
+        layers = self._split_parameters(np.asarray(parameters)[np.newaxis])
+        self.weights = [weights[0] for weights, _biases in layers]
+        self.biases = [biases[0, 0] for _weights, biases in layers]
+
+    def forward_population(
+        self,
+        parameters: np.ndarray,
+        observations: np.ndarray,
+    ) -> np.ndarray:
+        # observations of shape (n_policies, n, obs_dim)
+        layers = self._split_parameters(parameters)
+        x = observations
+
+        for weights, biases in layers[:-1]:
+            x = ACTIVATIONS[self.activation](x @ weights + biases)
+
+        weights, biases = layers[-1]
+        return x @ weights + biases
+
+    def get_actions(self, outputs: np.ndarray) -> np.ndarray:
+        if self.actions is not None:
+            return np.argmax(outputs, axis=-1)
+
+        return np.clip(outputs, self.low, self.high)
+
+    def get_angle_thrust(self, outputs: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        # same conversion as the envs
+        actions = self.get_actions(outputs)
+
+        if self.actions is not None:
+            angle_thrusts = self.actions[actions]
+            return angle_thrusts[..., 0], angle_thrusts[..., 1]
+
+        return (
+            np.rint(actions[..., 0] * self.max_rotation_per_turn),
+            np.rint(actions[..., 1] * self.car_max_thrust),
+        )
+
+    def predict(  # pylint: disable=unused-argument
+        self,
+        observation: ObsType,
+        state: Any = None,
+        episode_start: np.ndarray | None = None,
+        deterministic: bool = True,
+    ) -> tuple[ActType, Any]:
+        # same signature as the stable-baselines3 models
+        observation = np.asarray(observation, dtype=np.float64)
+        outputs = self.forward_population(
+            self.get_parameters()[np.newaxis],
+            observation.reshape(1, -1, observation.shape[-1]),
+        )[0]
+        actions = self.get_actions(outputs)
+
+        if observation.ndim == 1:
+            return actions[0], state
+
+        return actions, state
@@ -0,0 +1,479 @@
+import json
+import select
+import selectors
+import socket
+import struct
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+from gymnasium_search_race.policies import MLPPolicy
+from gymnasium_search_race.vector import make_async_vector_env
+from gymnasium_search_race.wrappers import ScalarInfo
+
+# every message is a header with its type and payload size, then the payload
+HEADER = struct.Struct("<BI")
+HELLO, CREDIT, WEIGHTS, BATCH, CLOSE = range(5)
+
+# policy version, number of steps, number of envs, observation size, action
+# size (0 for discrete actions) and number of final observations of a batch,
+# followed by its arrays
+BATCH_HEADER = struct.Struct("<6I")
+UINT32 = struct.Struct("<I")
+
+
+@dataclass
+class RolloutBatch:
+    # transitions of n_envs envs for n_steps steps: the envs reset in the same
+    # step as the end of their episode, so observations[t + 1] is the first
+    # observation of a new episode after terminations[t] or truncations[t]. The
+    # last observations of the episodes, needed to bootstrap the values of the
+    # truncated ones, are final_observations in the order of the steps and envs
+    # of final_observation_mask
+    policy_version: int
+    observations: np.ndarray
+    actions: np.ndarray
+    rewards: np.ndarray
+    terminations: np.ndarray
+    truncations: np.ndarray
+    next_observations: np.ndarray
+    final_observation_mask: np.ndarray
+    final_observations: np.ndarray
+    worker_id: int = -1
+
+    def get_next_observations(self) -> np.ndarray:
+        # observation following each step, before the reset of the envs
+        next_observations = np.concatenate(
+            [self.observations[1:], self.next_observations[np.newaxis]]
+        )
+        next_observations[self.final_observation_mask] = self.final_observations
+        return next_observations
+
+
+def encode_batch(batch: RolloutBatch) -> bytes:
+    n_steps, n_envs, observation_size = batch.observations.shape
+    action_size = 0 if batch.actions.ndim == 2 else batch.actions.shape[-1]
+    return b"".join(
+        [
+            BATCH_HEADER.pack(
+                batch.policy_version,
+                n_steps,
+                n_envs,
+                observation_size,
+                action_size,
+                len(batch.final_observations),
+            ),
+            batch.observations.astype(np.float32).tobytes(),
+            batch.actions.astype(
+                np.int32 if action_size == 0 else np.float32
+            ).tobytes(),
+            batch.rewards.astype(np.float32).tobytes(),
+            batch.terminations.astype(np.bool_).tobytes(),
+            batch.truncations.astype(np.bool_).tobytes(),
+            batch.next_observations.astype(np.float32).tobytes(),
+            batch.final_observation_mask.astype(np.bool_).tobytes(),
+            batch.final_observations.astype(np.float32).tobytes(),
+        ]
+    )
+
+
+def decode_batch(payload: bytes) -> RolloutBatch:
+    (
+        policy_version,
+        n_steps,
+        n_envs,
+        observation_size,
+        action_size,
+        n_final_observations,
+    ) = BATCH_HEADER.unpack_from(payload)
+    offset = BATCH_HEADER.size
+
+    def read_array(dtype: type, shape: tuple[int, ...]) -> np.ndarray:
+        nonlocal offset
+        count = int(np.prod(shape))
+        array = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array.reshape(shape)
+
+    return RolloutBatch(
+        policy_version=policy_version,
+        observations=read_array(np.float32, (n_steps, n_envs, observation_size)),
+        actions=(
+            read_array(np.int32, (n_steps, n_envs))
+            if action_size == 0
+            else read_array(np.float32, (n_steps, n_envs, action_size))
+        ),
+        rewards=read_array(np.float32, (n_steps, n_envs)),
+        terminations=read_array(np.bool_, (n_steps, n_envs)),
+        truncations=read_array(np.bool_, (n_steps, n_envs)),
+        next_observations=read_array(np.float32, (n_envs, observation_size)),
+        final_observation_mask=read_array(np.bool_, (n_steps, n_envs)),
+        final_observations=read_array(
+            np.float32, (n_final_observations, observation_size)
+        ),
+    )
+
+
+def encode_weights(policy_version: int, parameters: np.ndarray) -> bytes:
+    return UINT32.pack(policy_version) + parameters.astype(np.float32).tobytes()
+
+
+def decode_weights(payload: bytes) -> tuple[int, np.ndarray]:
+    (policy_version,) = UINT32.unpack_from(payload)
+    return policy_version, np.frombuffer(
+        payload, dtype=np.float32, offset=UINT32.size
+    ).astype(np.float64)
+
+
+def send_message(sock: socket.socket, message_type: int, payload: bytes = b"") -> None:
+    sock.sendall(HEADER.pack(message_type, len(payload)) + payload)
+
+
+def _receive_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+
+    while received < size:
+        n_bytes = sock.recv_into(view[received:])
+
+        if n_bytes == 0:
+            raise ConnectionError("connection closed by peer")
+
+        received += n_bytes
+
+    return bytes(buffer)
+
+
+def receive_message(sock: socket.socket) -> tuple[int, bytes]:
+    message_type, size = HEADER.unpack(_receive_exactly(sock, HEADER.size))
+    return message_type, _receive_exactly(sock, size)
+
+
+class RolloutServer:
+    # learner side: accepts rollout workers, broadcasts the policy weights and
+    # receives their batches. A worker sends a batch only with a credit and a
+    # credit is given back when its batch is received, so that at most
+    # max_pending batches per worker are waiting for the learner
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        max_pending: int = 2,
+    ) -> None:
+        self.max_pending = max_pending
+        self.server_socket = socket.create_server((host, port))
+        self.server_socket.setblocking(False)
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.server_socket, selectors.EVENT_READ)
+        self.workers = {}
+        self.n_workers = 0
+        self.policy_version = 0
+        self.parameters = None
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self.server_socket.getsockname()[:2]
+
+    def _send_weights(self, sock: socket.socket) -> None:
+        send_message(
+            sock, WEIGHTS, encode_weights(self.policy_version, self.parameters)
+        )
+
+    def broadcast_weights(self, parameters: np.ndarray) -> int:
+        # the workers connected later receive the last weights after their hello
+        parameters = np.asarray(parameters, dtype=np.float64)
+
+        for worker in self.workers.values():
+            if worker["n_parameters"] != parameters.size:
+                raise ValueError(
+                    f"worker {worker['worker_id']} expects"
+                    f" {worker['n_parameters']} parameters, got {parameters.size}"
+                )
+
+        self.policy_version += 1
+        self.parameters = parameters
+
+        for sock in self.workers:
+            self._send_weights(sock)
+
+        return self.policy_version
+
+    def _accept(self) -> None:
+        sock, _address = self.server_socket.accept()
+        sock.setblocking(True)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        message_type, payload = receive_message(sock)
+
+        if message_type != HELLO:
+            sock.close()
+            return
+
+        self.workers[sock] = {"worker_id": self.n_workers, **json.loads(payload)}
+        self.n_workers += 1
+        self.selector.register(sock, selectors.EVENT_READ)
+
+        if self.parameters is not None:
+            self._send_weights(sock)
+
+        send_message(sock, CREDIT, UINT32.pack(self.max_pending))
+
+    def _remove(self, sock: socket.socket) -> None:
+        self.selector.unregister(sock)
+        del self.workers[sock]
+        sock.close()
+
+    def wait_for_workers(self, n_workers: int, timeout: float | None = None) -> None:
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        while len(self.workers) < n_workers:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"{len(self.workers)} of {n_workers} workers")
+
+            # the batches of the connected workers wait in their sockets
+            readable, _writable, _errors = select.select(
+                [self.server_socket], [], [], remaining
+            )
+
+            if readable:
+                self._accept()
+
+    def receive_batch(self, timeout: float | None = None) -> RolloutBatch | None:
+        # next batch of any worker, None on timeout
+        deadline = None if timeout is None else time.perf_counter() + timeout
+
+        while True:
+            remaining = None if deadline is None else deadline - time.perf_counter()
+
+            if remaining is not None and remaining < 0:
+                return None
+
+            for key, _events in self.selector.select(timeout=remaining):
+                if key.fileobj is self.server_socket:
+                    self._accept()
+                    continue
+
+                sock = key.fileobj
+
+                try:
+                    message_type, payload = receive_message(sock)
+                except ConnectionError:
+                    self._remove(sock)
+                    continue
+
+                if message_type == CLOSE:
+                    self._remove(sock)
+                elif message_type == BATCH:
+                    send_message(sock, CREDIT, UINT32.pack(1))
+                    batch = decode_batch(payload)
+                    batch.worker_id = self.workers[sock]["worker_id"]
+                    return batch
+
+    def close(self) -> None:
+        for sock in list(self.workers):
+            try:
+                send_message(sock, CLOSE)
+            except OSError:
+                pass
+
+            self._remove(sock)
+
+        self.selector.unregister(self.server_socket)
+        self.server_socket.close()
+        self.selector.close()
+
+
+class RolloutWorker:
+    # worker side: hosts vectorized envs and sends a batch of n_steps steps for
+    # each credit, with the actions sampled from a NumPy copy of the policy
+    # (categorical for discrete actions, gaussian noise for continuous ones)
+    # whose weights are broadcast by the server
+    def __init__(
+        self,
+        address: tuple[str, int],
+        env_id: str,
+        num_envs: int = 8,
+        n_steps: int = 128,
+        net_arch: tuple[int, ...] = (64, 64),
+        activation: str = "tanh",
+        action_noise: float = 0.1,
+        asynchronous: bool = False,
+        seed: int | None = None,
+        **env_kwargs,
+    ) -> None:
+        self.address = address
+        self.env_id = env_id
+        self.n_steps = n_steps
+        self.action_noise = action_noise
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+
+        # the infos are not sent: the sub-envs drop them instead of stacking the
+        # checkpoints of maps with different sizes
+        vector_kwargs = {"autoreset_mode": gym.vector.AutoresetMode.SAME_STEP}
+
+        if asynchronous:
+            self.envs = make_async_vector_env(
+                env_id,
+                num_envs=num_envs,
+                info_keys=(),
+                vector_kwargs=vector_kwargs,
+                **env_kwargs,
+            )
+        else:
+            self.envs = gym.make_vec(
+                env_id,
+                num_envs=num_envs,
+                vectorization_mode="sync",
+                vector_kwargs=vector_kwargs,
+                wrappers=[lambda env: ScalarInfo(env, keys=())],
+                **env_kwargs,
+            )
+
+        env = gym.make(env_id, **env_kwargs)
+        self.policy = MLPPolicy.from_env(env, net_arch=net_arch, activation=activation)
+        self.discrete = isinstance(env.action_space, spaces.Discrete)
+        env.close()
+
+        self.parameters = None
+        self.policy_version = 0
+        self.credits = 0
+        self.n_sent_batches = 0
+        self.closed = False
+
+    def _handle_message(self, message_type: int, payload: bytes) -> None:
+        if message_type == WEIGHTS:
+            self.policy_version, self.parameters = decode_weights(payload)
+        elif message_type == CREDIT:
+            self.credits += UINT32.unpack(payload)[0]
+        elif message_type == CLOSE:
+            self.closed = True
+
+    def _sample_actions(self, observations: np.ndarray) -> np.ndarray:
+        outputs = self.policy.forward_population(
+            self.parameters[np.newaxis],
+            observations[np.newaxis].astype(np.float64),
+        )[0]
+
+        if self.discrete:
+            # Gumbel-max sampling of the softmax of the logits
+            return np.argmax(outputs + self.rng.gumbel(size=outputs.shape), axis=-1)
+
+        return np.clip(
+            outputs + self.action_noise * self.rng.normal(size=outputs.shape),
+            self.policy.low,
+            self.policy.high,
+        )
+
+    def collect(self, observations: np.ndarray) -> RolloutBatch:
+        steps = []
+        final_observations = []
+
+        for _ in range(self.n_steps):
+            actions = self._sample_actions(observations)
+            next_observations, rewards, terminations, truncations, info = (
+                self.envs.step(actions)
+            )
+            # the vector env only adds the final observations when an episode ends
+            final_observation_mask = info.get(
+                "_final_obs",
+                np.zeros(self.envs.num_envs, dtype=np.bool_),
+            )
+            if final_observation_mask.any():
+                final_observations.extend(info["final_obs"][final_observation_mask])
+            steps.append(
+                (
+                    observations,
+                    actions,
+                    rewards,
+                    terminations,
+                    truncations,
+                    final_observation_mask,
+                )
+            )
+            observations = next_observations
+
+        (
+            observations,
+            actions,
+            rewards,
+            terminations,
+            truncations,
+            final_observation_mask,
+        ) = (np.stack(arrays) for arrays in zip(*steps))
+        return RolloutBatch(
+            policy_version=self.policy_version,
+            observations=observations,
+            actions=actions,
+            rewards=rewards,
+            terminations=terminations,
+            truncations=truncations,
+            next_observations=next_observations,
+            final_observation_mask=final_observation_mask,
+            final_observations=np.array(
+                final_observations,
+                dtype=observations.dtype,
+            ).reshape(-1, observations.shape[-1]),
+        )
+
+    def run(self) -> int:
+        # sends batches until the server closes the connection, returns the
+        # number of batches sent
+        with socket.create_connection(self.address) as sock:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            send_message(
+                sock,
+                HELLO,
+                json.dumps(
+                    {
+                        "env_id": self.env_id,
+                        "num_envs": self.envs.num_envs,
+                        "n_steps": self.n_steps,
+                        "n_parameters": self.policy.n_parameters,
+                    }
+                ).encode(),
+            )
+            observations, _info = self.envs.reset(seed=self.seed)
+
+            with selectors.DefaultSelector() as selector:
+                selector.register(sock, selectors.EVENT_READ)
+
+                while not self.closed:
+                    # the weights received meanwhile are used for the next batch
+                    ready = self.parameters is not None and self.credits > 0
+
+                    try:
+                        while not self.closed and selector.select(
+                            timeout=0 if ready else None
+                        ):
+                            self._handle_message(*receive_message(sock))
+                            ready = self.parameters is not None and self.credits > 0
+                    except ConnectionError:
+                        break
+
+                    if self.closed or not ready:
+                        continue
+
+                    batch = self.collect(observations)
+                    observations = batch.next_observations
+                    self.credits -= 1
+
+                    try:
+                        send_message(sock, BATCH, encode_batch(batch))
+                    except OSError:
+                        break
+
+                    self.n_sent_batches += 1
+
+        self.envs.close()
+        return self.n_sent_batches
+
+
+def run_worker(address: tuple[str, int], env_id: str, **kwargs: Any) -> int:
+    return RolloutWorker(address=address, env_id=env_id, **kwargs).run()
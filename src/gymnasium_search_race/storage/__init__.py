@@ -0,0 +1,30 @@
+from gymnasium_search_race.storage.best_actions import (
+    BestActionsStore,
+    json_to_store,
+    merge_best_actions,
+    read_best_actions,
+    store_to_json,
+    write_best_actions,
+)
+from gymnasium_search_race.storage.map_pack import MapPack
+from gymnasium_search_race.storage.packed_store import PackedStore
+from gymnasium_search_race.storage.results import ResultsStore, hash_file
+from gymnasium_search_race.storage.trajectories import (
+    TrajectoryDataset,
+    TrajectoryWriter,
+)
+
+__all__ = [
+    "BestActionsStore",
+    "MapPack",
+    "PackedStore",
+    "ResultsStore",
+    "TrajectoryDataset",
+    "TrajectoryWriter",
+    "hash_file",
+    "json_to_store",
+    "merge_best_actions",
+    "read_best_actions",
+    "store_to_json",
+    "write_best_actions",
+]
@@ -0,0 +1,135 @@
+import gzip
+import json
+from pathlib import Path
+
+import numpy as np
+
+from gymnasium_search_race.storage.packed_store import PackedStore
+
+# angle in [-18, 18] and thrust in [0, 200]
+ACTION_DTYPE = np.dtype([("angle", "i1"), ("thrust", "<i2")])
+MAX_ANGLE = 18
+MAX_THRUST = 200
+
+
+class BestActionsStore(PackedStore):
+    record_dtype = ACTION_DTYPE
+
+    def get_actions(self, test_id: int) -> list[list[int]]:
+        actions = self.get(test_id)
+        return np.stack([actions["angle"], actions["thrust"]], axis=1).tolist()
+
+    def put_actions(self, test_id: int, actions: list[list[int]]) -> None:
+        actions = np.asarray(actions, dtype=np.int64).reshape(-1, 2)
+
+        # the values out of the range of the fields would wrap around
+        if not np.all(np.abs(actions[:, 0]) <= MAX_ANGLE):
+            raise ValueError(
+                f"angles of test {test_id} must be in [{-MAX_ANGLE}, {MAX_ANGLE}]"
+            )
+
+        if not np.all((actions[:, 1] >= 0) & (actions[:, 1] <= MAX_THRUST)):
+            raise ValueError(f"thrusts of test {test_id} must be in [0, {MAX_THRUST}]")
+
+        records = np.empty(len(actions), dtype=self.record_dtype)
+        records["angle"] = actions[:, 0]
+        records["thrust"] = actions[:, 1]
+        self.put(test_id, records)
+
+    def to_dict(self) -> dict[str, list[list[int]]]:
+        return {str(test_id): self.get_actions(test_id) for test_id in self}
+
+    def update(self, actions: dict[str, list[list[int]]]) -> None:
+        for test_id, test_actions in actions.items():
+            self.put_actions(int(test_id), test_actions)
+
+
+def json_to_store(json_path: str | Path, store_path: str | Path) -> BestActionsStore:
+    with gzip.open(json_path, "rt", encoding="utf-8") as json_file:
+        actions = json.load(json_file)
+
+    store = BestActionsStore(store_path)
+    store.update(actions)
+    store.compact()
+
+    return store
+
+
+def store_to_json(store_path: str | Path, json_path: str | Path) -> None:
+    actions = BestActionsStore(store_path).to_dict()
+
+    with gzip.open(json_path, "wt", encoding="utf-8") as json_file:
+        json.dump(actions, json_file)
+
+
+def is_json_path(path: str | Path) -> bool:
+    return str(path).endswith(".json.gz")
+
+
+def read_best_actions(path: str | Path) -> dict[str, list[list[int]]]:
+    if not is_json_path(path):
+        return BestActionsStore(path).to_dict()
+
+    with gzip.open(path, "rt", encoding="utf-8") as json_file:
+        actions = json.load(json_file)
+    return actions
+
+
+def write_best_actions(
+    path: str | Path,
+    actions: dict[str, list[list[int]]],
+) -> None:
+    if not is_json_path(path):
+        # only the maps with new actions are appended to the binary store
+        store = BestActionsStore(path)
+        for test_id, test_actions in actions.items():
+            if test_id not in store or store.get_actions(test_id) != test_actions:
+                store.put_actions(test_id, test_actions)
+        return
+
+    with gzip.open(path, "wt", encoding="utf-8") as json_file:
+        json.dump(actions, json_file)
+
+
+def merge_best_actions(
+    actions_1: dict[str, list[list[int]]],
+    actions_2: dict[str, list[list[int]]],
+    lower_bounds: dict[str, int] | None = None,
+) -> dict[str, list[list[int]]]:
+    # the shortest actions of each test id, the test ids of only one of the
+    # dicts are kept. With lower bounds on the episode lengths, the gap of each
+    # merged solution to its bound is reported
+    merged_actions = {}
+    total_length = 0
+    total_gap = 0
+
+    print("Merging best actions")
+
+    for test_id in {**actions_1, **actions_2}:
+        if test_id not in actions_2:
+            merged_actions[test_id] = actions_1[test_id]
+        elif test_id not in actions_1:
+            merged_actions[test_id] = actions_2[test_id]
+        else:
+            length_1 = len(actions_1[test_id])
+            length_2 = len(actions_2[test_id])
+            print(f"Test {test_id}: {length_1} - {length_2}")
+
+            if length_1 < length_2:
+                merged_actions[test_id] = actions_1[test_id]
+            else:
+                merged_actions[test_id] = actions_2[test_id]
+
+        total_length += len(merged_actions[test_id])
+
+        if lower_bounds is not None and test_id in lower_bounds:
+            gap = len(merged_actions[test_id]) - lower_bounds[test_id]
+            total_gap += gap
+            print(f"Test {test_id}: gap to lower bound {gap}")
+
+    print("Total after merge:", total_length)
+
+    if lower_bounds is not None:
+        print("Total gap to lower bounds:", total_gap)
+
+    return merged_actions
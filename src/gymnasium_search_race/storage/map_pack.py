@@ -0,0 +1,32 @@
+from collections.abc import Iterable
+
+import numpy as np
+
+from gymnasium_search_race.storage.packed_store import PackedStore
+
+# checkpoint coordinates fit in int16 on the 16000x9000 board
+POINT_DTYPE = np.dtype([("x", "<i2"), ("y", "<i2")])
+
+
+class MapPack(PackedStore):
+    record_dtype = POINT_DTYPE
+
+    @staticmethod
+    def _to_records(checkpoints: np.ndarray) -> np.ndarray:
+        checkpoints = np.asarray(checkpoints, dtype=np.int64).reshape(-1, 2)
+        records = np.empty(len(checkpoints), dtype=POINT_DTYPE)
+        records["x"] = checkpoints[:, 0]
+        records["y"] = checkpoints[:, 1]
+        return records
+
+    def get_checkpoints(self, index: int) -> np.ndarray:
+        records = self.get(index)
+        return np.stack([records["x"], records["y"]], axis=1).astype(np.float64)
+
+    def put_checkpoints(self, index: int, checkpoints: np.ndarray) -> None:
+        self.put(index, self._to_records(checkpoints))
+
+    def update(self, maps: Iterable[tuple[int, np.ndarray]]) -> None:
+        self.put_many(
+            (index, self._to_records(checkpoints)) for index, checkpoints in maps
+        )
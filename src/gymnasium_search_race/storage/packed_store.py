@@ -0,0 +1,93 @@
+import os
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+
+import numpy as np
+
+INDEX_DTYPE = np.dtype([("key", "<i8"), ("offset", "<i8"), ("length", "<i8")])
+
+
+class PackedStore:
+    # records of each key are stored contiguously in a raw binary data file and
+    # located with an offset index, so one key is read without parsing the others
+    record_dtype = np.dtype("<i8")
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.index_path = self.path.with_suffix(".idx")
+        self.index = {}
+
+        if self.index_path.exists():
+            for key, offset, length in np.load(self.index_path).tolist():
+                self.index[key] = (offset, length)
+
+    def __contains__(self, key: int) -> bool:
+        return int(key) in self.index
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(sorted(self.index))
+
+    def keys(self) -> list[int]:
+        return sorted(self.index)
+
+    def get(self, key: int) -> np.ndarray:
+        offset, length = self.index[int(key)]
+        return np.fromfile(
+            self.path,
+            dtype=self.record_dtype,
+            count=length,
+            offset=offset * self.record_dtype.itemsize,
+        )
+
+    def put(self, key: int, records: np.ndarray) -> None:
+        records = np.ascontiguousarray(records, dtype=self.record_dtype)
+
+        # append only: replaced records stay in the data file until compact is called
+        with open(self.path, "ab") as data_file:
+            offset = data_file.tell() // self.record_dtype.itemsize
+            records.tofile(data_file)
+
+        self.index[int(key)] = (offset, len(records))
+        self._write_index()
+
+    def put_many(self, items: Iterable[tuple[int, np.ndarray]]) -> None:
+        # the index is written once for all the keys
+        with open(self.path, "ab") as data_file:
+            offset = data_file.tell() // self.record_dtype.itemsize
+
+            for key, records in items:
+                records = np.ascontiguousarray(records, dtype=self.record_dtype)
+                records.tofile(data_file)
+                self.index[int(key)] = (offset, len(records))
+                offset += len(records)
+
+        self._write_index()
+
+    def compact(self) -> None:
+        records = {key: self.get(key) for key in self.index}
+        tmp_path = self.path.with_suffix(".tmp")
+        index = {}
+        offset = 0
+
+        with open(tmp_path, "wb") as data_file:
+            for key, key_records in records.items():
+                key_records.tofile(data_file)
+                index[key] = (offset, len(key_records))
+                offset += len(key_records)
+
+        os.replace(tmp_path, self.path)
+        self.index = index
+        self._write_index()
+
+    def _write_index(self) -> None:
+        index = np.array(
+            [(key, *self.index[key]) for key in sorted(self.index)],
+            dtype=INDEX_DTYPE,
+        )
+        # np.save adds the .npy suffix to paths without it
+        tmp_path = self.index_path.with_suffix(".idx.tmp.npy")
+        np.save(tmp_path, index)
+        os.replace(tmp_path, self.index_path)
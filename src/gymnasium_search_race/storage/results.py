@@ -0,0 +1,211 @@
+import csv
+import hashlib
+import os
+import sqlite3
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    run_id TEXT NOT NULL,
+    env_id TEXT NOT NULL,
+    model_hash TEXT NOT NULL,
+    test_id INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    return REAL,
+    duration REAL,
+    date TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_env_test_length
+    ON results (env_id, test_id, length);
+CREATE INDEX IF NOT EXISTS results_run ON results (run_id);
+"""
+INSERT_RESULT = "INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?)"
+SELECT_ANY_RESULT = "SELECT 1 FROM results LIMIT 1"
+
+
+def hash_file(path: str | Path) -> str:
+    sha256 = hashlib.sha256()
+
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 16), b""):
+            sha256.update(chunk)
+
+    return sha256.hexdigest()
+
+
+class ResultsStore:
+    def __init__(self, path: str | Path, timeout: float = 60.0) -> None:
+        self.path = Path(path)
+        self.timeout = timeout
+
+        connection = self._connect()
+        try:
+            connection.executescript(SCHEMA)
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        # one connection per call so the store can be shared by worker processes
+        connection = sqlite3.connect(self.path, timeout=self.timeout)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    @staticmethod
+    def _get_run_rows(
+        run_id: str,
+        env_id: str,
+        episode_lengths: dict[int, int],
+        episode_returns: dict[int, float] | None = None,
+        episode_durations: dict[int, float] | None = None,
+        model_hash: str = "",
+        date: str | None = None,
+    ) -> list[tuple]:
+        date = date or datetime.now().isoformat(timespec="seconds")
+        episode_returns = episode_returns or {}
+        episode_durations = episode_durations or {}
+        return [
+            (
+                run_id,
+                env_id,
+                model_hash,
+                int(test_id),
+                int(length),
+                episode_returns.get(test_id),
+                episode_durations.get(test_id),
+                date,
+            )
+            for test_id, length in episode_lengths.items()
+        ]
+
+    def add_run(
+        self,
+        env_id: str,
+        episode_lengths: dict[int, int],
+        episode_returns: dict[int, float] | None = None,
+        episode_durations: dict[int, float] | None = None,
+        model_hash: str = "",
+        date: str | None = None,
+    ) -> str:
+        run_id = uuid.uuid4().hex
+        rows = self._get_run_rows(
+            run_id=run_id,
+            env_id=env_id,
+            episode_lengths=episode_lengths,
+            episode_returns=episode_returns,
+            episode_durations=episode_durations,
+            model_hash=model_hash,
+            date=date,
+        )
+
+        connection = self._connect()
+        try:
+            # all the rows of a run are inserted in one transaction
+            with connection:
+                connection.executemany(INSERT_RESULT, rows)
+        finally:
+            connection.close()
+
+        return run_id
+
+    def _query(self, sql: str, parameters: tuple = ()) -> list[tuple]:
+        connection = self._connect()
+        try:
+            return connection.execute(sql, parameters).fetchall()
+        finally:
+            connection.close()
+
+    def is_empty(self) -> bool:
+        return not self._query(SELECT_ANY_RESULT)
+
+    def best_lengths(self, env_id: str | None = None) -> dict[int, int]:
+        rows = self._query(
+            "SELECT test_id, MIN(length) FROM results"
+            " WHERE ?1 IS NULL OR env_id = ?1 GROUP BY test_id ORDER BY test_id",
+            (env_id,),
+        )
+        return dict(rows)
+
+    def run_lengths(self, run_id: str) -> dict[int, int]:
+        rows = self._query(
+            "SELECT test_id, length FROM results WHERE run_id = ? ORDER BY test_id",
+            (run_id,),
+        )
+        return dict(rows)
+
+    def runs(self, env_id: str | None = None) -> list[dict]:
+        rows = self._query(
+            "SELECT run_id, env_id, date, test_id, length FROM results"
+            " WHERE ?1 IS NULL OR env_id = ?1 ORDER BY rowid",
+            (env_id,),
+        )
+        runs = {}
+
+        for run_id, run_env_id, date, test_id, length in rows:
+            run = runs.setdefault(
+                run_id,
+                {"env": run_env_id, "date": date, "lengths": {}},
+            )
+            run["lengths"][test_id] = length
+
+        return list(runs.values())
+
+    def import_csv(self, path: str | Path, if_empty: bool = False) -> bool:
+        with open(path, "r", encoding="utf-8") as csv_file:
+            rows = [
+                result
+                for row in csv.DictReader(csv_file)
+                for result in self._get_run_rows(
+                    run_id=uuid.uuid4().hex,
+                    env_id=row.pop("env"),
+                    date=row.pop("date"),
+                    episode_lengths={
+                        int(test_id): int(length)
+                        for test_id, length in row.items()
+                        if test_id != "total" and length
+                    },
+                )
+            ]
+
+        connection = self._connect()
+        try:
+            # the emptiness check and the import are done in one write
+            # transaction: processes opening an empty store at the same time
+            # import the file once
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+
+                if if_empty and connection.execute(SELECT_ANY_RESULT).fetchone():
+                    return False
+
+                connection.executemany(INSERT_RESULT, rows)
+        finally:
+            connection.close()
+
+        return True
+
+    def export_csv(self, path: str | Path, env_id: str | None = None) -> None:
+        runs = self.runs(env_id=env_id)
+        test_ids = sorted({test_id for run in runs for test_id in run["lengths"]})
+        tmp_path = Path(path).with_suffix(f".{os.getpid()}.tmp")
+
+        with open(tmp_path, "w", encoding="utf-8", newline="") as csv_file:
+            writer = csv.DictWriter(
+                csv_file,
+                fieldnames=["env", "date", "total", *test_ids],
+                lineterminator="\n",
+            )
+            writer.writeheader()
+
+            for run in runs:
+                writer.writerow(
+                    {
+                        "env": run["env"],
+                        "date": run["date"],
+                        "total": sum(run["lengths"].values()),
+                        **run["lengths"],
+                    }
+                )
+
+        os.replace(tmp_path, path)
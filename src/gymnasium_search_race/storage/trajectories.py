@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import numpy as np
+
+MANIFEST_FILENAME = "manifest.json"
+
+
+def get_trajectory_fields(
+    observation_shape: tuple[int, ...],
+    observation_dtype: np.dtype,
+    action_shape: tuple[int, ...],
+    action_dtype: np.dtype,
+) -> dict[str, tuple[tuple[int, ...], np.dtype]]:
+    return {
+        "obs": (observation_shape, np.dtype(observation_dtype)),
+        "action": (action_shape, np.dtype(action_dtype)),
+        "reward": ((), np.dtype(np.float32)),
+        "terminated": ((), np.dtype(np.bool_)),
+        "truncated": ((), np.dtype(np.bool_)),
+        "test_id": ((), np.dtype(np.int32)),
+    }
+
+
+class TrajectoryWriter:
+    # transitions are written in place in memory-mapped .npy files of shard_size
+    # rows, so neither the shards nor the episodes are held in memory
+    def __init__(
+        self,
+        path: str | Path,
+        observation_shape: tuple[int, ...],
+        observation_dtype: np.dtype,
+        action_shape: tuple[int, ...],
+        action_dtype: np.dtype,
+        shard_size: int = 100_000,
+    ) -> None:
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.fields = get_trajectory_fields(
+            observation_shape=observation_shape,
+            observation_dtype=observation_dtype,
+            action_shape=action_shape,
+            action_dtype=action_dtype,
+        )
+        self.shard_size = shard_size
+        self.shards = []
+        self.shard = None
+        self.shard_length = 0
+
+    def _open_shard(self) -> None:
+        shard_path = self.path / f"shard_{len(self.shards):05}"
+        shard_path.mkdir(exist_ok=True)
+        self.shard = {
+            name: np.lib.format.open_memmap(
+                shard_path / f"{name}.npy",
+                mode="w+",
+                dtype=dtype,
+                shape=(self.shard_size, *shape),
+            )
+            for name, (shape, dtype) in self.fields.items()
+        }
+        self.shard_length = 0
+
+    def _close_shard(self) -> None:
+        for array in self.shard.values():
+            array.flush()
+
+        self.shards.append(
+            {"name": f"shard_{len(self.shards):05}", "length": self.shard_length}
+        )
+        self.shard = None
+        self._write_manifest()
+
+    def _write_manifest(self) -> None:
+        manifest = {
+            "shard_size": self.shard_size,
+            "fields": {
+                name: {"shape": list(shape), "dtype": dtype.str}
+                for name, (shape, dtype) in self.fields.items()
+            },
+            "shards": self.shards,
+        }
+        tmp_path = self.path / f"{MANIFEST_FILENAME}.tmp"
+        tmp_path.write_text(json.dumps(manifest, indent=2), encoding="UTF-8")
+        os.replace(tmp_path, self.path / MANIFEST_FILENAME)
+
+    def add(
+        self,
+        obs: np.ndarray,
+        action: np.ndarray | int,
+        reward: float,
+        terminated: bool,
+        truncated: bool,
+        test_id: int,
+    ) -> None:
+        if self.shard is None:
+            self._open_shard()
+
+        i = self.shard_length
+        self.shard["obs"][i] = obs
+        self.shard["action"][i] = action
+        self.shard["reward"][i] = reward
+        self.shard["terminated"][i] = terminated
+        self.shard["truncated"][i] = truncated
+        self.shard["test_id"][i] = test_id
+        self.shard_length += 1
+
+        if self.shard_length == self.shard_size:
+            self._close_shard()
+
+    def close(self) -> None:
+        if self.shard is not None and self.shard_length > 0:
+            self._close_shard()
+        else:
+            self._write_manifest()
+
+    def __enter__(self) -> TrajectoryWriter:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+class TrajectoryDataset:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.manifest = json.loads(
+            (self.path / MANIFEST_FILENAME).read_text(encoding="UTF-8")
+        )
+
+    def __len__(self) -> int:
+        return sum(shard["length"] for shard in self.manifest["shards"])
+
+    def iter_shards(self) -> Iterator[dict[str, np.ndarray]]:
+        for shard in self.manifest["shards"]:
+            yield {
+                name: np.load(
+                    self.path / shard["name"] / f"{name}.npy",
+                    mmap_mode="r",
+                )[: shard["length"]]
+                for name in self.manifest["fields"]
+            }
+
+    def iter_minibatches(
+        self,
+        batch_size: int,
+        shuffle: bool = False,
+        seed: int | None = None,
+    ) -> Iterator[dict[str, np.ndarray]]:
+        # minibatches are contiguous slices of the memory-mapped shards (no copy),
+        # shuffling permutes the order of the shards and of the minibatches
+        rng = np.random.default_rng(seed)
+        shards = list(self.iter_shards())
+
+        if shuffle:
+            rng.shuffle(shards)
+
+        for shard in shards:
+            length = len(shard["reward"])
+            starts = np.arange(0, length, batch_size)
+
+            if shuffle:
+                rng.shuffle(starts)
+
+            for start in starts:
+                yield {
+                    name: array[start : start + batch_size]
+                    for name, array in shard.items()
+                }
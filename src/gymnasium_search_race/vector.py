@@ -0,0 +1,63 @@
+import multiprocessing
+from collections.abc import Callable, Iterable
+from typing import Any
+
+import gymnasium as gym
+from gymnasium.vector import AsyncVectorEnv
+
+from gymnasium_search_race.wrappers import ScalarInfo, ValidateVectorActions
+
+
+def _get_default_context() -> str | None:
+    # forked workers share the maps and the opponent weights loaded by the parent
+    return "fork" if "fork" in multiprocessing.get_all_start_methods() else None
+
+
+def _make_env(
+    env_id: str,
+    info_keys: Iterable[str] | None,
+    env_kwargs: dict[str, Any],
+) -> Callable[[], gym.Env]:
+    def _init() -> gym.Env:
+        return ScalarInfo(gym.make(env_id, **env_kwargs), keys=info_keys)
+
+    return _init
+
+
+def warm_up_env(env_id: str, **env_kwargs) -> None:
+    # loads the maps and the opponent model and compiles the physics kernels in
+    # the current process
+    env = gym.make(env_id, **env_kwargs)
+    env.reset(seed=0)
+    env.step(env.action_space.sample())
+    env.close()
+
+
+def make_async_vector_env(
+    env_id: str,
+    num_envs: int,
+    info_keys: Iterable[str] | None = None,
+    context: str | None = None,
+    validate_actions: bool = True,
+    vector_kwargs: dict[str, Any] | None = None,
+    **env_kwargs,
+) -> gym.vector.VectorEnv:
+    context = context or _get_default_context()
+    warm_up_env(env_id, **env_kwargs)
+
+    envs = AsyncVectorEnv(
+        [
+            _make_env(
+                env_id=env_id,
+                info_keys=info_keys,
+                env_kwargs={**env_kwargs, "validate_actions": False},
+            )
+            for _ in range(num_envs)
+        ],
+        shared_memory=True,
+        context=context,
+        **(vector_kwargs or {}),
+    )
+
+    # the sub-envs trust the actions validated by batch
+    return ValidateVectorActions(envs) if validate_actions else envs
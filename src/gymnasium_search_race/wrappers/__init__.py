@@ -1,7 +1,23 @@
+from gymnasium_search_race.wrappers.prioritized_maps import PrioritizedMaps
 from gymnasium_search_race.wrappers.record_best_episode_statistics import (
     RecordBestEpisodeStatistics,
 )
+from gymnasium_search_race.wrappers.record_physics_events import RecordPhysicsEvents
+from gymnasium_search_race.wrappers.record_top_episodes import RecordTopEpisodes
+from gymnasium_search_race.wrappers.record_trajectories import RecordTrajectories
+from gymnasium_search_race.wrappers.sample_opponent import SampleOpponent
+from gymnasium_search_race.wrappers.scalar_info import ScalarInfo
+from gymnasium_search_race.wrappers.validate_vector_actions import (
+    ValidateVectorActions,
+)
 
 __all__ = [
+    "PrioritizedMaps",
     "RecordBestEpisodeStatistics",
+    "RecordPhysicsEvents",
+    "RecordTopEpisodes",
+    "RecordTrajectories",
+    "SampleOpponent",
+    "ScalarInfo",
+    "ValidateVectorActions",
 ]
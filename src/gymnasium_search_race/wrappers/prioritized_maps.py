@@ -0,0 +1,92 @@
+from typing import Any, SupportsFloat
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import Env
+from gymnasium.core import ActType, ObsType, WrapperActType, WrapperObsType
+
+from gymnasium_search_race.envs.map_sampler import PrioritizedMapSampler
+
+
+class PrioritizedMaps(gym.Wrapper[ObsType, ActType, ObsType, ActType]):
+    def __init__(
+        self,
+        env: Env[ObsType, ActType],
+        sampler: PrioritizedMapSampler | None = None,
+        n_maps: int | None = None,
+    ) -> None:
+        super().__init__(env)
+
+        self.procedural_maps = self.get_wrapper_attr("procedural_maps")
+
+        if sampler is None:
+            if n_maps is None and self.procedural_maps:
+                raise ValueError("n_maps is required with procedural maps")
+
+            sampler = PrioritizedMapSampler(
+                n_maps=n_maps or len(self.get_wrapper_attr("test_ids")),
+                max_episode_steps=(
+                    env.spec.max_episode_steps
+                    if env.spec is not None and env.spec.max_episode_steps
+                    else 600
+                ),
+            )
+
+        self.sampler = sampler
+        self.rng = np.random.default_rng()
+        self.map_index = -1
+        self.episode_length = 0
+
+    def step(
+        self,
+        action: WrapperActType,
+    ) -> tuple[WrapperObsType, SupportsFloat, bool, bool, dict[str, Any]]:
+        obs, reward, terminated, truncated, info = super().step(action)
+
+        self.episode_length += 1
+
+        # the agent fails when the episode is truncated before the last checkpoint
+        if (terminated or truncated) and self.map_index >= 0:
+            self.sampler.update(
+                index=self.map_index,
+                episode_length=self.episode_length,
+                failure=not terminated,
+            )
+
+        return obs, reward, terminated, truncated, info
+
+    def reset(
+        self,
+        *,
+        seed: int | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[WrapperObsType, dict[str, Any]]:
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+
+        options = options or {}
+        test_ids = self.get_wrapper_attr("test_ids")
+        self.episode_length = 0
+
+        # the maps chosen by the caller are recorded against their own index, and
+        # the test maps played instead of procedural ones are not recorded
+        if "test_id" in options:
+            self.map_index = (
+                -1 if self.procedural_maps else test_ids.index(options["test_id"])
+            )
+        elif "map_index" in options:
+            self.map_index = options["map_index"]
+        else:
+            self.map_index = self.sampler.sample(self.rng)
+
+        if self.map_index >= self.sampler.n_maps:
+            self.map_index = -1
+
+        if self.map_index < 0:
+            map_options = {}
+        elif self.procedural_maps:
+            map_options = {"map_index": self.map_index}
+        else:
+            map_options = {"test_id": test_ids[self.map_index]}
+
+        return super().reset(seed=seed, options={**map_options, **options})
@@ -0,0 +1,69 @@
+import time
+from collections import deque
+from typing import Any, SupportsFloat
+
+import gymnasium as gym
+from gymnasium import Env
+from gymnasium.core import ActType, ObsType, WrapperActType, WrapperObsType
+
+from gymnasium_search_race.envs.search_race import PHYSICS_EVENTS
+
+
+class RecordPhysicsEvents(gym.Wrapper[ObsType, ActType, ObsType, ActType]):
+    def __init__(self, env: Env[ObsType, ActType], buffer_length: int = 100) -> None:
+        super().__init__(env)
+
+        # physics events are only added to info when requested
+        self.env.unwrapped.record_physics_events = True
+
+        self.episode_events = dict.fromkeys(PHYSICS_EVENTS, 0)
+        self.episode_max_sub_steps = 0
+        self.episode_step_time = 0.0
+        self.episode_max_step_time = 0.0
+        self.events_queue = deque(maxlen=buffer_length)
+
+    def step(
+        self,
+        action: WrapperActType,
+    ) -> tuple[WrapperObsType, SupportsFloat, bool, bool, dict[str, Any]]:
+        start_time = time.perf_counter()
+        obs, reward, terminated, truncated, info = super().step(action)
+        step_time = time.perf_counter() - start_time
+
+        step_events = info["physics_events"]
+        for name in PHYSICS_EVENTS:
+            self.episode_events[name] += step_events[name]
+
+        self.episode_max_sub_steps = max(
+            self.episode_max_sub_steps,
+            step_events["sub_steps"],
+        )
+        self.episode_step_time += step_time
+        self.episode_max_step_time = max(self.episode_max_step_time, step_time)
+
+        if terminated or truncated:
+            episode_events = {
+                **self.episode_events,
+                "max_sub_steps": self.episode_max_sub_steps,
+                "t": self.episode_step_time,
+                "max_t": self.episode_max_step_time,
+            }
+            info["episode_physics_events"] = episode_events
+            self.events_queue.append(episode_events)
+
+        return obs, reward, terminated, truncated, info
+
+    def reset(
+        self,
+        *,
+        seed: int | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[WrapperObsType, dict[str, Any]]:
+        obs, info = super().reset(seed=seed, options=options)
+
+        self.episode_events = dict.fromkeys(PHYSICS_EVENTS, 0)
+        self.episode_max_sub_steps = 0
+        self.episode_step_time = 0.0
+        self.episode_max_step_time = 0.0
+
+        return obs, info
@@ -0,0 +1,156 @@
+import heapq
+import itertools
+from typing import Any, SupportsFloat
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import Env, spaces
+from gymnasium.core import ActType, ObsType, WrapperActType, WrapperObsType
+
+from gymnasium_search_race.storage import BestActionsStore
+
+
+class RecordTopEpisodes(gym.Wrapper[ObsType, ActType, ObsType, ActType]):
+    def __init__(
+        self,
+        env: Env[ObsType, ActType],
+        k: int = 5,
+        max_episode_steps: int | None = None,
+    ) -> None:
+        super().__init__(env)
+
+        if max_episode_steps is None and env.spec is not None:
+            max_episode_steps = env.spec.max_episode_steps
+
+        if max_episode_steps is None:
+            raise ValueError("max_episode_steps is required to allocate the buffers")
+
+        self.k = k
+        self.max_episode_steps = max_episode_steps
+
+        action_shape = env.action_space.shape
+        action_dtype = env.action_space.dtype
+        self.episode_actions = np.zeros(
+            (max_episode_steps, *action_shape),
+            dtype=action_dtype,
+        )
+        self.episode_returns = 0.0
+        self.episode_lengths = 0
+
+        # the k best episodes are copied in preallocated slots
+        self.top_actions = np.zeros(
+            (k, max_episode_steps, *action_shape),
+            dtype=action_dtype,
+        )
+        self.top_returns = np.full(k, -np.inf)
+        self.top_lengths = np.zeros(k, dtype=np.int64)
+        self.top_terminated = np.zeros(k, dtype=np.bool_)
+
+        # min-heap of (return, -length, counter, slot): the root is the worst episode
+        self.heap = []
+        self.counter = itertools.count()
+
+    def step(
+        self,
+        action: WrapperActType,
+    ) -> tuple[WrapperObsType, SupportsFloat, bool, bool, dict[str, Any]]:
+        if self.episode_lengths >= self.max_episode_steps:
+            raise RuntimeError(
+                f"episode is longer than max_episode_steps={self.max_episode_steps}"
+            )
+
+        obs, reward, terminated, truncated, info = super().step(action)
+
+        self.episode_actions[self.episode_lengths] = action
+        self.episode_returns += reward
+        self.episode_lengths += 1
+
+        if terminated or truncated:
+            self._push_episode(terminated=terminated)
+
+        return obs, reward, terminated, truncated, info
+
+    def _push_episode(self, terminated: bool) -> None:
+        key = (self.episode_returns, -self.episode_lengths)
+
+        if len(self.heap) < self.k:
+            slot = len(self.heap)
+        elif key > self.heap[0][:2]:
+            slot = self.heap[0][3]
+        else:
+            return
+
+        self.top_actions[slot, : self.episode_lengths] = self.episode_actions[
+            : self.episode_lengths
+        ]
+        self.top_returns[slot] = self.episode_returns
+        self.top_lengths[slot] = self.episode_lengths
+        self.top_terminated[slot] = terminated
+
+        item = (*key, next(self.counter), slot)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, item)
+        else:
+            heapq.heapreplace(self.heap, item)
+
+    def top_episodes(self) -> list[tuple[float, int, np.ndarray]]:
+        return [
+            (
+                float(self.top_returns[slot]),
+                int(self.top_lengths[slot]),
+                self.top_actions[slot, : self.top_lengths[slot]],
+            )
+            for *_, slot in sorted(self.heap, reverse=True)
+        ]
+
+    def to_angle_thrust(self, actions: np.ndarray) -> np.ndarray:
+        if isinstance(self.action_space, spaces.Discrete):
+            return np.asarray(self.get_wrapper_attr("actions"), dtype=np.int64)[actions]
+
+        return np.rint(
+            actions
+            * [
+                self.get_wrapper_attr("max_rotation_per_turn"),
+                self.get_wrapper_attr("car_max_thrust"),
+            ]
+        ).astype(np.int64)
+
+    def flush(self, store: BestActionsStore, test_id: int | None = None) -> bool:
+        # the truncated episodes did not pass the last checkpoint
+        slots = [
+            slot
+            for *_, slot in sorted(self.heap, reverse=True)
+            if self.top_terminated[slot]
+        ]
+        if not slots:
+            return False
+
+        if test_id is None:
+            test_id = self.get_wrapper_attr("test_id")
+
+        if test_id is None:
+            raise ValueError("test_id is required when the env samples the maps")
+
+        length = int(self.top_lengths[slots[0]])
+        actions = self.top_actions[slots[0], :length]
+
+        # keep the stored actions if they are shorter
+        if test_id in store and len(store.get(test_id)) <= length:
+            return False
+
+        store.put_actions(test_id, self.to_angle_thrust(actions))
+
+        return True
+
+    def reset(
+        self,
+        *,
+        seed: int | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[WrapperObsType, dict[str, Any]]:
+        obs, info = super().reset(seed=seed, options=options)
+
+        self.episode_returns = 0.0
+        self.episode_lengths = 0
+
+        return obs, info
@@ -0,0 +1,55 @@
+from typing import Any, SupportsFloat
+
+import gymnasium as gym
+from gymnasium import Env
+from gymnasium.core import ActType, ObsType, WrapperActType, WrapperObsType
+
+from gymnasium_search_race.storage import TrajectoryWriter
+
+
+class RecordTrajectories(gym.Wrapper[ObsType, ActType, ObsType, ActType]):
+    def __init__(self, env: Env[ObsType, ActType], writer: TrajectoryWriter) -> None:
+        super().__init__(env)
+
+        self.writer = writer
+        self.observation = None
+
+    def _get_test_id(self) -> int:
+        # procedural maps are recorded with test_id -1
+        test_index = self.get_wrapper_attr("test_index")
+        return self.get_wrapper_attr("test_ids")[test_index] if test_index >= 0 else -1
+
+    def step(
+        self,
+        action: WrapperActType,
+    ) -> tuple[WrapperObsType, SupportsFloat, bool, bool, dict[str, Any]]:
+        obs, reward, terminated, truncated, info = super().step(action)
+
+        # the observation from which the action was taken is recorded
+        self.writer.add(
+            obs=self.observation,
+            action=action,
+            reward=reward,
+            terminated=terminated,
+            truncated=truncated,
+            test_id=self._get_test_id(),
+        )
+        self.observation = obs
+
+        return obs, reward, terminated, truncated, info
+
+    def reset(
+        self,
+        *,
+        seed: int | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[WrapperObsType, dict[str, Any]]:
+        obs, info = super().reset(seed=seed, options=options)
+
+        self.observation = obs
+
+        return obs, info
+
+    def close(self) -> None:
+        self.writer.close()
+        super().close()
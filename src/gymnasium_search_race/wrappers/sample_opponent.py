@@ -0,0 +1,35 @@
+from typing import Any
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import Env
+from gymnasium.core import ActType, ObsType, WrapperObsType
+
+from gymnasium_search_race.envs.opponents import OpponentPool
+
+
+class SampleOpponent(gym.Wrapper[ObsType, ActType, ObsType, ActType]):
+    def __init__(self, env: Env[ObsType, ActType], pool: OpponentPool) -> None:
+        super().__init__(env)
+
+        self.pool = pool
+        self.rng = np.random.default_rng()
+        self.opponent_name = None
+
+    def reset(
+        self,
+        *,
+        seed: int | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[WrapperObsType, dict[str, Any]]:
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+
+        # the opponent is set before the reset which creates the opponent car
+        self.opponent_name, opponent_model = self.pool.sample(
+            self.rng,
+            role=self.env.unwrapped.opponent_role,
+        )
+        self.env.unwrapped.opponent_model = opponent_model
+
+        return super().reset(seed=seed, options=options)
@@ -0,0 +1,51 @@
+from collections.abc import Iterable
+from typing import Any, SupportsFloat
+
+import gymnasium as gym
+import numpy as np
+from gymnasium import Env
+from gymnasium.core import ActType, ObsType, WrapperActType, WrapperObsType
+
+SCALAR_TYPES = (bool, int, float, np.bool_, np.number)
+
+
+def is_scalar_info(value: Any) -> bool:
+    if isinstance(value, dict):
+        return all(is_scalar_info(v) for v in value.values())
+
+    return isinstance(value, SCALAR_TYPES)
+
+
+class ScalarInfo(gym.Wrapper[ObsType, ActType, ObsType, ActType]):
+    # vector envs stack the info values in arrays: the values that are not
+    # scalars (e.g. the checkpoints) would be pickled as objects every step
+    def __init__(
+        self,
+        env: Env[ObsType, ActType],
+        keys: Iterable[str] | None = None,
+    ) -> None:
+        super().__init__(env)
+
+        self.keys = None if keys is None else set(keys)
+
+    def _filter_info(self, info: dict[str, Any]) -> dict[str, Any]:
+        if self.keys is not None:
+            return {key: value for key, value in info.items() if key in self.keys}
+
+        return {key: value for key, value in info.items() if is_scalar_info(value)}
+
+    def step(
+        self,
+        action: WrapperActType,
+    ) -> tuple[WrapperObsType, SupportsFloat, bool, bool, dict[str, Any]]:
+        obs, reward, terminated, truncated, info = super().step(action)
+        return obs, reward, terminated, truncated, self._filter_info(info)
+
+    def reset(
+        self,
+        *,
+        seed: int | None = None,
+        options: dict[str, Any] | None = None,
+    ) -> tuple[WrapperObsType, dict[str, Any]]:
+        obs, info = super().reset(seed=seed, options=options)
+        return obs, self._filter_info(info)
@@ -0,0 +1,40 @@
+from typing import Any
+
+import numpy as np
+from gymnasium import spaces
+from gymnasium.core import ActType, ObsType
+from gymnasium.vector import VectorEnv, VectorWrapper
+from gymnasium.vector.vector_env import ArrayType
+
+
+class ValidateVectorActions(VectorWrapper):
+    # the whole batch of actions is validated with one comparison so that the
+    # sub-envs can be created with validate_actions=False
+    def __init__(self, env: VectorEnv) -> None:
+        super().__init__(env)
+
+        action_space = env.single_action_space
+
+        if isinstance(action_space, spaces.Discrete):
+            self.low = np.int64(action_space.start)
+            self.high = np.int64(action_space.start + action_space.n - 1)
+        elif isinstance(action_space, spaces.Box):
+            self.low = action_space.low
+            self.high = action_space.high
+        else:
+            raise ValueError(f"{action_space} is not supported")
+
+        self.shape = (env.num_envs, *action_space.shape)
+
+    def step(
+        self,
+        actions: ActType,
+    ) -> tuple[ObsType, ArrayType, ArrayType, ArrayType, dict[str, Any]]:
+        actions = np.asarray(actions)
+
+        assert actions.shape == self.shape, f"{actions.shape} != {self.shape}"
+        assert np.all(
+            (actions >= self.low) & (actions <= self.high)
+        ), f"{actions!r} invalid"
+
+        return super().step(actions)
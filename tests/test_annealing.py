@@ -0,0 +1,67 @@
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from gymnasium_search_race.annealing import SearchRaceAnnealer, get_heuristic_actions
+
+
+def replay_actions(env: gym.Env, test_id: int, actions: np.ndarray) -> dict:
+    env.reset(options={"test_id": test_id})
+    info = {}
+
+    for angle, thrust in actions:
+        *_, info = env.step(np.array([angle / 18, thrust / 200]))
+
+    return info
+
+
+@pytest.mark.parametrize("physics_backend", ("python", "numba"))
+@pytest.mark.parametrize("acceptance", ("annealing", "late_acceptance"))
+def test_search_race_annealer(physics_backend: str, acceptance: str):
+    env = gym.make("gymnasium_search_race:gymnasium_search_race/SearchRace-v3")
+    unwrapped = env.unwrapped
+    test_id = 1
+    checkpoints = unwrapped.test_checkpoints[unwrapped.test_ids.index(test_id)]
+
+    heuristic_actions = get_heuristic_actions(
+        checkpoints=checkpoints,
+        physics_backend=physics_backend,
+    )
+    annealer = SearchRaceAnnealer(
+        checkpoints=checkpoints,
+        physics_backend=physics_backend,
+        acceptance=acceptance,
+        seed=42,
+    )
+
+    # the rollout from any turn continues the stored states
+    states = np.zeros((601, 6))
+    states[0] = annealer.initial_state
+    angles, thrusts = heuristic_actions.T.astype(np.float64)
+    heuristic_length = annealer.rollout(states, angles, thrusts)
+    info = replay_actions(env, test_id, heuristic_actions[:heuristic_length])
+    assert info["episode_length"] == heuristic_length
+    assert info["current_checkpoint"] == info["total_checkpoints"]
+
+    new_states = states.copy()
+    new_states[101:] = 0
+    assert annealer.rollout(new_states, angles, thrusts, start=100) == (
+        heuristic_length
+    )
+    np.testing.assert_array_equal(new_states, states)
+
+    actions, length = annealer.optimize(
+        heuristic_actions,
+        time_budget=60.0,
+        max_iterations=500,
+    )
+    assert annealer.n_iterations == 500
+    assert annealer.n_pruned > 0
+    assert annealer.finished
+    assert len(actions) == length <= heuristic_length
+    assert np.all(np.abs(actions[:, 0]) <= 18)
+    assert np.all((actions[:, 1] >= 0) & (actions[:, 1] <= 200))
+
+    info = replay_actions(env, test_id, actions)
+    assert info["episode_length"] == length
+    assert info["current_checkpoint"] == info["total_checkpoints"]
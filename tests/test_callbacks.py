@@ -0,0 +1,36 @@
+import gymnasium as gym
+from stable_baselines3 import PPO
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from gymnasium_search_race.callbacks import StopTrainingOnBestEpisodePlateau
+from gymnasium_search_race.wrappers import RecordBestEpisodeStatistics
+
+
+def test_stop_training_on_best_episode_plateau():
+    env = DummyVecEnv(
+        [
+            lambda: RecordBestEpisodeStatistics(
+                gym.make(
+                    "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+                    test_id=1,
+                )
+            )
+        ]
+    )
+    model = PPO("MlpPolicy", env, n_steps=64, batch_size=64, n_epochs=1, seed=0)
+    callback = StopTrainingOnBestEpisodePlateau(patience=1000)
+
+    model.learn(total_timesteps=100_000, callback=callback)
+    assert callback.plateaued
+    assert callback.best_episodes == [
+        (
+            env.envs[0].best_episode_returns,
+            env.envs[0].best_episode_lengths,
+        )
+    ]
+    assert model.num_timesteps - callback.last_improvement_timestep == 1000
+    assert model.num_timesteps < 100_000
+
+    # the training continues with a new budget
+    model.learn(total_timesteps=64, callback=callback, reset_num_timesteps=False)
+    assert not callback.plateaued
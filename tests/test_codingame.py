@@ -0,0 +1,114 @@
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from gymnasium_search_race.codingame import (
+    get_game_input,
+    get_turn_input,
+    parse_bot_output,
+    run_bots,
+)
+
+RESOURCES_PATH = Path(__file__).resolve().parent / "resources"
+BOT_PATH = RESOURCES_PATH / "bot.py"
+
+
+@pytest.mark.parametrize(
+    "test_id",
+    (1, 2, 700),
+)
+def test_search_race_protocol(test_id: int):
+    env = gym.make(
+        "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+        test_id=test_id,
+    )
+    unwrapped = env.unwrapped
+
+    game = json.loads(
+        (RESOURCES_PATH / f"game{test_id}.json").read_text(encoding="UTF-8")
+    )
+    nb_checkpoints = int(game["stdin"][0])
+
+    env.reset()
+    assert get_game_input(unwrapped) == game["stdin"][: nb_checkpoints + 1]
+
+    for i, (stdin, stdout) in enumerate(
+        zip(game["stdin"][nb_checkpoints + 1 :], game["stdout"])
+    ):
+        expected = [int(i) for i in stdin.split()]
+        expected[5] = expected[5] % 360
+        assert get_turn_input(unwrapped) == [
+            " ".join(str(i) for i in expected)
+        ], f"game input is wrong at step {i}"
+
+        angle, thrust = parse_bot_output(stdout, car=unwrapped.car)
+        env.step(np.array([angle / 18, thrust / 200]))
+
+
+def test_parse_bot_output():
+    env = gym.make(
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacing-v2",
+        test_id=0,
+    )
+    env.reset(seed=42)
+    car = env.unwrapped.car
+    x = car.x + 1000 * np.cos(np.radians(car.angle + 10))
+    y = car.y + 1000 * np.sin(np.radians(car.angle + 10))
+
+    assert parse_bot_output(f"{x} {y} 80 message", car=car) == (10, 80)
+    assert parse_bot_output(f"{car.x} {car.y} BOOST", car=car) == (0, 200)
+    assert parse_bot_output("EXPERT -30 250", car=car) == (-18, 200)
+
+    with pytest.raises(RuntimeError, match="invalid bot output"):
+        parse_bot_output("WAIT", car=car)
+
+
+@pytest.mark.parametrize(
+    "env_id,game,test_ids,env_kwargs",
+    (
+        (
+            "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+            "SearchRace",
+            [1, 2, 7],
+            {},
+        ),
+        (
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacing-v2",
+            "MadPodRacing",
+            [0, 1, 2],
+            {"opponent_path": "heuristic"},
+        ),
+    ),
+)
+def test_run_bots(env_id: str, game: str, test_ids: list[int], env_kwargs: dict):
+    commands = [[sys.executable, str(BOT_PATH), game], [sys.executable, "-c", ""]]
+    results = asyncio.run(
+        run_bots(
+            commands=commands,
+            env_id=env_id,
+            test_ids=test_ids,
+            n_workers=1,
+            seed=42,
+            first_turn_timeout=10.0,
+            turn_timeout=10.0,
+            **env_kwargs,
+        )
+    )
+
+    assert [result["test_id"] for result in results] == test_ids * 2
+
+    # the bot process is kept alive across the episodes
+    bot_results = results[: len(test_ids)]
+    assert len({result["pid"] for result in bot_results}) == 1
+    for result in bot_results:
+        assert result["error"] is None
+        assert result["finished"]
+
+    # a bot exiting is restarted for the next episode
+    for result in results[len(test_ids) :]:
+        assert "bot exited" in result["error"]
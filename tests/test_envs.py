@@ -5,8 +5,23 @@ import gymnasium as gym
 import numpy as np
 import pytest
 from gymnasium.utils.env_checker import check_env
+from stable_baselines3 import PPO
+
+from gymnasium_search_race.envs.geometry import get_map_geometry
+from gymnasium_search_race.envs.map_generator import (
+    CHECKPOINT_RADIUS,
+    HEIGHT,
+    WIDTH,
+    generate_checkpoints,
+)
 
 RESOURCES_PATH = Path(__file__).resolve().parent / "resources"
+AGENTS_PATH = Path(__file__).resolve().parents[1] / "rl-trained-agents" / "ppo"
+BLOCKER_MODEL_PATH = (
+    AGENTS_PATH
+    / "gymnasium_search_race-MadPodRacingBlockerDiscrete-v2_1"
+    / "best_model.zip"
+)
 
 
 @pytest.mark.parametrize(
@@ -154,3 +169,332 @@ def test_mad_pod_racing_boost_on_first_move(
     _observation, _reward, _terminated, _truncated, info = env.step(action)
     actual = [info["x"], info["y"], info["vx"], info["vy"]]
     assert actual == expected
+
+
+@pytest.mark.parametrize(
+    "env_id,env_kwargs",
+    (
+        ("gymnasium_search_race:gymnasium_search_race/SearchRace-v3", {}),
+        (
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+            {"opponent_path": BLOCKER_MODEL_PATH},
+        ),
+    ),
+)
+def test_env_record_physics_events(env_id: str, env_kwargs: dict):
+    env = gym.make(env_id, test_id=1, record_physics_events=True, **env_kwargs)
+    _observation, info = env.reset(seed=42)
+    assert info["physics_events"]["sub_steps"] == 0
+
+    total_checkpoints = 0
+    terminated = truncated = False
+
+    while not terminated and not truncated:
+        action = env.action_space.sample()
+        _observation, _reward, terminated, truncated, info = env.step(action)
+        assert info["physics_events"]["sub_steps"] >= 1
+        total_checkpoints += info["physics_events"]["checkpoints"]
+
+    assert total_checkpoints >= info["current_checkpoint"]
+
+
+@pytest.mark.parametrize(
+    "env_id,env_kwargs",
+    (
+        ("gymnasium_search_race:gymnasium_search_race/SearchRace-v3", {}),
+        (
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+            {"opponent_path": BLOCKER_MODEL_PATH},
+        ),
+    ),
+)
+def test_env_physics_events_not_in_info_by_default(env_id: str, env_kwargs: dict):
+    env = gym.make(env_id, **env_kwargs)
+    _observation, info = env.reset(seed=42)
+    assert "physics_events" not in info
+
+    for _ in range(10):
+        _observation, _reward, _terminated, _truncated, info = env.step(
+            env.action_space.sample()
+        )
+        assert "physics_events" not in info
+
+    # the events are not counted when they are not recorded
+    assert not any(env.unwrapped.physics_events.values())
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    (
+        "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+    ),
+)
+def test_env_frame_skip(env_id: str):
+    frame_skip = 4
+    env = gym.make(env_id, test_id=1, max_episode_steps=None)
+    env_frame_skip = gym.make(
+        env_id,
+        test_id=1,
+        frame_skip=frame_skip,
+        max_episode_steps=None,
+    )
+    env.action_space.seed(42)
+
+    env.reset(seed=42)
+    env_frame_skip.reset(seed=42)
+    terminated = False
+
+    for _ in range(150):
+        action = env.action_space.sample()
+        total_reward = 0
+
+        for _ in range(frame_skip):
+            _observation, reward, terminated, _truncated, info = env.step(action)
+            total_reward += reward
+
+            if terminated:
+                break
+
+        (
+            _observation,
+            reward_frame_skip,
+            terminated_frame_skip,
+            _truncated,
+            info_frame_skip,
+        ) = env_frame_skip.step(action)
+
+        assert reward_frame_skip == total_reward
+        assert terminated_frame_skip == terminated
+        for key in ("x", "y", "vx", "vy", "angle", "episode_length"):
+            assert info_frame_skip[key] == info[key]
+
+        if terminated:
+            break
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    (
+        "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacing-v2",
+    ),
+)
+def test_env_validate_actions(env_id: str):
+    env = gym.make(env_id, test_id=1, disable_env_checker=True)
+    env_trusted = gym.make(
+        env_id,
+        test_id=1,
+        validate_actions=False,
+        disable_env_checker=True,
+    )
+    env.action_space.seed(42)
+
+    env.reset(seed=42)
+    env_trusted.reset(seed=42)
+
+    for _ in range(100):
+        action = env.action_space.sample()
+        _observation, reward, terminated, truncated, info = env.step(action)
+        (
+            _observation,
+            reward_trusted,
+            terminated_trusted,
+            truncated_trusted,
+            info_trusted,
+        ) = env_trusted.step(action)
+
+        assert reward_trusted == reward
+        assert terminated_trusted == terminated
+        assert truncated_trusted == truncated
+        for key in ("x", "y", "vx", "vy", "angle", "current_checkpoint"):
+            assert info_trusted[key] == info[key]
+
+        if terminated or truncated:
+            break
+
+    env.reset(seed=42)
+    with pytest.raises(AssertionError):
+        env.step(np.array([0.0, 2.0]))
+
+
+@pytest.mark.parametrize(
+    "env_id,model_path,env_kwargs",
+    (
+        (
+            "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+            AGENTS_PATH / "gymnasium_search_race-SearchRace-v3_1" / "best_model.zip",
+            {},
+        ),
+        (
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+            AGENTS_PATH
+            / "gymnasium_search_race-MadPodRacingDiscrete-v2_1"
+            / "best_model.zip",
+            {"opponent_path": BLOCKER_MODEL_PATH},
+        ),
+    ),
+)
+def test_env_float32_observations(env_id: str, model_path: Path, env_kwargs: dict):
+    model = PPO.load(model_path, device="cpu")
+    env = gym.make(env_id, test_id=1, **env_kwargs)
+    env_float32 = gym.make(env_id, test_id=1, dtype=np.float32, **env_kwargs)
+    assert env_float32.observation_space.dtype == np.float32
+
+    observation, _info = env.reset(seed=42)
+    observation_float32, _info = env_float32.reset(seed=42)
+
+    for _ in range(100):
+        assert observation_float32.dtype == np.float32
+        np.testing.assert_allclose(observation_float32, observation, atol=1e-6)
+
+        action, _ = model.predict(observation, deterministic=True)
+        action_float32, _ = model.predict(observation_float32, deterministic=True)
+        np.testing.assert_allclose(action_float32, action, atol=1e-5)
+
+        observation, _reward, terminated, truncated, info = env.step(action)
+        observation_float32, _reward, _terminated, _truncated, info_float32 = (
+            env_float32.step(action)
+        )
+        for key in ("x", "y", "vx", "vy", "angle", "current_checkpoint"):
+            assert info_float32[key] == info[key]
+
+        if terminated or truncated:
+            break
+
+
+def test_generate_checkpoints():
+    for index in range(200):
+        checkpoints = generate_checkpoints(index=index)
+        np.testing.assert_array_equal(checkpoints, generate_checkpoints(index=index))
+
+        assert 3 <= len(checkpoints) <= 8
+        assert np.all((checkpoints >= 0) & (checkpoints <= [WIDTH, HEIGHT]))
+
+        distances = np.linalg.norm(checkpoints[:, np.newaxis] - checkpoints, axis=-1)
+        distances = distances[np.triu_indices(len(checkpoints), k=1)]
+        assert np.all(distances > 2 * CHECKPOINT_RADIUS)
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    (
+        "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+    ),
+)
+def test_env_procedural_maps(env_id: str):
+    env = gym.make(env_id, procedural_maps=True, sequential_maps=True)
+
+    for map_index in range(10):
+        _observation, info = env.reset(seed=42)
+        assert env.get_wrapper_attr("map_index") == map_index
+        assert len(info["checkpoints"]) <= env.get_wrapper_attr("max_checkpoints")
+
+        for _ in range(5):
+            env.step(env.action_space.sample())
+
+    _observation, info = env.reset(seed=42, options={"map_index": 3})
+    assert env.get_wrapper_attr("map_index") == 3
+    checkpoints = info["checkpoints"]
+
+    # the maps depend on the seed of the stream and the range of checkpoints
+    seed_checkpoints = []
+
+    for _ in range(2):
+        env = gym.make(
+            env_id,
+            procedural_maps=True,
+            procedural_seed=1,
+            min_checkpoints=4,
+            max_checkpoints=4,
+        )
+        _observation, info = env.reset(seed=42, options={"map_index": 3})
+        assert len(info["checkpoints"]) == 4
+        seed_checkpoints.append(info["checkpoints"])
+
+    assert not np.array_equal(seed_checkpoints[0], checkpoints)
+    np.testing.assert_array_equal(seed_checkpoints[0], seed_checkpoints[1])
+
+
+def test_map_geometry():
+    checkpoints = np.array([[0.0, 0.0], [1000.0, 0.0], [1000.0, 1000.0]])
+    geometry = get_map_geometry(checkpoints, laps=2)
+
+    np.testing.assert_allclose(geometry.distances, [1000, 1000, np.sqrt(2) * 1000])
+    np.testing.assert_allclose(
+        geometry.turn_angles,
+        [3 * np.pi / 4, np.pi / 2, 3 * np.pi / 4],
+    )
+    np.testing.assert_array_equal(geometry.order, [0, 1, 2, 0, 1, 2, 0])
+    assert geometry.remaining_distances[0] == 2 * geometry.distances.sum()
+    assert geometry.remaining_distances[-1] == 0
+
+
+def test_env_map_geometry_cache():
+    env_id = "gymnasium_search_race:gymnasium_search_race/SearchRace-v3"
+    env = gym.make(env_id, test_id=1)
+    env.reset(seed=42)
+    assert env.unwrapped.map_geometry is None
+
+    # the geometry of a test map is shared by the episodes and the envs
+    env = gym.make(env_id, test_id=1, lookahead=4)
+    env.reset(seed=42)
+    geometry = env.unwrapped.map_geometry
+    env.reset(seed=43)
+    assert env.unwrapped.map_geometry is geometry
+
+    env = gym.make(env_id, test_id=1, lookahead=4)
+    env.reset(seed=42)
+    assert env.unwrapped.map_geometry is geometry
+    np.testing.assert_array_equal(
+        geometry.distances,
+        get_map_geometry(env.unwrapped.checkpoints, laps=3).distances,
+    )
+
+
+@pytest.mark.parametrize(
+    "env_id,observation_size",
+    (
+        ("gymnasium_search_race:gymnasium_search_race/SearchRace-v3", 22),
+        ("gymnasium_search_race:gymnasium_search_race/MadPodRacing-v2", 22),
+        ("gymnasium_search_race:gymnasium_search_race/MadPodRacingBlocker-v2", 28),
+    ),
+)
+def test_env_lookahead(env_id: str, observation_size: int):
+    lookahead = 4
+    env_kwargs = {}
+
+    if "Blocker" in env_id:
+        env_kwargs["opponent_path"] = (
+            AGENTS_PATH / "gymnasium_search_race-SearchRace-v3_1" / "best_model.zip"
+        )
+
+    env = gym.make(env_id, test_id=1, **env_kwargs)
+    env_lookahead = gym.make(env_id, test_id=1, lookahead=lookahead, **env_kwargs)
+    assert env_lookahead.observation_space.shape == (observation_size,)
+    check_env(env_lookahead.unwrapped)
+
+    observation, _info = env.reset(seed=42)
+    observation_lookahead, _info = env_lookahead.reset(seed=42)
+
+    for _ in range(100):
+        runner_observation = observation[-10:]
+        runner_observation_lookahead = observation_lookahead[-5 * lookahead - 2 :]
+        np.testing.assert_allclose(
+            runner_observation_lookahead[[0, 1, 2, 3, 5, 6, 7, 8, -2, -1]],
+            runner_observation,
+            atol=1e-12,
+        )
+        np.testing.assert_array_equal(
+            observation_lookahead[: -5 * lookahead - 2], observation[:-10]
+        )
+
+        action = env.action_space.sample()
+        observation, _reward, terminated, truncated, _info = env.step(action)
+        observation_lookahead, _reward, _terminated, _truncated, _info = (
+            env_lookahead.step(action)
+        )
+
+        if terminated or truncated:
+            break
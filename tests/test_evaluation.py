@@ -0,0 +1,90 @@
+from pathlib import Path
+
+import gymnasium as gym
+import pytest
+from stable_baselines3 import PPO
+
+from gymnasium_search_race.callbacks import EvalTestCasesCallback
+from gymnasium_search_race.evaluation import TestCasesEvaluator
+
+AGENTS_PATH = Path(__file__).resolve().parents[1] / "rl-trained-agents" / "ppo"
+
+
+@pytest.mark.parametrize(
+    "env_id,model_path,seeds",
+    (
+        (
+            "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+            AGENTS_PATH / "gymnasium_search_race-SearchRace-v3_1" / "best_model.zip",
+            None,
+        ),
+        (
+            "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+            AGENTS_PATH
+            / "gymnasium_search_race-SearchRaceDiscrete-v3_1"
+            / "best_model.zip",
+            None,
+        ),
+        (
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+            AGENTS_PATH
+            / "gymnasium_search_race-MadPodRacingDiscrete-v2_1"
+            / "best_model.zip",
+            [0, 1],
+        ),
+    ),
+)
+def test_test_cases_evaluator(
+    env_id: str,
+    model_path: Path,
+    seeds: list[int] | None,
+):
+    model = PPO.load(model_path, device="cpu")
+    env = gym.wrappers.RecordEpisodeStatistics(gym.make(env_id))
+    test_ids = env.unwrapped.test_ids[:4]
+    evaluator = TestCasesEvaluator(
+        env_id=env_id,
+        test_ids=test_ids,
+        seeds=seeds,
+    )
+    assert (evaluator.simulator is None) == ("MadPod" in env_id)
+
+    # the episodes are the same as the ones played one by one
+    for statistics in evaluator.evaluate(model=model):
+        observation, _info = env.reset(
+            seed=statistics["seed"],
+            options={"test_id": statistics["test_id"]},
+        )
+        terminated = truncated = False
+
+        while not terminated and not truncated:
+            action, _ = model.predict(observation, deterministic=True)
+            observation, _reward, terminated, truncated, info = env.step(action)
+
+        assert statistics["l"] == info["episode"]["l"]
+        assert statistics["r"] == info["episode"]["r"]
+        assert statistics["t"] > 0
+
+    assert evaluator.done.all()
+    assert len(evaluator.episodes) == len(test_ids) * len(seeds or [None])
+
+
+def test_eval_test_cases_callback():
+    env_id = "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3"
+    model = PPO.load(
+        AGENTS_PATH
+        / "gymnasium_search_race-SearchRaceDiscrete-v3_1"
+        / "best_model.zip",
+        env=gym.make(env_id, test_id=1),
+        n_steps=64,
+        tensorboard_log=None,
+        device="cpu",
+    )
+    evaluator = TestCasesEvaluator(env_id=env_id, test_ids=[1, 2])
+    callback = EvalTestCasesCallback(evaluator=evaluator, eval_freq=64)
+
+    model.learn(total_timesteps=128, callback=callback)
+    assert callback.last_total_length == sum(
+        statistics["l"] for statistics in evaluator.evaluate(model)
+    )
+    assert callback.best_total_length <= callback.last_total_length
@@ -0,0 +1,101 @@
+from pathlib import Path
+
+import gymnasium as gym
+import numpy as np
+import pytest
+from stable_baselines3 import PPO
+
+from gymnasium_search_race.evolution import (
+    CrossEntropyMethod,
+    EvolutionStrategy,
+    evaluate_population,
+    get_centered_ranks,
+    sample_antithetic_noise,
+)
+from gymnasium_search_race.policies import MLPPolicy
+
+AGENTS_PATH = Path(__file__).resolve().parents[1] / "rl-trained-agents" / "ppo"
+
+
+@pytest.mark.parametrize(
+    "env_id,model_path",
+    (
+        (
+            "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+            AGENTS_PATH / "gymnasium_search_race-SearchRace-v3_1" / "best_model.zip",
+        ),
+        (
+            "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+            AGENTS_PATH
+            / "gymnasium_search_race-SearchRaceDiscrete-v3_1"
+            / "best_model.zip",
+        ),
+    ),
+)
+@pytest.mark.parametrize("physics_backend", ("python", "numba"))
+def test_evaluate_population(env_id: str, model_path: Path, physics_backend: str):
+    env = gym.make(env_id)
+    policy = MLPPolicy.from_ppo(PPO.load(model_path, device="cpu"), env=env)
+    test_ids = [1, 2, 700]
+
+    expected = 0
+    for test_id in test_ids:
+        observation, _info = env.reset(options={"test_id": test_id})
+        terminated = truncated = False
+
+        while not (terminated or truncated):
+            action, _ = policy.predict(observation)
+            observation, _reward, terminated, truncated, info = env.step(action)
+
+        expected += info["episode_length"]
+
+    unwrapped = env.unwrapped
+    checkpoints = [
+        unwrapped.test_checkpoints[unwrapped.test_ids.index(test_id)]
+        for test_id in test_ids
+    ]
+    parameters = policy.get_parameters()
+    fitness = evaluate_population(
+        policy,
+        np.stack([parameters, np.zeros_like(parameters)]),
+        checkpoints=checkpoints,
+        physics_backend=physics_backend,
+    )
+    assert fitness[0] == expected
+    assert fitness[1] > expected
+
+
+def test_sample_antithetic_noise():
+    noise = sample_antithetic_noise(np.random.default_rng(42), 6, 3)
+    assert noise.shape == (6, 3)
+    np.testing.assert_array_equal(noise[:3], -noise[3:])
+
+
+def test_get_centered_ranks():
+    np.testing.assert_allclose(
+        get_centered_ranks(np.array([3.0, 1.0, 2.0])),
+        [-0.5, 0.5, 0.0],
+    )
+
+
+@pytest.mark.parametrize(
+    "optimizer_class,kwargs",
+    (
+        (EvolutionStrategy, {"sigma": 0.1, "learning_rate": 0.1}),
+        (CrossEntropyMethod, {"sigma": 1.0, "min_sigma": 0.01}),
+    ),
+)
+def test_optimizers(optimizer_class: type, kwargs: dict):
+    target = np.array([1.0, -2.0, 0.5])
+    optimizer = optimizer_class(
+        mean=np.zeros(3),
+        population_size=32,
+        seed=42,
+        **kwargs,
+    )
+
+    for _ in range(100):
+        population = optimizer.ask()
+        optimizer.tell(np.sum((population - target) ** 2, axis=1))
+
+    np.testing.assert_allclose(optimizer.mean, target, atol=0.1)
@@ -0,0 +1,166 @@
+import os
+import shutil
+from pathlib import Path
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from gymnasium_search_race.envs.opponents import (
+    BLOCKER,
+    HEURISTIC_OPPONENT,
+    RUNNER,
+    OpponentPool,
+    load_opponent_model,
+)
+from gymnasium_search_race.league import (
+    evaluate_against_pool,
+    get_ratings,
+    play_matches,
+)
+
+AGENTS_PATH = Path(__file__).resolve().parents[1] / "rl-trained-agents" / "ppo"
+RUNNER_MODEL_PATH = (
+    AGENTS_PATH / "gymnasium_search_race-MadPodRacingDiscrete-v2_1" / "best_model.zip"
+)
+BLOCKER_MODEL_PATH = (
+    AGENTS_PATH
+    / "gymnasium_search_race-MadPodRacingBlockerDiscrete-v2_1"
+    / "best_model.zip"
+)
+
+
+def test_opponent_pool_refresh(tmp_path: Path):
+    shutil.copy(BLOCKER_MODEL_PATH, tmp_path / "blocker_1.zip")
+    pool = OpponentPool([tmp_path, HEURISTIC_OPPONENT], refresh_interval=0.0)
+    assert pool.names == [str(tmp_path / "blocker_1.zip"), HEURISTIC_OPPONENT]
+
+    model = pool.models[str(tmp_path / "blocker_1.zip")]
+    shutil.copy(BLOCKER_MODEL_PATH, tmp_path / "blocker_2.zip")
+    (tmp_path / "blocker_3.zip").write_bytes(b"model being saved")
+    os.utime(tmp_path / "blocker_1.zip", (0, 0))
+
+    with pytest.warns(UserWarning, match="could not be loaded"):
+        name, _model = pool.sample(np.random.default_rng(42))
+
+    assert name in pool.names
+    assert len(pool.names) == 3
+    assert pool.models[str(tmp_path / "blocker_1.zip")] is not model
+
+    (tmp_path / "blocker_2.zip").unlink()
+    pool.refresh()
+    assert len(pool.names) == 2
+
+
+def test_opponent_pool_roles(tmp_path: Path):
+    shutil.copy(RUNNER_MODEL_PATH, tmp_path / "runner.zip")
+    shutil.copy(BLOCKER_MODEL_PATH, tmp_path / "blocker.zip")
+    pool = OpponentPool([tmp_path, HEURISTIC_OPPONENT])
+    runner_name = str(tmp_path / "runner.zip")
+    blocker_name = str(tmp_path / "blocker.zip")
+
+    assert pool.roles == {
+        runner_name: RUNNER,
+        blocker_name: BLOCKER,
+        HEURISTIC_OPPONENT: None,
+    }
+    assert pool.get_names(role=RUNNER) == [runner_name, HEURISTIC_OPPONENT]
+    assert pool.get_names(role=BLOCKER) == [blocker_name, HEURISTIC_OPPONENT]
+
+    rng = np.random.default_rng(42)
+    assert {pool.sample(rng, role=BLOCKER)[0] for _ in range(20)} == {
+        blocker_name,
+        HEURISTIC_OPPONENT,
+    }
+
+    with pytest.raises(ValueError):
+        OpponentPool([RUNNER_MODEL_PATH]).sample(rng, role=BLOCKER)
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    (
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacingBlockerDiscrete-v2",
+    ),
+)
+def test_evaluate_against_mixed_pool(env_id: str):
+    opponent_role = RUNNER if "Blocker" in env_id else BLOCKER
+    pool = OpponentPool([RUNNER_MODEL_PATH, BLOCKER_MODEL_PATH, HEURISTIC_OPPONENT])
+    model_path = BLOCKER_MODEL_PATH if opponent_role == RUNNER else RUNNER_MODEL_PATH
+    results = evaluate_against_pool(
+        model=load_opponent_model(model_path),
+        env_id=env_id,
+        pool=pool,
+        n_episodes=1,
+        num_envs=2,
+        seed=42,
+        max_episode_steps=20,
+    )
+
+    assert list(results) == pool.get_names(role=opponent_role)
+
+
+def test_opponent_angle_thrust_override():
+    env = gym.make(
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+        test_id=0,
+        opponent_path=HEURISTIC_OPPONENT,
+    )
+    env.reset(seed=42)
+    opponent_car = env.get_wrapper_attr("opponent_car")
+
+    env.set_wrapper_attr("opponent_angle_thrust", (0, 0))
+    env.step(0)
+    assert opponent_car.vx == opponent_car.vy == 0
+    assert env.get_wrapper_attr("opponent_angle_thrust") is None
+
+    env.step(0)
+    assert opponent_car.vx != 0 or opponent_car.vy != 0
+
+
+def test_evaluate_against_pool():
+    pool = OpponentPool([BLOCKER_MODEL_PATH, HEURISTIC_OPPONENT])
+    n_episodes = 3
+    results = evaluate_against_pool(
+        model=load_opponent_model(RUNNER_MODEL_PATH),
+        env_id="gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+        pool=pool,
+        n_episodes=n_episodes,
+        num_envs=4,
+        seed=42,
+        max_episode_steps=100,
+    )
+
+    assert list(results) == pool.names
+    for statistics in results.values():
+        assert 0 < statistics["mean_length"] <= 100
+        assert statistics["win_rate"] in (0, 1 / 3, 2 / 3, 1)
+
+
+def test_play_matches():
+    results = play_matches(
+        runner_path=RUNNER_MODEL_PATH,
+        blocker_path=HEURISTIC_OPPONENT,
+        test_ids=[0, 1],
+        seeds=[0, 1],
+        max_episode_steps=50,
+    )
+
+    assert [(result["test_id"], result["seed"]) for result in results] == [
+        (0, 0),
+        (0, 1),
+        (1, 0),
+        (1, 1),
+    ]
+    for result in results:
+        assert result["win"] == 0
+        assert result["length"] == 50
+
+
+def test_get_ratings():
+    wins = np.array([[0, 8, 9], [2, 0, 6], [1, 4, 0]])
+    ratings = get_ratings(wins)
+
+    assert ratings[0] > ratings[1] > ratings[2]
+    assert np.allclose(get_ratings(np.array([[0, 5], [5, 0]])), 1500)
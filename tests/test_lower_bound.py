@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from gymnasium_search_race.annealing import SearchRaceAnnealer, get_heuristic_actions
+from gymnasium_search_race.envs.lower_bound import (
+    TurnsLowerBound,
+    get_max_distance_tables,
+    get_test_lower_bounds,
+)
+from gymnasium_search_race.envs.search_race import get_test_ids, load_test_checkpoints
+
+
+def test_get_max_distance_tables():
+    base, speed = get_max_distance_tables(max_turns=50)
+
+    # the tables match the recurrence of the speed at full thrust
+    current_speed, distance = 100.0, 0.0
+    for n in range(51):
+        assert base[n] + 100.0 * speed[n] == pytest.approx(distance)
+        distance += current_speed + 200 + np.sqrt(2)
+        current_speed = (current_speed + 200) * 0.85
+
+
+@pytest.mark.parametrize("test_id", (1, 2, 7))
+def test_turns_lower_bound(test_id: int):
+    checkpoints = load_test_checkpoints()[get_test_ids().index(test_id)]
+    lower_bound = TurnsLowerBound(checkpoints)
+    annealer = SearchRaceAnnealer(checkpoints=checkpoints, seed=0)
+
+    states = np.zeros((601, 6))
+    states[0] = annealer.initial_state
+    angles, thrusts = get_heuristic_actions(checkpoints).T.astype(np.float64)
+    length = annealer.rollout(states, angles, thrusts)
+    assert length < 600
+
+    # the bound never exceeds the remaining turns of the trajectory
+    lower_bounds = lower_bound(states[: length + 1])
+    assert np.all(lower_bounds <= length - np.arange(length + 1))
+    assert lower_bounds[-1] == 0
+    assert lower_bound(states[0]) == lower_bound.get_initial_lower_bound() > 0
+    assert get_test_lower_bounds()[str(test_id)] == lower_bound(states[0])
+
+    # a rollout is stopped when the race cannot be finished in time
+    assert annealer.rollout(states.copy(), angles, thrusts, max_length=length) == (
+        length
+    )
+    assert annealer.rollout(states.copy(), angles, thrusts, max_length=20) == -1
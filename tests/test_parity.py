@@ -0,0 +1,32 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from gymnasium_search_race.parity import (
+    find_divergences,
+    load_game_log,
+    parse_game_log,
+)
+
+RESOURCES_PATH = Path(__file__).resolve().parent / "resources"
+
+
+@pytest.mark.parametrize("physics_backend", ("python", "numba"))
+def test_find_divergences(physics_backend: str):
+    games = [load_game_log(RESOURCES_PATH / f"game{i}.json") for i in (1, 2, 700)]
+    assert find_divergences(games, physics_backend=physics_backend) == [None] * 3
+
+
+def test_find_divergences_first_turn():
+    game = json.loads((RESOURCES_PATH / "game2.json").read_text(encoding="UTF-8"))
+    game["stdout"][10] = "EXPERT 5 100"
+    games = [
+        load_game_log(RESOURCES_PATH / "game1.json"),
+        parse_game_log(name="game2.json", game=game),
+    ]
+
+    divergences = find_divergences(games)
+    assert divergences[0] is None
+    assert divergences[1]["turn"] == 11
+    assert "angle" in divergences[1]["fields"]
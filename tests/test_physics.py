@@ -0,0 +1,160 @@
+from pathlib import Path
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from gymnasium_search_race.envs.physics import CHECKPOINT, get_kernels
+from gymnasium_search_race.envs.simulator import SearchRaceSimulator
+from gymnasium_search_race.storage import read_best_actions
+
+ROOT_PATH = Path(__file__).resolve().parents[1]
+BEST_ACTIONS_PATH = ROOT_PATH / "data" / "best_actions.json.gz"
+BLOCKER_MODEL_PATH = (
+    ROOT_PATH
+    / "rl-trained-agents"
+    / "ppo"
+    / "gymnasium_search_race-MadPodRacingBlockerDiscrete-v2_1"
+    / "best_model.zip"
+)
+CAR_KEYS = ("x", "y", "vx", "vy", "angle", "current_checkpoint")
+
+
+@pytest.fixture(name="search_race_trajectories", scope="module")
+def fixture_search_race_trajectories() -> dict[str, list[list[float]]]:
+    env = gym.make("gymnasium_search_race:gymnasium_search_race/SearchRace-v3")
+    trajectories = {}
+
+    for test_id, actions in read_best_actions(BEST_ACTIONS_PATH).items():
+        _observation, info = env.reset(options={"test_id": int(test_id)})
+        trajectory = [[info[key] for key in CAR_KEYS]]
+
+        for action in actions:
+            _observation, _reward, _terminated, _truncated, info = env.step(
+                np.array(action) / [18, 200]
+            )
+            trajectory.append([info[key] for key in CAR_KEYS])
+
+        trajectories[test_id] = trajectory
+
+    assert len(trajectories) == 50
+    return trajectories
+
+
+@pytest.mark.parametrize("backend", ("python", "numba"))
+def test_search_race_step_kernel_parity(
+    backend: str,
+    search_race_trajectories: dict[str, list[list[float]]],
+):
+    kernels = get_kernels(backend=backend)
+    best_actions = read_best_actions(BEST_ACTIONS_PATH)
+    test_ids = list(best_actions)
+    n_maps = len(test_ids)
+
+    env = gym.make("gymnasium_search_race:gymnasium_search_race/SearchRace-v3")
+    maps = [env.unwrapped.test_checkpoints[i] for i in range(n_maps)]
+    n_checkpoints = np.array([len(checkpoints) for checkpoints in maps])
+    checkpoints = np.zeros((n_maps, n_checkpoints.max(), 2))
+    for i, map_checkpoints in enumerate(maps):
+        checkpoints[i, : len(map_checkpoints)] = map_checkpoints
+
+    # all the maps are simulated in lockstep
+    cars = np.array([search_race_trajectories[test_id][0] for test_id in test_ids])
+    lengths = np.array([len(best_actions[test_id]) for test_id in test_ids])
+    rewards = np.zeros(n_maps)
+
+    for step in range(lengths.max()):
+        active = step < lengths
+        actions = np.array(
+            [
+                best_actions[test_id][step] if active[i] else [0, 0]
+                for i, test_id in enumerate(test_ids)
+            ],
+            dtype=np.float64,
+        )
+        kernels.search_race_step(
+            cars,
+            checkpoints,
+            n_checkpoints,
+            actions[:, 0],
+            actions[:, 1],
+            600.0,
+            0.15,
+            False,
+            active,
+            rewards,
+        )
+
+        for i, test_id in enumerate(test_ids):
+            if active[i]:
+                assert cars[i].tolist() == search_race_trajectories[test_id][step + 1]
+
+    np.testing.assert_array_equal(cars[:, CHECKPOINT], n_checkpoints * 3)
+
+
+def test_search_race_simulator_observations():
+    best_actions = read_best_actions(BEST_ACTIONS_PATH)
+    test_ids = [int(test_id) for test_id in best_actions][:5]
+    envs = [
+        gym.make(
+            "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+            test_id=test_id,
+        ).unwrapped
+        for test_id in test_ids
+    ]
+    env_observations = [env.reset()[0] for env in envs]
+    simulator = SearchRaceSimulator(checkpoints=[env.checkpoints for env in envs])
+    np.testing.assert_array_equal(simulator.reset(), env_observations)
+
+    # the observations of the simulator and the envs are the same
+    for step in range(max(len(best_actions[str(test_id)]) for test_id in test_ids)):
+        actions = np.array(
+            [
+                best_actions[str(test_id)][
+                    min(step, len(best_actions[str(test_id)]) - 1)
+                ]
+                for test_id in test_ids
+            ],
+            dtype=np.float64,
+        )
+        observations = simulator.step(actions[:, 0], actions[:, 1])
+
+        for i, env in enumerate(envs):
+            if step < len(best_actions[str(test_ids[i])]):
+                observation, *_ = env.step(actions[i] / [18, 200])
+                np.testing.assert_array_equal(observation, observations[i])
+
+    assert simulator.terminated.all()
+
+
+def test_mad_pod_racing_env_physics_backend_parity():
+    trajectories = []
+
+    for physics_backend in ("python", "numba"):
+        env = gym.make(
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+            laps=1,
+            opponent_path=BLOCKER_MODEL_PATH,
+            record_physics_events=True,
+            physics_backend=physics_backend,
+        )
+        env.action_space.seed(42)
+        trajectory = []
+
+        for test_id in range(13):
+            env.reset(seed=test_id, options={"test_id": test_id})
+            terminated = truncated = False
+
+            while not terminated and not truncated:
+                _observation, reward, terminated, truncated, info = env.step(
+                    env.action_space.sample()
+                )
+                trajectory.append(
+                    [info[key] for key in CAR_KEYS]
+                    + list(info["physics_events"].values())
+                    + [reward]
+                )
+
+        trajectories.append(trajectory)
+
+    assert trajectories[0] == trajectories[1]
@@ -0,0 +1,126 @@
+from pathlib import Path
+
+import gymnasium as gym
+import numpy as np
+import pytest
+from stable_baselines3 import PPO
+
+from gymnasium_search_race.policies import HeuristicPolicy, MLPPolicy
+
+AGENTS_PATH = Path(__file__).resolve().parents[1] / "rl-trained-agents" / "ppo"
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    (
+        "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+        "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+    ),
+)
+def test_heuristic_policy_predict_batch(env_id: str):
+    env = gym.make(env_id)
+    policy = HeuristicPolicy.from_env(env)
+    observations = np.random.default_rng(42).uniform(-1, 1, (100, 10))
+
+    actions, _ = policy.predict(observations)
+    assert len(actions) == len(observations)
+
+    for observation, action in zip(observations, actions):
+        assert env.action_space.contains(action)
+        np.testing.assert_array_equal(policy.predict(observation)[0], action)
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    (
+        "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+        "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+    ),
+)
+def test_heuristic_policy_terminates(env_id: str):
+    env = gym.make(env_id, test_id=1)
+    policy = HeuristicPolicy.from_env(env)
+    observation, _info = env.reset(seed=42)
+    terminated = truncated = False
+
+    while not terminated and not truncated:
+        action, _ = policy.predict(observation)
+        observation, _reward, terminated, truncated, _info = env.step(action)
+
+    assert terminated
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    (
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacing-v2",
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacingBlocker-v2",
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacingBlockerDiscrete-v2",
+    ),
+)
+def test_heuristic_opponent(env_id: str):
+    env = gym.make(env_id, test_id=0, opponent_path="heuristic")
+    env.reset(seed=42)
+
+    for _ in range(100):
+        env.step(env.action_space.sample())
+
+    opponent_car = env.get_wrapper_attr("opponent_car")
+    assert opponent_car.vx != 0 or opponent_car.vy != 0
+
+    if "Blocker" in env_id:
+        assert opponent_car.current_checkpoint > 0
+
+
+@pytest.mark.parametrize(
+    "env_id,model_path",
+    (
+        (
+            "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+            AGENTS_PATH / "gymnasium_search_race-SearchRace-v3_1" / "best_model.zip",
+        ),
+        (
+            "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+            AGENTS_PATH
+            / "gymnasium_search_race-SearchRaceDiscrete-v3_1"
+            / "best_model.zip",
+        ),
+    ),
+)
+def test_mlp_policy_from_ppo(env_id: str, model_path: Path, tmp_path: Path):
+    env = gym.make(env_id)
+    model = PPO.load(model_path, device="cpu")
+    policy = MLPPolicy.from_ppo(model, env=env)
+    observations = np.random.default_rng(42).uniform(-1, 1, (100, 10))
+
+    actions, _ = policy.predict(observations)
+    np.testing.assert_allclose(
+        actions,
+        model.predict(observations, deterministic=True)[0],
+        atol=1e-5,
+    )
+    np.testing.assert_array_equal(policy.predict(observations[0])[0], actions[0])
+
+    policy.save(tmp_path / "policy.npz")
+    loaded_policy = MLPPolicy.load(tmp_path / "policy.npz")
+    np.testing.assert_array_equal(loaded_policy.predict(observations)[0], actions)
+
+
+def test_mlp_policy_parameters():
+    env = gym.make("gymnasium_search_race:gymnasium_search_race/SearchRace-v3")
+    policy = MLPPolicy.from_env(env, net_arch=(8, 8), seed=42)
+    parameters = policy.get_parameters()
+    assert len(parameters) == policy.n_parameters == 10 * 8 + 8 + 8 * 8 + 8 + 8 * 2 + 2
+
+    observations = np.random.default_rng(42).uniform(-1, 1, (2, 5, 10))
+    population = np.stack([parameters, 2 * parameters])
+    outputs = policy.forward_population(population, observations)
+    assert outputs.shape == (2, 5, 2)
+
+    policy.set_parameters(population[1])
+    np.testing.assert_array_equal(policy.get_parameters(), population[1])
+    np.testing.assert_allclose(
+        policy.forward_population(population[1:], observations[1:])[0],
+        outputs[1],
+    )
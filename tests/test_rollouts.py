@@ -0,0 +1,176 @@
+import threading
+import time
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from gymnasium_search_race.rollouts import (
+    RolloutBatch,
+    RolloutServer,
+    RolloutWorker,
+    decode_batch,
+    encode_batch,
+)
+
+
+@pytest.mark.parametrize("action_shape", ((), (2,)))
+def test_encode_decode_batch(action_shape: tuple[int, ...]):
+    rng = np.random.default_rng(0)
+    batch = RolloutBatch(
+        policy_version=3,
+        observations=rng.random((4, 2, 10), dtype=np.float32),
+        actions=(
+            rng.random((4, 2, *action_shape), dtype=np.float32)
+            if action_shape
+            else rng.integers(74, size=(4, 2), dtype=np.int32)
+        ),
+        rewards=rng.random((4, 2), dtype=np.float32),
+        terminations=rng.random((4, 2)) < 0.5,
+        truncations=rng.random((4, 2)) < 0.5,
+        next_observations=rng.random((2, 10), dtype=np.float32),
+        final_observation_mask=np.eye(4, 2, dtype=np.bool_),
+        final_observations=rng.random((2, 10), dtype=np.float32),
+    )
+    decoded_batch = decode_batch(encode_batch(batch))
+
+    assert decoded_batch.policy_version == 3
+    for name in (
+        "observations",
+        "actions",
+        "rewards",
+        "terminations",
+        "truncations",
+        "next_observations",
+        "final_observation_mask",
+        "final_observations",
+    ):
+        np.testing.assert_array_equal(
+            getattr(decoded_batch, name), getattr(batch, name)
+        )
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    (
+        "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacing-v2",
+    ),
+)
+@pytest.mark.parametrize("asynchronous", (False, True))
+def test_rollout_worker_collect_truncated_episodes(env_id: str, asynchronous: bool):
+    worker = RolloutWorker(
+        address=("127.0.0.1", 0),
+        env_id=env_id,
+        num_envs=2,
+        n_steps=8,
+        net_arch=(8,),
+        asynchronous=asynchronous,
+        seed=0,
+        max_episode_steps=5,
+    )
+    worker.parameters = worker.policy.get_parameters()
+    observations, _info = worker.envs.reset(seed=0)
+    batch = worker.collect(observations)
+    worker.envs.close()
+
+    # the episodes are truncated in the batch and the next ones start in it
+    assert batch.truncations[4].all()
+    np.testing.assert_array_equal(
+        batch.final_observation_mask,
+        batch.terminations | batch.truncations,
+    )
+    assert batch.final_observations.shape == (
+        batch.final_observation_mask.sum(),
+        batch.observations.shape[-1],
+    )
+
+    next_observations = batch.get_next_observations()
+    np.testing.assert_array_equal(next_observations[:4], batch.observations[1:5])
+    assert not np.array_equal(next_observations[4], batch.observations[5])
+
+    # the final observation is the last one of the episode, not of the reset
+    env = gym.make(env_id, max_episode_steps=5)
+    observation, _info = env.reset(seed=0)
+    assert np.allclose(observation, batch.observations[0, 0])
+
+    for action in batch.actions[:5, 0]:
+        observation, *_ = env.step(action)
+
+    env.close()
+    np.testing.assert_allclose(next_observations[4, 0], observation)
+
+    decoded_batch = decode_batch(encode_batch(batch))
+    np.testing.assert_array_equal(
+        decoded_batch.final_observation_mask,
+        batch.final_observation_mask,
+    )
+    np.testing.assert_allclose(
+        decoded_batch.final_observations,
+        batch.final_observations,
+    )
+
+
+@pytest.mark.parametrize(
+    "env_id",
+    (
+        "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+        "gymnasium_search_race:gymnasium_search_race/MadPodRacing-v2",
+    ),
+)
+def test_rollout_server_localhost_workers(env_id: str):
+    server = RolloutServer(max_pending=2)
+    workers = [
+        RolloutWorker(
+            address=server.address,
+            env_id=env_id,
+            num_envs=2,
+            n_steps=16,
+            net_arch=(8,),
+            seed=seed,
+        )
+        for seed in range(2)
+    ]
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+
+    for thread in threads:
+        thread.start()
+
+    server.wait_for_workers(n_workers=2, timeout=30.0)
+    n_parameters = workers[0].policy.n_parameters
+
+    with pytest.raises(ValueError):
+        server.broadcast_weights(np.zeros(n_parameters + 1))
+
+    assert server.broadcast_weights(np.zeros(n_parameters)) == 1
+    batches = [server.receive_batch(timeout=30.0) for _ in range(6)]
+    assert {batch.worker_id for batch in batches} == {0, 1}
+    assert all(batch.policy_version == 1 for batch in batches)
+    assert batches[0].observations.shape == (16, 2, 10)
+    assert batches[0].rewards.shape == (16, 2)
+    assert batches[0].next_observations.shape == (2, 10)
+    assert batches[0].final_observation_mask.shape == (16, 2)
+
+    # the workers wait for credits while the learner does not receive batches
+    time.sleep(0.5)
+    for worker in workers:
+        received = sum(batch.worker_id == workers.index(worker) for batch in batches)
+        assert worker.n_sent_batches <= received + server.max_pending
+
+    # the batches collected with the new weights have the new version
+    parameters = np.random.default_rng(0).normal(size=n_parameters)
+    assert server.broadcast_weights(parameters) == 2
+    batch = server.receive_batch(timeout=30.0)
+
+    while batch.policy_version != 2:
+        batch = server.receive_batch(timeout=30.0)
+
+    np.testing.assert_allclose(
+        workers[batch.worker_id].parameters,
+        parameters.astype(np.float32),
+    )
+
+    server.close()
+    for thread in threads:
+        thread.join(timeout=30.0)
+        assert not thread.is_alive()
@@ -0,0 +1,151 @@
+import csv
+import gzip
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from gymnasium_search_race.envs.map_generator import generate_maps
+from gymnasium_search_race.storage import (
+    BestActionsStore,
+    MapPack,
+    ResultsStore,
+    json_to_store,
+    merge_best_actions,
+    store_to_json,
+)
+
+DATA_PATH = Path(__file__).resolve().parents[1] / "data"
+
+
+def test_best_actions_store_put_actions(tmp_path: Path):
+    store = BestActionsStore(tmp_path / "best_actions.bin")
+    store.put_actions(1, [[-18, 200], [0, 0], [18, 100]])
+    store.put_actions(2, [[5, 200]])
+    store.put_actions(1, [[-3, 50]])
+
+    store = BestActionsStore(tmp_path / "best_actions.bin")
+    assert store.keys() == [1, 2]
+    assert store.get_actions(1) == [[-3, 50]]
+    assert store.get_actions(2) == [[5, 200]]
+
+    store.compact()
+    assert (tmp_path / "best_actions.bin").stat().st_size == 2 * 3
+    assert store.to_dict() == {"1": [[-3, 50]], "2": [[5, 200]]}
+
+
+@pytest.mark.parametrize("action", ([19, 100], [-19, 100], [0, -1], [0, 201]))
+def test_best_actions_store_put_invalid_actions(tmp_path: Path, action: list[int]):
+    store = BestActionsStore(tmp_path / "best_actions.bin")
+
+    with pytest.raises(ValueError):
+        store.put_actions(1, [[0, 200], action])
+
+    assert 1 not in store
+
+
+def test_best_actions_store_json_conversion(tmp_path: Path):
+    json_path = DATA_PATH / "best_actions.json.gz"
+    store = json_to_store(json_path, tmp_path / "best_actions.bin")
+    store_to_json(tmp_path / "best_actions.bin", tmp_path / "best_actions.json.gz")
+
+    with gzip.open(json_path, "rt", encoding="utf-8") as json_file:
+        expected = json.load(json_file)
+
+    with gzip.open(tmp_path / "best_actions.json.gz", "rt", encoding="utf-8") as file:
+        actual = json.load(file)
+
+    assert actual == expected
+    assert store.get_actions(700) == expected["700"]
+
+
+def add_run(path: Path, length: int) -> str:
+    return ResultsStore(path).add_run(
+        env_id="SearchRace-v3",
+        episode_lengths={1: length, 2: 2 * length},
+        episode_returns={1: 9.0, 2: 9.0},
+    )
+
+
+def test_merge_best_actions():
+    actions_1 = {"1": [[0, 200], [0, 200]], "2": [[0, 200]], "3": [[0, 0]]}
+    actions_2 = {"1": [[18, 200]], "2": [[18, 200], [0, 0]], "4": [[0, 100]]}
+
+    assert merge_best_actions(actions_1, actions_2) == {
+        "1": [[18, 200]],
+        "2": [[0, 200]],
+        "3": [[0, 0]],
+        "4": [[0, 100]],
+    }
+
+
+def test_merge_best_actions_lower_bounds(capsys: pytest.CaptureFixture):
+    actions_1 = {"1": [[0, 200], [0, 200]], "2": [[0, 200]]}
+    actions_2 = {"1": [[18, 200]], "2": [[18, 200], [0, 0]]}
+
+    merge_best_actions(actions_1, actions_2, lower_bounds={"1": 1, "2": 0})
+    output = capsys.readouterr().out
+    assert "Test 2: gap to lower bound 1" in output
+    assert "Total gap to lower bounds: 1" in output
+
+
+def test_results_store_concurrent_add_run(tmp_path: Path):
+    path = tmp_path / "metrics.sqlite"
+    ResultsStore(path)
+
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        run_ids = list(executor.map(add_run, [path] * 8, range(100, 108)))
+
+    store = ResultsStore(path)
+    assert len(set(run_ids)) == 8
+    assert store.best_lengths(env_id="SearchRace-v3") == {1: 100, 2: 200}
+    assert store.run_lengths(run_ids[3]) == {1: 103, 2: 206}
+
+    store.add_run(env_id="SearchRace-v3", episode_lengths={700: 50})
+    store.export_csv(tmp_path / "metrics.csv")
+
+    with open(tmp_path / "metrics.csv", "r", encoding="utf-8") as csv_file:
+        rows = list(csv.reader(csv_file))
+
+    assert rows[0] == ["env", "date", "total", "1", "2", "700"]
+    assert len(rows) == 10
+    assert all(len(row) == 6 for row in rows)
+    assert rows[-1][2:] == ["50", "", "", "50"]
+
+
+def import_csv(path: Path, csv_path: Path) -> bool:
+    return ResultsStore(path).import_csv(csv_path, if_empty=True)
+
+
+def test_results_store_concurrent_import_csv(tmp_path: Path):
+    csv_path = tmp_path / "metrics.csv"
+    store = ResultsStore(tmp_path / "metrics.sqlite")
+    store.add_run(env_id="SearchRace-v3", episode_lengths={1: 100, 2: 200})
+    store.add_run(env_id="SearchRace-v3", episode_lengths={1: 90})
+    store.export_csv(csv_path)
+
+    path = tmp_path / "new_metrics.sqlite"
+    ResultsStore(path)
+
+    # the file is imported by one process only
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        imported = list(executor.map(import_csv, [path] * 8, [csv_path] * 8))
+
+    assert sum(imported) == 1
+    assert ResultsStore(path).runs() == store.runs()
+    assert not ResultsStore(path).import_csv(csv_path, if_empty=True)
+
+
+def test_map_pack_update(tmp_path: Path):
+    maps = generate_maps(indexes=range(100))
+    map_pack = MapPack(tmp_path / "maps.pack")
+    map_pack.update(enumerate(maps))
+
+    map_pack = MapPack(tmp_path / "maps.pack")
+    assert len(map_pack) == 100
+    assert (tmp_path / "maps.pack").stat().st_size == 4 * sum(map(len, maps))
+
+    for index, checkpoints in enumerate(maps):
+        np.testing.assert_array_equal(map_pack.get_checkpoints(index), checkpoints)
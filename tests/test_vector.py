@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from gymnasium_search_race.envs.opponents import load_opponent_model
+from gymnasium_search_race.vector import make_async_vector_env
+
+AGENTS_PATH = Path(__file__).resolve().parents[1] / "rl-trained-agents" / "ppo"
+BLOCKER_MODEL_PATH = (
+    AGENTS_PATH
+    / "gymnasium_search_race-MadPodRacingBlockerDiscrete-v2_1"
+    / "best_model.zip"
+)
+
+
+@pytest.mark.parametrize(
+    "env_id,env_kwargs",
+    (
+        ("gymnasium_search_race:gymnasium_search_race/SearchRace-v3", {}),
+        (
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+            {"opponent_path": BLOCKER_MODEL_PATH},
+        ),
+    ),
+)
+def test_make_async_vector_env(env_id: str, env_kwargs: dict):
+    num_envs = 2
+    envs = make_async_vector_env(env_id, num_envs=num_envs, **env_kwargs)
+    observations, infos = envs.reset(seed=42)
+
+    assert observations.dtype == envs.single_observation_space.dtype
+    assert "checkpoints" not in infos
+    assert infos["x"].shape == (num_envs,)
+
+    for _ in range(10):
+        observations, _rewards, _terminated, _truncated, infos = envs.step(
+            envs.action_space.sample()
+        )
+
+    assert observations.shape == (num_envs, *envs.single_observation_space.shape)
+    assert np.all(infos["episode_length"] == 10)
+
+    envs.close()
+
+
+def test_load_opponent_model_is_cached():
+    assert load_opponent_model(BLOCKER_MODEL_PATH) is load_opponent_model(
+        str(BLOCKER_MODEL_PATH)
+    )
@@ -0,0 +1,354 @@
+from pathlib import Path
+
+import gymnasium as gym
+import numpy as np
+import pytest
+
+from gymnasium_search_race.envs.map_sampler import PrioritizedMapSampler, SumTree
+from gymnasium_search_race.envs.opponents import HEURISTIC_OPPONENT, OpponentPool
+from gymnasium_search_race.storage import (
+    BestActionsStore,
+    TrajectoryDataset,
+    TrajectoryWriter,
+    read_best_actions,
+)
+from gymnasium_search_race.wrappers import (
+    PrioritizedMaps,
+    RecordBestEpisodeStatistics,
+    RecordPhysicsEvents,
+    RecordTopEpisodes,
+    RecordTrajectories,
+    SampleOpponent,
+    ValidateVectorActions,
+)
+
+ROOT_PATH = Path(__file__).resolve().parents[1]
+AGENTS_PATH = ROOT_PATH / "rl-trained-agents" / "ppo"
+BEST_ACTIONS_PATH = ROOT_PATH / "data" / "best_actions.json.gz"
+BLOCKER_MODEL_PATH = (
+    AGENTS_PATH
+    / "gymnasium_search_race-MadPodRacingBlockerDiscrete-v2_1"
+    / "best_model.zip"
+)
+RUNNER_MODEL_PATH = (
+    AGENTS_PATH / "gymnasium_search_race-MadPodRacingDiscrete-v2_1" / "best_model.zip"
+)
+
+
+def test_record_physics_events():
+    env = RecordPhysicsEvents(
+        gym.make(
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+            opponent_path=BLOCKER_MODEL_PATH,
+        )
+    )
+    env.reset(seed=42)
+    terminated = truncated = False
+    episode_length = 0
+
+    while not terminated and not truncated:
+        _observation, _reward, terminated, truncated, info = env.step(
+            env.action_space.sample()
+        )
+        episode_length += 1
+
+    episode_events = info["episode_physics_events"]
+    assert episode_events["sub_steps"] >= episode_length
+    assert episode_events["max_sub_steps"] >= 1
+    assert episode_events["collision_checks"] == 3 * episode_events["sub_steps"]
+    assert len(env.events_queue) == 1
+
+
+def test_record_top_episodes(tmp_path: Path):
+    env = RecordTopEpisodes(
+        RecordBestEpisodeStatistics(
+            gym.make(
+                "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+                test_id=1,
+                laps=1,
+            )
+        ),
+        k=3,
+    )
+    assert env.top_actions.shape == (3, 600)
+    env.action_space.seed(42)
+    episode_keys = []
+
+    for _ in range(10):
+        env.reset(seed=42)
+        terminated = truncated = False
+        while not terminated and not truncated:
+            _obs, _reward, terminated, truncated, _info = env.step(
+                env.action_space.sample()
+            )
+        episode_keys.append(
+            (float(env.episode_returns), -env.episode_lengths),
+        )
+
+    top_episodes = env.top_episodes()
+    expected_keys = sorted(episode_keys, reverse=True)[:3]
+    assert [(r, -length) for r, length, _ in top_episodes] == expected_keys
+
+    _returns, length, actions = top_episodes[0]
+    assert length == env.get_wrapper_attr("best_episode_lengths")
+    np.testing.assert_array_equal(
+        actions,
+        env.get_wrapper_attr("best_episode_actions"),
+    )
+
+    # the random episodes are truncated before the last checkpoint
+    store = BestActionsStore(tmp_path / "best_actions.bin")
+    assert not env.flush(store)
+    assert 1 not in store
+
+    env = RecordTopEpisodes(
+        gym.make(
+            "gymnasium_search_race:gymnasium_search_race/SearchRace-v3",
+            test_id=1,
+        ),
+    )
+    best_actions = read_best_actions(BEST_ACTIONS_PATH)["1"]
+    env.reset(seed=42)
+
+    for action in best_actions:
+        _obs, _reward, terminated, _truncated, _info = env.step(
+            np.array(action) / [18, 200]
+        )
+
+    assert terminated
+    assert env.flush(store)
+    np.testing.assert_array_equal(store.get_actions(1), best_actions)
+    assert not env.flush(store)
+
+
+def test_record_top_episodes_max_episode_steps():
+    # the wrapped env does not step past the buffers
+    env = RecordTopEpisodes(
+        gym.make(
+            "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+            test_id=1,
+        ),
+        max_episode_steps=2,
+    )
+    env.reset(seed=42)
+    env.step(0)
+    env.step(0)
+    car = env.unwrapped.car
+    position = (car.x, car.y)
+
+    with pytest.raises(RuntimeError):
+        env.step(0)
+
+    assert (env.unwrapped.car.x, env.unwrapped.car.y) == position
+
+
+def test_record_trajectories(tmp_path: Path):
+    env = gym.make(
+        "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+        test_id=2,
+    )
+    writer = TrajectoryWriter(
+        path=tmp_path,
+        observation_shape=env.observation_space.shape,
+        observation_dtype=env.observation_space.dtype,
+        action_shape=env.action_space.shape,
+        action_dtype=env.action_space.dtype,
+        shard_size=100,
+    )
+    env = RecordTrajectories(env, writer=writer)
+    observations = []
+    actions = []
+
+    observation, _info = env.reset(seed=42)
+    terminated = truncated = False
+
+    while not terminated and not truncated:
+        action = env.action_space.sample()
+        observations.append(observation)
+        actions.append(action)
+        observation, _reward, terminated, truncated, _info = env.step(action)
+
+    env.close()
+
+    dataset = TrajectoryDataset(tmp_path)
+    assert len(dataset) == len(actions) == 600
+    assert len(dataset.manifest["shards"]) == 6
+
+    minibatches = list(dataset.iter_minibatches(batch_size=64))
+    assert all(isinstance(batch["obs"], np.memmap) for batch in minibatches)
+    np.testing.assert_array_equal(
+        np.concatenate([batch["obs"] for batch in minibatches]),
+        observations,
+    )
+    np.testing.assert_array_equal(
+        np.concatenate([batch["action"] for batch in minibatches]),
+        actions,
+    )
+    assert minibatches[-1]["truncated"][-1]
+    assert set(np.concatenate([batch["test_id"] for batch in minibatches])) == {2}
+
+
+@pytest.mark.parametrize(
+    "env_id,invalid_action",
+    (
+        ("gymnasium_search_race:gymnasium_search_race/SearchRace-v3", [0.0, 2.0]),
+        ("gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3", 74),
+    ),
+)
+def test_validate_vector_actions(env_id: str, invalid_action):
+    num_envs = 4
+    envs = ValidateVectorActions(
+        gym.make_vec(
+            env_id,
+            num_envs=num_envs,
+            vectorization_mode="sync",
+            test_id=1,
+            vector_kwargs={"autoreset_mode": gym.vector.AutoresetMode.SAME_STEP},
+            validate_actions=False,
+        )
+    )
+    envs.reset(seed=42)
+
+    for _ in range(10):
+        envs.step(envs.action_space.sample())
+
+    actions = envs.action_space.sample()
+    actions[1] = invalid_action
+
+    with pytest.raises(AssertionError):
+        envs.step(actions)
+
+    envs.close()
+
+
+def test_sum_tree():
+    priorities = np.array([1.0, 0.0, 3.0, 2.0, 4.0])
+    tree = SumTree(capacity=len(priorities))
+
+    for index, priority in enumerate(priorities):
+        tree.update(index, priority)
+
+    assert tree.total == priorities.sum()
+
+    rng = np.random.default_rng(42)
+    samples = [tree.find(value) for value in rng.uniform(0, tree.total, 10_000)]
+    frequencies = np.bincount(samples, minlength=len(priorities)) / len(samples)
+    np.testing.assert_allclose(frequencies, priorities / priorities.sum(), atol=0.02)
+
+
+def test_prioritized_maps():
+    env = PrioritizedMaps(
+        gym.make(
+            "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+            procedural_maps=True,
+            max_episode_steps=20,
+        ),
+        n_maps=1000,
+    )
+    env.reset(seed=42)
+    map_indexes = set()
+
+    for _ in range(10):
+        map_indexes.add(env.get_wrapper_attr("map_index"))
+        terminated = truncated = False
+
+        while not terminated and not truncated:
+            _observation, _reward, terminated, truncated, _info = env.step(
+                env.action_space.sample()
+            )
+
+        env.reset()
+
+    sampler = env.sampler
+    assert isinstance(sampler, PrioritizedMapSampler)
+    assert sampler.max_episode_steps == 20
+    assert np.sum(~np.isnan(sampler.episode_lengths)) == len(map_indexes)
+
+    # the maps where the agent failed keep the maximum priority
+    assert np.all(sampler.priorities()[list(map_indexes)] == 1.0)
+
+    sampler.update(index=0, episode_length=2, failure=False)
+    assert sampler.priorities()[0] == 0.1
+
+
+def test_prioritized_maps_options():
+    env = PrioritizedMaps(
+        gym.make(
+            "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+            max_episode_steps=5,
+        ),
+    )
+    test_ids = env.get_wrapper_attr("test_ids")
+
+    for n_episodes, (options, index) in enumerate(
+        (({"test_id": test_ids[1]}, 1), ({"map_index": 2}, 2)),
+        start=1,
+    ):
+        env.reset(seed=0, options=options)
+        assert env.get_wrapper_attr("map_index") == index
+        assert env.get_wrapper_attr("test_index") == index
+
+        for _ in range(5):
+            env.step(env.action_space.sample())
+
+        # the episode is recorded against the map chosen by the caller
+        assert env.sampler.episode_lengths[index] == 5
+        assert np.sum(~np.isnan(env.sampler.episode_lengths)) == n_episodes
+
+    # the test maps played instead of procedural maps are not recorded
+    env = PrioritizedMaps(
+        gym.make(
+            "gymnasium_search_race:gymnasium_search_race/SearchRaceDiscrete-v3",
+            procedural_maps=True,
+            max_episode_steps=5,
+        ),
+        n_maps=10,
+    )
+    env.reset(seed=0, options={"test_id": test_ids[1]})
+    assert env.get_wrapper_attr("test_index") == 1
+
+    for _ in range(5):
+        env.step(env.action_space.sample())
+
+    assert np.all(np.isnan(env.sampler.episode_lengths))
+
+
+def test_sample_opponent():
+    pool = OpponentPool([BLOCKER_MODEL_PATH, HEURISTIC_OPPONENT])
+    env = SampleOpponent(
+        gym.make(
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+        ),
+        pool=pool,
+    )
+    env.reset(seed=42)
+    opponent_names = set()
+
+    for _ in range(10):
+        opponent_names.add(env.opponent_name)
+        assert env.unwrapped.opponent_model is pool.models[env.opponent_name]
+
+        for _ in range(5):
+            env.step(env.action_space.sample())
+
+        assert env.get_wrapper_attr("opponent_car") is not None
+        env.reset()
+
+    assert opponent_names == set(pool.names)
+
+
+def test_sample_opponent_mixed_pool():
+    # the runners of the pool are not sampled as opponents of a runner
+    pool = OpponentPool([RUNNER_MODEL_PATH, BLOCKER_MODEL_PATH])
+    env = SampleOpponent(
+        gym.make(
+            "gymnasium_search_race:gymnasium_search_race/MadPodRacingDiscrete-v2",
+        ),
+        pool=pool,
+    )
+    env.reset(seed=42)
+
+    for _ in range(5):
+        assert env.opponent_name == str(BLOCKER_MODEL_PATH)
+        env.step(env.action_space.sample())
+        env.reset()